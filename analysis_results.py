@@ -0,0 +1,303 @@
+"""
+Analysis Result Types
+Compact, slotted result objects for high-volume steganalysis
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+
+# Columnar layout of ChiSquareResult.to_record()
+CHI_SQUARE_DTYPE = np.dtype([
+    ('channel', 'U9'),
+    ('total_pixels', np.int64),
+    ('lsb_0_count', np.int64),
+    ('lsb_1_count', np.int64),
+    ('chi_square_statistic', np.float64),
+    ('p_value', np.float64),
+    ('deviation_from_50_50', np.float64),
+    ('non_random', np.bool_),
+    ('samples_used', np.int64),
+])
+
+# Columnar layout of ComparisonResult.to_record()
+COMPARISON_DTYPE = np.dtype([
+    ('original_p_value', np.float64),
+    ('stego_p_value', np.float64),
+    ('original_deviation', np.float64),
+    ('stego_deviation', np.float64),
+    ('deviation_change', np.float64),
+    ('p_value_change', np.float64),
+    ('rating', 'U9'),
+    ('detection_changed', np.bool_),
+])
+
+# Deviation-change edges (%) between the EXCELLENT / GOOD / FAIR / POOR ratings
+COMPARISON_BANDS = (0.5, 1.0, 2.0)
+
+# Rating, display color and verdict for each band
+_RATINGS = (
+    ("EXCELLENT", "green", "STEGANOGRAPHY UNDETECTABLE"),
+    ("GOOD", "lightgreen", "STEGANOGRAPHY MOSTLY UNDETECTABLE"),
+    ("FAIR", "yellow", "STEGANOGRAPHY POSSIBLY DETECTABLE"),
+    ("POOR", "red", "STEGANOGRAPHY DETECTABLE"),
+)
+
+
+@dataclass
+class ChiSquareResult:
+    """
+    Chi-Square LSB test result holding only the numbers.
+
+    Percentages, verdict and the explanation text are derived on access,
+    so batch callers that never read them never build the prose. Supports
+    result['key'] for the keys of the dict form, to_dict() for the full
+    dict of chi_square_attack, and to_record() for columnar storage
+    (CHI_SQUARE_DTYPE). Sampled results keep their extra keys in sampling.
+    """
+
+    __slots__ = ('channel', 'lsb_0_count', 'lsb_1_count', 'chi_square_statistic',
+                 'p_value', 'sampling')
+
+    channel: str
+    lsb_0_count: int
+    lsb_1_count: int
+    chi_square_statistic: float
+    p_value: float
+    sampling: dict
+
+    # Standard threshold: p < 0.05 means "statistically significant difference"
+    threshold_alpha = 0.05
+
+    @property
+    def total_pixels(self) -> int:
+        return self.lsb_0_count + self.lsb_1_count
+
+    @property
+    def lsb_0_percent(self) -> float:
+        return (self.lsb_0_count / self.total_pixels) * 100
+
+    @property
+    def lsb_1_percent(self) -> float:
+        return (self.lsb_1_count / self.total_pixels) * 100
+
+    @property
+    def deviation_from_50_50(self) -> float:
+        return abs(self.lsb_0_percent - 50.0)
+
+    @property
+    def samples_used(self) -> int:
+        return self.total_pixels if self.sampling is None else self.sampling['samples_used']
+
+    @property
+    def non_random(self) -> bool:
+        return self.p_value < self.threshold_alpha
+
+    @property
+    def verdict(self) -> str:
+        return "NON-RANDOM LSB DISTRIBUTION" if self.non_random else "RANDOM-LOOKING LSB DISTRIBUTION"
+
+    @property
+    def detection_confidence(self) -> str:
+        if self.sampling is not None and not self.sampling['verdict_decided']:
+            return "Low"
+        if self.non_random:
+            return "High"
+        return "Low" if self.p_value < 0.2 else "Very Low"
+
+    @property
+    def explanation(self) -> str:
+        deviation = self.deviation_from_50_50
+        distribution = (f"Current distribution: {self.lsb_0_percent:.2f}% zeros / "
+                        f"{self.lsb_1_percent:.2f}% ones. ")
+        if self.non_random:
+            return (
+                f"LSB distribution deviates {deviation:.2f}% from perfect randomness (50/50). "
+                + distribution +
+                "\n\nWARNING: This result is NORMAL for natural photographs. "
+                "Real photos almost always have biased LSB distributions due to camera sensors, "
+                "compression artifacts, and scene characteristics. "
+                "\n\nNOTE: This test CANNOT determine if a hidden message exists. "
+                "\nNote: To properly evaluate DP-steganography, use the 'Compare Images' feature "
+                "to analyze how much the distribution changed from original to stego image."
+            )
+        return (
+            f"LSB distribution is close to random (50/50), with only {deviation:.2f}% deviation. "
+            + distribution +
+            "\n\nIMPORTANT: This result is RARE for natural photographs. "
+            "This suggests either: (1) synthetic/noise image, (2) previous randomization, "
+            "or (3) extremely uniform scene. "
+            "\n\nNOTE: This test STILL CANNOT determine if a message exists. "
+            "\nNote: Use 'Compare Images' for proper steganographic analysis."
+        )
+
+    def __getitem__(self, key: str):
+        if key in _CHI_SQUARE_KEYS:
+            return getattr(self, key)
+        if self.sampling is not None:
+            return self.sampling[key]
+        raise KeyError(key)
+
+    def to_dict(self) -> dict:
+        """Full result dict, as returned by chi_square_attack."""
+        result = {key: getattr(self, key) for key in _CHI_SQUARE_KEYS}
+        if self.sampling is not None:
+            result.update(self.sampling)
+        return result
+
+    def to_record(self) -> tuple:
+        """Row for a CHI_SQUARE_DTYPE array."""
+        return (self.channel, self.total_pixels, self.lsb_0_count, self.lsb_1_count,
+                self.chi_square_statistic, self.p_value, self.deviation_from_50_50,
+                self.non_random, self.samples_used)
+
+
+_CHI_SQUARE_KEYS = ('channel', 'total_pixels', 'lsb_0_count', 'lsb_1_count', 'lsb_0_percent',
+                    'lsb_1_percent', 'deviation_from_50_50', 'chi_square_statistic', 'p_value',
+                    'verdict', 'detection_confidence', 'explanation', 'threshold_alpha')
+
+
+@dataclass
+class ComparisonResult:
+    """
+    Original-vs-stego comparison holding the two Chi-Square results.
+
+    The rating follows from the deviation change; the summary and the
+    interpretation guide are only formatted when read. to_dict() returns
+    the nested dict of compare_images.
+    """
+
+    __slots__ = ('original', 'stego', 'sampling')
+
+    original: ChiSquareResult
+    stego: ChiSquareResult
+    sampling: dict
+
+    @property
+    def deviation_change(self) -> float:
+        return abs(self.stego.deviation_from_50_50 - self.original.deviation_from_50_50)
+
+    @property
+    def p_value_change(self) -> float:
+        return self.stego.p_value - self.original.p_value
+
+    @property
+    def detection_changed(self) -> bool:
+        return self.original.verdict != self.stego.verdict
+
+    @property
+    def band(self) -> int:
+        return sum(self.deviation_change >= edge for edge in COMPARISON_BANDS)
+
+    @property
+    def rating(self) -> str:
+        return _RATINGS[self.band][0]
+
+    @property
+    def color(self) -> str:
+        return _RATINGS[self.band][1]
+
+    @property
+    def verdict(self) -> str:
+        return _RATINGS[self.band][2]
+
+    @property
+    def summary(self) -> str:
+        change = self.deviation_change
+        return (
+            f"Deviation changed by only {change:.3f}% - virtually undetectable! "
+            "The DP mechanism successfully masked the message embedding.",
+            f"Deviation changed by {change:.3f}% - good concealment. "
+            "The embedding is well-hidden but not perfect.",
+            f"Deviation changed by {change:.3f}% - moderate risk. "
+            "The embedding caused noticeable statistical change.",
+            f"Deviation changed by {change:.3f}% - high risk of detection! "
+            "Consider: longer message to use more capacity, or adjust epsilon value.",
+        )[self.band]
+
+    @property
+    def interpretation(self) -> str:
+        # Explain why both might show "NON-RANDOM"
+        return (
+            "\n━━━ INTERPRETATION GUIDE ━━━\n\n"
+            f"Original Image: {self.original.verdict}\n"
+            f"  └─ Deviation: {self.original.deviation_from_50_50:.2f}% from perfect randomness\n"
+            f"  └─ This is NORMAL for natural photographs!\n\n"
+            f"Stego Image: {self.stego.verdict}\n"
+            f"  └─ Deviation: {self.stego.deviation_from_50_50:.2f}% from perfect randomness\n\n"
+            f"Change in Deviation: {self.deviation_change:.3f}%\n"
+            f"  └─ This is the KEY metric!\n"
+            f"  └─ Small change = Good DP protection\n"
+            f"  └─ Large change = Detectable steganography\n\n"
+            f"VERDICT: {self.verdict}\n"
+            f"EFFECTIVENESS: {self.rating}\n"
+            f"REASON: {self.summary}"
+        )
+
+    def to_dict(self) -> dict:
+        """Nested result dict, as returned by compare_images."""
+        original_p = self.original.p_value
+        result = {
+            'original': self.original.to_dict(),
+            'stego': self.stego.to_dict(),
+            'changes': {
+                'p_value_change': self.p_value_change,
+                'p_value_change_percent': (self.p_value_change / original_p) * 100 if original_p > 0 else 0,
+                'deviation_change': self.deviation_change,
+                'original_deviation': self.original.deviation_from_50_50,
+                'stego_deviation': self.stego.deviation_from_50_50,
+                'detection_changed': self.detection_changed,
+            },
+            'effectiveness': {
+                'rating': self.rating,
+                'color': self.color,
+                'verdict': self.verdict,
+                'summary': self.summary,
+                'interpretation': self.interpretation
+            }
+        }
+        if self.sampling is not None:
+            result['sampling'] = self.sampling
+        return result
+
+    def to_record(self) -> tuple:
+        """Row for a COMPARISON_DTYPE array."""
+        return (self.original.p_value, self.stego.p_value,
+                self.original.deviation_from_50_50, self.stego.deviation_from_50_50,
+                self.deviation_change, self.p_value_change, self.rating,
+                self.detection_changed)
+
+
+class ResultArray:
+    """
+    Growable columnar store of results as a NumPy structured array.
+
+    append() takes any result with to_record() (or a plain tuple) and grows
+    the backing array by doubling, so a million appends cost O(n) copies.
+    The array property is a view of the filled rows; columns are
+    array['p_value'] and so on.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int = 1024):
+        self._data = np.empty(max(1, capacity), dtype=dtype)
+        self._size = 0
+
+    def append(self, result) -> None:
+        if self._size == len(self._data):
+            grown = np.empty(2 * len(self._data), dtype=self._data.dtype)
+            grown[:self._size] = self._data
+            self._data = grown
+        self._data[self._size] = result.to_record() if hasattr(result, 'to_record') else result
+        self._size += 1
+
+    def extend(self, results) -> None:
+        for result in results:
+            self.append(result)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[:self._size]
@@ -0,0 +1,361 @@
+"""
+Batch Steganalysis
+Runs the steganalysis tests headless over a directory tree of images
+
+Usage:
+    python batch_analysis.py images/                         # JSON Lines to stdout
+    python batch_analysis.py corpus/ -o results.jsonl -w 8   # 8 worker processes
+    python batch_analysis.py corpus/ -o results.csv --format csv --tests chi_square,spa
+    python batch_analysis.py corpus/ -o results.jsonl --resume   # continue after interruption
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from utils import load_rgb_array, find_images
+from steganalysis import (channel_histograms, chi_square_from_histograms,
+                          pairs_of_values_from_histograms, chi_square_attack_array,
+                          rs_analysis_array, sample_pairs_analysis_array)
+
+
+# Tests that can be requested with --tests, in output order
+TESTS = ('chi_square', 'multi_channel', 'pov', 'rs', 'spa')
+DEFAULT_TESTS = ('chi_square', 'multi_channel')
+
+# Futures kept in flight per worker (bounds memory on huge corpora)
+IN_FLIGHT_PER_WORKER = 4
+
+# Seconds between progress lines on stderr
+PROGRESS_INTERVAL = 5.0
+
+# Bytes read at a time when looking for the last complete line on --resume
+TAIL_CHUNK_BYTES = 1 << 16
+
+
+# ============================================================================
+# PER-IMAGE ANALYSIS (runs in the worker processes)
+# ============================================================================
+
+def analyze_file(path: str, tests: tuple, channel: str = 'all', sampled: bool = False) -> dict:
+    """
+    Run the requested tests on one image and flatten the results into a record.
+
+    The image is decoded once. Chi-square, multi-channel and pairs-of-values
+    results all come from one channel_histograms pass, and the chi-square
+    results are lean, so no explanation text is built.
+
+    Args:
+        path (str): Image file
+        tests (tuple): Names from TESTS
+        channel (str): Channel for the single-channel tests ('red', 'green', 'blue', or 'all')
+        sampled (bool): Use the sampled chi-square estimate
+
+    Returns:
+        dict: Flat record; 'error' is set instead of the results if the image failed
+    """
+    start = time.perf_counter()
+    record = {'path': path}
+    try:
+        image = load_rgb_array(path)
+        record['width'] = image.shape[1]
+        record['height'] = image.shape[0]
+
+        histograms = None
+        if {'multi_channel', 'pov'} & set(tests) or ('chi_square' in tests and not sampled):
+            histograms = channel_histograms(image)
+
+        if 'chi_square' in tests:
+            if sampled:
+                result = chi_square_attack_array(image, channel, sampled=True, lean=True)
+                record['chi_square_samples_used'] = result['samples_used']
+            else:
+                result = chi_square_from_histograms(histograms, channel, lean=True)
+            record['chi_square_statistic'] = result['chi_square_statistic']
+            record['chi_square_p_value'] = result['p_value']
+            record['chi_square_deviation'] = result['deviation_from_50_50']
+            record['chi_square_verdict'] = result['verdict']
+
+        if 'multi_channel' in tests:
+            for name in ('red', 'green', 'blue'):
+                result = chi_square_from_histograms(histograms, name, lean=True)
+                record[f'{name}_p_value'] = result['p_value']
+                record[f'{name}_deviation'] = result['deviation_from_50_50']
+                record[f'{name}_verdict'] = result['verdict']
+
+        if 'pov' in tests:
+            result = pairs_of_values_from_histograms(histograms, channel)
+            record['pov_statistic'] = result['chi_square_statistic']
+            record['pov_p_value'] = result['p_value']
+            record['pov_verdict'] = result['verdict']
+
+        if 'rs' in tests:
+            result = rs_analysis_array(image, channel)
+            record['rs_payload'] = result['estimated_payload']
+            record['rs_verdict'] = result['verdict']
+
+        if 'spa' in tests:
+            result = sample_pairs_analysis_array(image, channel)
+            record['spa_payload'] = result['estimated_payload']
+            record['spa_verdict'] = result['verdict']
+
+    except Exception as e:
+        record['error'] = f"{type(e).__name__}: {e}"
+
+    record['seconds'] = round(time.perf_counter() - start, 4)
+    return _plain(record)
+
+
+def _plain(record: dict) -> dict:
+    """Convert NumPy scalars to Python numbers so records serialize as JSON."""
+    return {key: value.item() if hasattr(value, 'item') else value
+            for key, value in record.items()}
+
+
+def record_fields(tests: tuple, sampled: bool = False) -> list:
+    """CSV columns produced by analyze_file for a set of tests."""
+    fields = ['path', 'width', 'height']
+    if 'chi_square' in tests:
+        if sampled:
+            fields.append('chi_square_samples_used')
+        fields += ['chi_square_statistic', 'chi_square_p_value', 'chi_square_deviation',
+                   'chi_square_verdict']
+    if 'multi_channel' in tests:
+        for name in ('red', 'green', 'blue'):
+            fields += [f'{name}_p_value', f'{name}_deviation', f'{name}_verdict']
+    if 'pov' in tests:
+        fields += ['pov_statistic', 'pov_p_value', 'pov_verdict']
+    if 'rs' in tests:
+        fields += ['rs_payload', 'rs_verdict']
+    if 'spa' in tests:
+        fields += ['spa_payload', 'spa_verdict']
+    return fields + ['seconds', 'error']
+
+
+# ============================================================================
+# MANIFEST AND OUTPUT
+# ============================================================================
+
+def manifest_path(output: str) -> str:
+    """The manifest sits next to the output file."""
+    return output + '.manifest'
+
+
+def load_manifest(path: str) -> set:
+    """Paths already written to the output, one per manifest line."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.rstrip('\n') for line in f if line.strip()}
+
+
+def drop_partial_line(path: str) -> None:
+    """Truncate a file after its last newline (an interrupted write's partial line)."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - TAIL_CHUNK_BYTES)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+
+
+class ResultWriter:
+    """
+    Streams records as JSON Lines or CSV and records finished paths in a manifest.
+
+    Each record is flushed before its path is added to the manifest, so after
+    an interruption every path in the manifest has a complete output row.
+    Only successful records enter the manifest: images that failed are
+    analyzed again by --resume (their error row stays in the output, and
+    the retry appends a new row).
+
+    When resuming, a last line cut off by the interruption is dropped from
+    the output and the manifest before appending, and a CSV output must
+    have been written with the same fields (else ValueError).
+    """
+
+    def __init__(self, output: str, fmt: str, fields: list, resume: bool):
+        self.format = fmt
+        self.manifest = None
+        append = resume and output is not None and os.path.exists(output)
+        write_header = not append
+
+        if append:
+            drop_partial_line(output)
+            drop_partial_line(manifest_path(output))
+            if fmt == 'csv':
+                with open(output, 'r', encoding='utf-8', newline='') as f:
+                    header = next(csv.reader(f), None)
+                if header is None:
+                    write_header = True
+                elif header != fields:
+                    raise ValueError(f"{output} was written with different columns; "
+                                     "resume with the same --tests and --sampled options")
+
+        if output is None:
+            self.stream = sys.stdout
+        else:
+            self.stream = open(output, 'a' if append else 'w', encoding='utf-8', newline='')
+            self.manifest = open(manifest_path(output), 'a' if append else 'w', encoding='utf-8')
+
+        if fmt == 'csv':
+            self.csv = csv.DictWriter(self.stream, fieldnames=fields, extrasaction='ignore')
+            if write_header:
+                self.csv.writeheader()
+
+    def write(self, record: dict) -> None:
+        if self.format == 'csv':
+            self.csv.writerow(record)
+        else:
+            self.stream.write(json.dumps(record) + '\n')
+        self.stream.flush()
+
+        if self.manifest is not None and 'error' not in record:
+            self.manifest.write(record['path'] + '\n')
+            self.manifest.flush()
+
+    def close(self) -> None:
+        if self.stream is not sys.stdout:
+            self.stream.close()
+        if self.manifest is not None:
+            self.manifest.close()
+
+
+# ============================================================================
+# DRIVER
+# ============================================================================
+
+def run_batch(paths: list, writer: ResultWriter, tests: tuple, channel: str = 'all',
+              sampled: bool = False, workers: int = None) -> dict:
+    """
+    Fan images out over a process pool and write records as they complete.
+
+    At most workers * IN_FLIGHT_PER_WORKER images are queued at a time, so
+    memory stays flat on corpora of any size.
+
+    Args:
+        paths (list): Image files to analyze
+        writer (ResultWriter): Output sink
+        tests (tuple): Names from TESTS
+        channel (str): Channel for the single-channel tests
+        sampled (bool): Use the sampled chi-square estimate
+        workers (int): Worker processes (None = CPU count)
+
+    Returns:
+        dict: images, errors, seconds and images_per_second
+    """
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    last_report = start
+    done = errors = 0
+    pending = set()
+    queue = iter(paths)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while len(pending) < workers * IN_FLIGHT_PER_WORKER:
+                path = next(queue, None)
+                if path is None:
+                    break
+                pending.add(pool.submit(analyze_file, path, tests, channel, sampled))
+            if not pending:
+                break
+
+            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                writer.write(record)
+                done += 1
+                errors += 'error' in record
+
+            now = time.perf_counter()
+            if now - last_report >= PROGRESS_INTERVAL:
+                last_report = now
+                print(f"  {done}/{len(paths)} images, {done / (now - start):.2f} images/s",
+                      file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    return {
+        'images': done,
+        'errors': errors,
+        'seconds': elapsed,
+        'images_per_second': done / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def parse_tests(value: str) -> tuple:
+    """argparse type for --tests: comma-separated names from TESTS."""
+    tests = tuple(name.strip() for name in value.split(',') if name.strip())
+    unknown = [name for name in tests if name not in TESTS]
+    if unknown or not tests:
+        raise argparse.ArgumentTypeError(
+            f"unknown test(s) {', '.join(unknown) or '(none)'}; choose from {', '.join(TESTS)}")
+    return tuple(name for name in TESTS if name in tests)
+
+
+def main(argv: list) -> int:
+    parser = argparse.ArgumentParser(description="Run steganalysis over a directory of images.")
+    parser.add_argument('root', help="Image file or directory to walk")
+    parser.add_argument('-o', '--output', help="Output file (default: stdout)")
+    parser.add_argument('-f', '--format', choices=('jsonl', 'csv'),
+                        help="Output format (default: from the output extension, else jsonl)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument('-t', '--tests', type=parse_tests, default=DEFAULT_TESTS,
+                        help=f"Comma-separated tests from {', '.join(TESTS)} "
+                             f"(default: {','.join(DEFAULT_TESTS)})")
+    parser.add_argument('-c', '--channel', choices=('red', 'green', 'blue', 'all'), default='all',
+                        help="Channel for the single-channel tests (default: all)")
+    parser.add_argument('--sampled', action='store_true',
+                        help="Use the sampled chi-square estimate (images are still decoded in full)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Skip images that succeeded in a previous run and append (failed ones are retried)")
+    args = parser.parse_args(argv)
+
+    if args.resume and not args.output:
+        parser.error("--resume needs --output (the manifest sits next to it)")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers must be at least 1")
+    fmt = args.format or ('csv' if args.output and args.output.lower().endswith('.csv') else 'jsonl')
+
+    paths = find_images(args.root)
+    skipped = 0
+    if args.resume:
+        finished = load_manifest(manifest_path(args.output))
+        remaining = [path for path in paths if path not in finished]
+        skipped = len(paths) - len(remaining)
+        paths = remaining
+
+    print(f"Analyzing {len(paths)} images ({skipped} already done) with tests: "
+          f"{', '.join(args.tests)}", file=sys.stderr)
+
+    try:
+        writer = ResultWriter(args.output, fmt, record_fields(args.tests, args.sampled), args.resume)
+    except ValueError as e:
+        parser.error(str(e))
+    try:
+        summary = run_batch(paths, writer, args.tests, args.channel, args.sampled, args.workers)
+    finally:
+        writer.close()
+
+    print(f"Done: {summary['images']} images ({summary['errors']} errors) in "
+          f"{summary['seconds']:.2f} s, {summary['images_per_second']:.2f} images/s",
+          file=sys.stderr)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,931 @@
+"""
+Performance Benchmarks for DP-Enhanced Steganography
+Times the core engine against reference implementations on synthetic covers
+
+Usage:
+    python benchmarks.py            # run every benchmark
+    python benchmarks.py embed      # run a single benchmark by name
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+import png_stream
+from core_engine import (embed, extract, embed_bits, extract_bits, embed_standard_lsb,
+                         embed_array, _embedding_plan, get_image_capacity,
+                         get_directory_capacity)
+from utils import (password_to_seed, string_to_bits, get_pixel_indices, payload_to_bits,
+                   bits_to_text,
+                   PATH_FORMAT_SHUFFLE, PATH_FORMAT_FEISTEL, clear_permutation_cache,
+                   permutation_cache_info, configure_permutation_cache,
+                   set_permutation_store, DEFAULT_PERMUTATION_CACHE_BYTES, DECODE_BAND_BYTES)
+from permutation_store import PermutationStore
+from steganalysis import (channel_histograms, chi_square_from_histograms, chi2_sf,
+                          pairs_of_values_attack_array,
+                          progressive_pairs_of_values_attack_array, rs_analysis_array,
+                          sample_pairs_analysis_array, lsb_heatmap_array,
+                          render_heatmap_overlay, chi_square_attack_array,
+                          compare_images_array, compare_images, configure_image_cache,
+                          chi_square_attack, DEFAULT_IMAGE_CACHE_BYTES)
+from cover_index import CoverIndex, MultiIndexHash, hamming_distance
+from analysis_results import ComparisonResult, ResultArray, CHI_SQUARE_DTYPE
+
+
+def make_cover(width: int, height: int, seed: int = 42) -> np.ndarray:
+    """Create a random RGB cover array of the given size."""
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+
+
+def _timed(func, *args, repeat: int = 3, **kwargs):
+    """Return (best wall time in seconds, result of the last call)."""
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+# ============================================================================
+# REFERENCE IMPLEMENTATIONS (original per-pixel loops)
+# ============================================================================
+
+def loop_embed(img_array: np.ndarray, pixel_indices: np.ndarray, message_bits: list,
+               true_count: int) -> np.ndarray:
+    """Original per-pixel embedding loop from core_engine.embed."""
+    height, width, channels = img_array.shape
+    stego_array = img_array.copy()
+    for bit_index, channel_index in enumerate(pixel_indices):
+        row = channel_index // (width * channels)
+        col = (channel_index % (width * channels)) // channels
+        channel = channel_index % channels
+        pixel_value = stego_array[row, col, channel]
+        if bit_index < true_count:
+            bit_to_embed = message_bits[bit_index]
+        else:
+            bit_to_embed = np.random.randint(0, 2)
+        stego_array[row, col, channel] = (pixel_value & 0xFE) | bit_to_embed
+    return stego_array
+
+
+def loop_extract(img_array: np.ndarray, pixel_indices: np.ndarray) -> list:
+    """Original per-pixel extraction loop from core_engine.extract."""
+    height, width, channels = img_array.shape
+    extracted_bits = []
+    for channel_index in pixel_indices:
+        row = channel_index // (width * channels)
+        col = (channel_index % (width * channels)) // channels
+        channel = channel_index % channels
+        extracted_bits.append(img_array[row, col, channel] & 1)
+    return extracted_bits
+
+
+def loop_standard_lsb(img_array: np.ndarray, message_bits: list) -> np.ndarray:
+    """Original triple-nested sequential loop from core_engine.embed_standard_lsb."""
+    height, width, channels = img_array.shape
+    stego_array = img_array.copy()
+    message_length = len(message_bits)
+    bit_index = 0
+    for row in range(height):
+        for col in range(width):
+            for channel in range(channels):
+                if bit_index >= message_length:
+                    break
+                pixel_value = stego_array[row, col, channel]
+                stego_array[row, col, channel] = (pixel_value & 0xFE) | message_bits[bit_index]
+                bit_index += 1
+            if bit_index >= message_length:
+                break
+        if bit_index >= message_length:
+            break
+    return stego_array
+
+
+def loop_string_to_bits(text: str) -> list:
+    """Original per-character encoder from utils.string_to_bits."""
+    bits = []
+    for char in text:
+        bits.extend([int(bit) for bit in format(ord(char), '08b')])
+    return bits
+
+
+def loop_bits_to_string(bits: list) -> str:
+    """Original per-byte decoder from utils.bits_to_string."""
+    text = ""
+    for i in range(0, len(bits), 8):
+        text += chr(int(''.join(str(bit) for bit in bits[i:i+8]), 2))
+    return text
+
+
+def loop_lsb_counts(img_array: np.ndarray) -> dict:
+    """Original per-channel LSB counting from steganalysis.chi_square_attack."""
+    counts = {}
+    for channel, data in (('red', img_array[:, :, 0].flatten()),
+                          ('green', img_array[:, :, 1].flatten()),
+                          ('blue', img_array[:, :, 2].flatten()),
+                          ('all', img_array.flatten())):
+        lsbs = data & 1
+        counts[channel] = (int(np.sum(lsbs == 0)), int(np.sum(lsbs == 1)))
+    return counts
+
+
+def copying_embed(cover_path: str, message, password: str, epsilon: float, save_path: str,
+                  path_format: str = PATH_FORMAT_SHUFFLE) -> None:
+    """Original embed buffer handling: convert, np.array, copy, astype and fromarray copies."""
+    img_array = np.array(Image.open(cover_path).convert("RGB"))
+    pixel_indices, bits_to_embed, _ = _embedding_plan(img_array.shape, message, password,
+                                                      epsilon, path_format)
+    stego_array = img_array.copy()
+    embed_bits(stego_array.reshape(-1), pixel_indices, bits_to_embed)
+    Image.fromarray(stego_array.astype('uint8'), 'RGB').save(save_path, "PNG")
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def bench_embed(width: int = 1024, height: int = 1024, message_chars: int = 20000) -> None:
+    """Vectorized embed/extract vs the original loops (same seed, same output)."""
+    print(f"\n[embed] {width}x{height} cover, {message_chars}-character message")
+
+    cover = make_cover(width, height)
+    message = ("benchmark payload " * (message_chars // 18 + 1))[:message_chars]
+    password = "BenchmarkPassword"
+    message_bits = string_to_bits(message)
+    true_count = len(message_bits)
+    total = true_count + 4000  # message plus a typical decoy tail
+    indices = get_pixel_indices(cover.shape, total, password_to_seed(password))
+
+    def vectorized_embed():
+        stego = cover.copy()
+        bits = np.empty(total, dtype=np.uint8)
+        bits[:true_count] = message_bits
+        bits[true_count:] = np.random.randint(0, 2, size=total - true_count)
+        embed_bits(stego.reshape(-1), indices, bits)
+        return stego
+
+    np.random.seed(7)
+    loop_time, loop_stego = _timed(loop_embed, cover, indices, message_bits, true_count,
+                                   repeat=1)
+    np.random.seed(7)
+    vec_time, vec_stego = _timed(vectorized_embed, repeat=1)
+    print(f"  embed kernel    loop: {loop_time * 1000:8.1f} ms   "
+          f"vectorized: {vec_time * 1000:8.2f} ms   "
+          f"speedup: {loop_time / vec_time:6.1f}x   "
+          f"bit-identical: {np.array_equal(loop_stego, vec_stego)}")
+
+    read_indices = indices[:true_count]
+    loop_time, loop_bits = _timed(loop_extract, vec_stego, read_indices, repeat=1)
+    vec_time, vec_bits = _timed(extract_bits, vec_stego.reshape(-1), read_indices)
+    print(f"  extract kernel  loop: {loop_time * 1000:8.1f} ms   "
+          f"vectorized: {vec_time * 1000:8.2f} ms   "
+          f"speedup: {loop_time / vec_time:6.1f}x   "
+          f"identical: {list(vec_bits) == loop_bits}")
+
+    # End to end through the public API (includes PNG decode/encode and the shuffle)
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        stego_path = os.path.join(tmp, "stego.png")
+        Image.fromarray(cover, 'RGB').save(cover_path, "PNG")
+        embed_time, stats = _timed(embed, cover_path, message, password, 0.5, stego_path,
+                                   repeat=1)
+        extract_time, recovered = _timed(extract, stego_path, password,
+                                         stats['message_length_bits'], repeat=1)
+        print(f"  end to end      embed: {embed_time * 1000:8.1f} ms   "
+              f"extract: {extract_time * 1000:8.1f} ms   "
+              f"round-trip ok: {recovered == message}")
+
+
+def bench_paths(width: int = 6000, height: int = 4000, message_bits: int = 800) -> None:
+    """Legacy full shuffle vs prefix-only Feistel path for a short message."""
+    print(f"\n[paths] {width}x{height} RGB ({width * height / 1e6:.0f} MP), "
+          f"{message_bits}-bit message")
+
+    shape = (height, width, 3)
+    seed = password_to_seed("BenchmarkPassword")
+    cover = make_cover(width, height)
+    flat = cover.reshape(-1)
+
+    for path_format in (PATH_FORMAT_SHUFFLE, PATH_FORMAT_FEISTEL):
+        repeat = 1 if path_format == PATH_FORMAT_SHUFFLE else 20
+        path_time, _ = _timed(get_pixel_indices, shape, message_bits, seed,
+                                    path_format, repeat=repeat)
+        extract_time, _ = _timed(
+            lambda: bits_to_text(extract_bits(flat, get_pixel_indices(
+                shape, message_bits, seed, path_format)).tolist()),
+            repeat=repeat,
+        )
+        print(f"  {path_format:8s} path: {path_time * 1000:9.3f} ms   "
+              f"in-memory extract: {extract_time * 1000:9.3f} ms")
+
+
+def bench_cache(width: int = 2000, height: int = 1500, calls: int = 20) -> None:
+    """Repeated same-shape path generation with a cold vs warm permutation cache."""
+    print(f"\n[cache] {calls} x get_pixel_indices on {width}x{height} RGB, one password")
+
+    shape = (height, width, 3)
+    seed = password_to_seed("BenchmarkPassword")
+
+    def run_batch(clear_each_call: bool) -> float:
+        clear_permutation_cache()
+        start = time.perf_counter()
+        for _ in range(calls):
+            if clear_each_call:
+                clear_permutation_cache()
+            get_pixel_indices(shape, 8000, seed)
+        return time.perf_counter() - start
+
+    uncached = run_batch(clear_each_call=True)
+    cached = run_batch(clear_each_call=False)
+    info = permutation_cache_info()
+    print(f"  no cache: {uncached * 1000:9.1f} ms   cached: {cached * 1000:9.1f} ms   "
+          f"hits/misses: {info['hits']}/{info['misses']}   "
+          f"resident: {info['current_bytes'] / 2**20:.1f} MiB")
+
+
+def bench_store(width: int = 4000, height: int = 3000, message_bits: int = 800) -> None:
+    """Cold-process path lookup: recompute the shuffle vs map it from the disk store."""
+    print(f"\n[store] {width}x{height} RGB, {message_bits}-bit prefix, cold in-memory cache")
+
+    shape = (height, width, 3)
+    seed = password_to_seed("BenchmarkPassword")
+    configure_permutation_cache(0)  # simulate a freshly restarted worker
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            compute_time, expected = _timed(get_pixel_indices, shape, message_bits, seed,
+                                            repeat=1)
+
+            set_permutation_store(PermutationStore(tmp))
+            write_time, _ = _timed(get_pixel_indices, shape, message_bits, seed, repeat=1)
+
+            # A new store object has no verification state, like a new process
+            set_permutation_store(PermutationStore(tmp))
+            load_time, loaded = _timed(get_pixel_indices, shape, message_bits, seed, repeat=1)
+            warm_time, _ = _timed(get_pixel_indices, shape, message_bits, seed)
+            print(f"  recompute: {compute_time * 1000:9.1f} ms   "
+                  f"first run + store write: {write_time * 1000:9.1f} ms")
+            print(f"  cold mmap load: {load_time * 1000:9.3f} ms   "
+                  f"warm mmap load: {warm_time * 1000:9.3f} ms   "
+                  f"identical: {np.array_equal(expected, loaded)}")
+    finally:
+        set_permutation_store(None)
+        configure_permutation_cache(DEFAULT_PERMUTATION_CACHE_BYTES)
+
+
+# Child process for bench_memory: builds a cover, generates the full path and
+# embeds a prefix, then prints its peak RSS in KiB (Linux ru_maxrss units)
+_MEMORY_PROBE = """
+import resource, sys
+import numpy as np
+from core_engine import embed_bits
+from utils import get_pixel_indices
+height, width, legacy = int(sys.argv[1]), int(sys.argv[2]), sys.argv[3] == 'legacy'
+cover = np.zeros((height, width, 3), dtype=np.uint8)
+total = cover.size
+if legacy:
+    indices = np.arange(total)
+    np.random.default_rng(1).shuffle(indices)
+    indices = indices[:80000]
+else:
+    indices = get_pixel_indices(cover.shape, 80000, 1)
+embed_bits(cover.reshape(-1), indices, np.ones(len(indices), dtype=np.uint8))
+print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def bench_memory(width: int = 8660, height: int = 5774) -> None:
+    """Peak RSS of path generation + embedding with int64 vs compact index paths."""
+    print(f"\n[memory] {width}x{height} RGB ({width * height / 1e6:.0f} MP) path + embed, "
+          f"one subprocess per mode")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    for mode in ('legacy', 'compact'):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, '-c', _MEMORY_PROBE, str(height), str(width), mode],
+            cwd=here, capture_output=True, text=True, check=True,
+        ).stdout
+        elapsed = time.perf_counter() - start
+        label = 'int64 (before)' if mode == 'legacy' else 'uint32 (after)'
+        print(f"  {label:15s} peak RSS: {int(output) / 1024:8.1f} MiB   "
+              f"wall: {elapsed:6.1f} s")
+
+
+# Child process for bench_stream_extract: extracts from a PNG and prints the
+# message length and its peak RSS in KiB. VmHWM is per address space, so
+# unlike ru_maxrss it does not inherit the (large) parent's peak across exec.
+_EXTRACT_PROBE = """
+import sys
+from core_engine import extract
+path, bits, streaming = sys.argv[1], int(sys.argv[2]), sys.argv[3] == 'streaming'
+message = extract(path, 'bench', bits, path_format='feistel', streaming=streaming)
+with open('/proc/self/status') as status:
+    peak = next(line.split()[1] for line in status if line.startswith('VmHWM'))
+print(len(message), peak)
+"""
+
+
+def bench_stream_extract(width: int = 8000, height: int = 6000, message_chars: int = 5000) -> None:
+    """Peak RSS and time of full-decode vs row-band streaming extraction."""
+    print(f"\n[streamextract] {width}x{height} PNG ({width * height / 1e6:.0f} MP), "
+          f"{message_chars} chars, one subprocess per mode")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stego.png")
+        stego, stats = embed_array(textured_cover(width, height), "x" * message_chars, "bench",
+                                   1.0, path_format='feistel')
+        Image.fromarray(stego).save(path)
+        del stego
+
+        for mode in ('full', 'streaming'):
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, '-c', _EXTRACT_PROBE, path, str(stats['message_length_bits']),
+                 mode], cwd=here, capture_output=True, text=True, check=True,
+            ).stdout.split()
+            elapsed = time.perf_counter() - start
+            print(f"  {mode:10s} peak RSS: {int(output[1]) / 1024:8.1f} MiB   "
+                  f"wall: {elapsed:6.2f} s   recovered {output[0]} chars")
+
+# Child process for bench_stream_embed: embeds into a PNG cover and prints
+# the output size and its peak RSS in KiB (VmHWM, see _EXTRACT_PROBE)
+_EMBED_PROBE = """
+import os, sys
+from core_engine import embed
+cover, output, streaming = sys.argv[1], sys.argv[2], sys.argv[3] == 'streaming'
+stats = embed(cover, 'x' * 20000, 'bench', 1.0, output, path_format='feistel', streaming=streaming)
+with open('/proc/self/status') as status:
+    peak = next(line.split()[1] for line in status if line.startswith('VmHWM'))
+print(os.path.getsize(stats['save_path']), peak)
+"""
+
+
+def bench_stream_embed(width: int = 8000, height: int = 6000) -> None:
+    """Peak RSS and time of full-image vs row-band streaming embedding."""
+    print(f"\n[streamembed] {width}x{height} PNG cover ({width * height / 1e6:.0f} MP), "
+          f"one subprocess per mode")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        Image.fromarray(textured_cover(width, height)).save(cover_path)
+
+        outputs = []
+        for mode in ('full', 'streaming'):
+            output_path = os.path.join(tmp, f"{mode}.png")
+            start = time.perf_counter()
+            output = subprocess.run(
+                [sys.executable, '-c', _EMBED_PROBE, cover_path, output_path, mode],
+                cwd=here, capture_output=True, text=True, check=True,
+            ).stdout.split()
+            elapsed = time.perf_counter() - start
+            outputs.append(output_path)
+            print(f"  {mode:10s} peak RSS: {int(output[1]) / 1024:8.1f} MiB   "
+                  f"wall: {elapsed:6.2f} s   PNG {int(output[0]) / 2**20:6.1f} MiB")
+
+        # Each mode drew its own DP noise; both must carry the message
+        for path in outputs:
+            assert extract(path, 'bench', 160000, path_format='feistel', streaming=True) == 'x' * 20000
+
+
+# Child process for bench_inplace: embeds into a PNG cover with the original
+# copying pipeline or embed() and prints its peak RSS in KiB (VmHWM, see
+# _EXTRACT_PROBE)
+_INPLACE_PROBE = """
+import sys
+from benchmarks import copying_embed
+from core_engine import embed
+cover, output, mode, path_format = sys.argv[1:5]
+run = copying_embed if mode == 'copying' else embed
+run(cover, 'x' * 20000, 'bench', 1.0, output, path_format=path_format)
+with open('/proc/self/status') as status:
+    print(next(line.split()[1] for line in status if line.startswith('VmHWM')))
+"""
+
+
+def bench_inplace(width: int = 6000, height: int = 4000) -> None:
+    """Peak allocations of the original copying embed vs single-buffer embed(), per path format."""
+    image_bytes = width * height * 3
+    message = "x" * 20000
+    print(f"\n[inplace] {width}x{height} PNG cover ({image_bytes / 2**20:.0f} MiB of RGB)")
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    with tempfile.TemporaryDirectory() as tmp:
+        check_png_writer(tmp)
+        print("  PngBandWriter round trip: identical")
+
+        cover_path = os.path.join(tmp, "cover.png")
+        Image.fromarray(textured_cover(width, height)).save(cover_path)
+
+        # Fixed temporaries of the codec (measured: about 3 decode bands for
+        # load_rgb_array and about 40 filter blocks for PngBandWriter)
+        row_bytes = width * 3
+        codec_bound = (4 * max(DECODE_BAND_BYTES, row_bytes)
+                       + 48 * max(png_stream.FILTER_BLOCK_BYTES, row_bytes))
+        print(f"  codec bound {codec_bound / 2**20:.0f} MiB")
+
+        for path_format in (PATH_FORMAT_FEISTEL, PATH_FORMAT_SHUFFLE):
+            # The pixel path comes on top of the image: 'shuffle' holds a
+            # 4-byte index per channel (kept in the permutation cache),
+            # 'feistel' only the message-sized prefix. Measured alone first.
+            clear_permutation_cache()
+            tracemalloc.start()
+            _embedding_plan((height, width, 3), message, "bench", 1.0, path_format)
+            path_peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {path_format}: pixel path alone {path_peak / image_bytes:5.2f}x image")
+
+            # tracemalloc sees NumPy buffers (not Pillow's internal images);
+            # VmHWM of a fresh process counts everything
+            peaks = {}
+            for mode, run in (('copying', copying_embed), ('in-place', embed)):
+                output_path = os.path.join(tmp, f"{mode}.png")
+                clear_permutation_cache()
+                tracemalloc.start()
+                start = time.perf_counter()
+                run(cover_path, message, "bench", 1.0, output_path, path_format=path_format)
+                elapsed = time.perf_counter() - start
+                peaks[mode] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                rss = subprocess.run(
+                    [sys.executable, '-c', _INPLACE_PROBE, cover_path, output_path, mode,
+                     path_format], cwd=here, capture_output=True, text=True, check=True,
+                ).stdout
+                print(f"    {mode:9s} traced peak {peaks[mode] / image_bytes:5.2f}x image   "
+                      f"peak RSS {int(rss) / 1024:7.1f} MiB   {elapsed:6.2f} s")
+
+            assert extract(os.path.join(tmp, "in-place.png"), 'bench', 160000,
+                           path_format=path_format) == message
+
+            # Regression guard: decode, embed and encode share one image
+            # buffer, so embed() needs the image once plus the pixel path
+            # plus the codec's fixed temporaries, which do not grow with the image
+            image_peak = peaks['in-place'] - path_peak
+            assert image_peak < 1.25 * image_bytes + codec_bound, \
+                (f"embed() ({path_format}) holds {image_peak / image_bytes:.2f}x the image size "
+                 f"+ {codec_bound / 2**20:.0f} MiB codec bound")
+    clear_permutation_cache()
+
+
+def check_png_writer(directory: str) -> None:
+    """Assert that PngBandWriter output decodes (with Pillow) to exactly the rows written."""
+    rng = np.random.default_rng(0)
+    block_bytes = png_stream.FILTER_BLOCK_BYTES
+    try:
+        # Tiny filter blocks so blocks split rows unevenly within each write
+        png_stream.FILTER_BLOCK_BYTES = 100
+        for width, height in ((1, 1), (1, 12), (2, 9), (3, 40), (17, 33), (250, 61), (1001, 7)):
+            ramp = np.add.outer(np.arange(height), np.arange(width)) % 256
+            images = (rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+                      np.repeat(ramp[:, :, None], 3, axis=2).astype(np.uint8),
+                      np.zeros((height, width, 3), dtype=np.uint8))
+            for number, image in enumerate(images):
+                path = os.path.join(directory, f"writer_{width}x{height}_{number}.png")
+                # Odd band splits: 1 row, then 6, then the rest in chunks of 5
+                cuts = sorted({0, 1, 7, *range(7, height, 5), height})
+                with png_stream.PngBandWriter(path, width, height) as writer:
+                    for top, bottom in zip(cuts, cuts[1:]):
+                        if top < bottom <= height:
+                            writer.write(image[top:bottom])
+                with Image.open(path) as decoded:
+                    assert np.array_equal(np.asarray(decoded.convert("RGB")), image), path
+    finally:
+        png_stream.FILTER_BLOCK_BYTES = block_bytes
+
+
+def bench_capacity(width: int = 8000, height: int = 6000, covers: int = 2000) -> None:
+    """Capacity from a full decode vs the image header, then a whole directory."""
+    print(f"\n[capacity] {width}x{height} JPEG ({width * height / 1e6:.0f} MP), "
+          f"directory of {covers} covers")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        large = os.path.join(tmp, "large.jpg")
+        Image.fromarray(textured_cover(width, height)).save(large, quality=90)
+
+        def decoded_size(path: str) -> tuple:
+            # Original get_image_capacity: convert() decodes every pixel
+            return Image.open(path).convert("RGB").size
+
+        decode_time, size = _timed(decoded_size, large, repeat=1)
+        header_time, capacity = _timed(get_image_capacity, large)
+        assert capacity['dimensions'] == f"{size[0]}x{size[1]}"
+        print(f"  full decode {decode_time * 1000:9.1f} ms   header {header_time * 1000:7.3f} ms   "
+              f"({decode_time / header_time:,.0f}x)")
+
+        library = os.path.join(tmp, "covers")
+        os.mkdir(library)
+        small = textured_cover(64, 48)
+        for number in range(covers):
+            extension = 'png' if number % 2 else 'jpg'
+            Image.fromarray(small).save(os.path.join(library, f"cover{number:05d}.{extension}"))
+
+        directory_time, capacities = _timed(get_directory_capacity, library)
+        assert len(capacities) == covers and not any('error' in entry for entry in capacities)
+        print(f"  directory   {directory_time * 1000:9.1f} ms   "
+              f"{covers / directory_time:,.0f} files/s")
+
+
+def bench_codec(payload_bytes: int = 1024 * 1024) -> None:
+    """List-of-ints payload codec vs packed np.unpackbits/np.packbits codec."""
+    print(f"\n[codec] {payload_bytes / 2**20:.0f} MiB ASCII payload")
+
+    message = ("payload codec benchmark " * (payload_bytes // 24 + 1))[:payload_bytes]
+    loop_encode, loop_bits = _timed(loop_string_to_bits, message, repeat=1)
+    loop_decode, _ = _timed(loop_bits_to_string, loop_bits, repeat=1)
+    packed_encode, packed_bits = _timed(payload_to_bits, message)
+    packed_decode, decoded = _timed(bits_to_text, packed_bits)
+    print(f"  encode  loop: {loop_encode * 1000:9.1f} ms   packed: {packed_encode * 1000:8.2f} ms")
+    print(f"  decode  loop: {loop_decode * 1000:9.1f} ms   packed: {packed_decode * 1000:8.2f} ms")
+    print(f"  same bits: {np.array_equal(packed_bits, loop_bits)}   "
+          f"round-trip ok: {decoded == message}")
+
+
+def bench_standard(width: int = 512, height: int = 512, message_chars: int = 30000) -> None:
+    """Sequential baseline: nested loop vs slice assignment, at several densities."""
+    print(f"\n[standard] {width}x{height} cover, {message_chars}-character message")
+
+    cover = make_cover(width, height)
+    message = ("sequential baseline " * (message_chars // 20 + 1))[:message_chars]
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        stego_path = os.path.join(tmp, "stego.png")
+        Image.fromarray(cover, 'RGB').save(cover_path, "PNG")
+
+        loop_time, loop_stego = _timed(loop_standard_lsb, cover, string_to_bits(message),
+                                       repeat=1)
+        print(f"  nested loop (k=1):          {loop_time * 1000:9.1f} ms")
+        for bits_per_channel in (1, 2, 4):
+            vec_time, stats = _timed(embed_standard_lsb, cover_path, message, stego_path,
+                                     bits_per_channel)
+            line = (f"  vectorized (k={bits_per_channel}, incl. PNG I/O): "
+                    f"{vec_time * 1000:7.1f} ms   "
+                    f"capacity used: {stats['capacity_used_percent']:5.1f}%")
+            if bits_per_channel == 1:
+                stego = np.array(Image.open(stego_path).convert("RGB"))
+                line += f"   identical to loop: {np.array_equal(stego, loop_stego)}"
+            print(line)
+
+
+def bench_histogram(width: int = 4000, height: int = 3000) -> None:
+    """Per-channel LSB scans vs one bincount histogram pass for all channels."""
+    print(f"\n[histogram] {width}x{height} image, red/green/blue/all")
+
+    image = make_cover(width, height)
+
+    def histogram_counts(img_array):
+        histograms = channel_histograms(img_array)
+        return {channel: (result['lsb_0_count'], result['lsb_1_count'])
+                for channel in ('red', 'green', 'blue', 'all')
+                for result in [chi_square_from_histograms(histograms, channel)]}
+
+    loop_time, loop_counts = _timed(loop_lsb_counts, image)
+    hist_time, hist_counts = _timed(histogram_counts, image)
+    print(f"  per-channel scans:   {loop_time * 1000:8.1f} ms")
+    print(f"  histogram kernel:    {hist_time * 1000:8.1f} ms   ({loop_time / hist_time:.1f}x)")
+    print(f"  identical counts: {loop_counts == hist_counts}")
+
+
+def smooth_cover(width: int, height: int, seed: int = 7) -> np.ndarray:
+    """Synthetic cover with natural-looking (unequal) value pairs."""
+    rng = np.random.default_rng(seed)
+    ramp = np.linspace(0, 200, width, dtype=np.float32)
+    cover = ramp[None, :, None] + rng.normal(0, 12, (height, 1, 3)).astype(np.float32)
+    return np.clip(np.broadcast_to(cover, (height, width, 3)), 0, 255).astype(np.uint8)
+
+
+def bench_pov(width: int = 8660, height: int = 5774) -> None:
+    """Pairs-of-values attack on a 50 MP image, clean vs fully LSB-embedded."""
+    print(f"\n[pov] {width}x{height} image ({width * height / 1e6:.0f} MP)")
+
+    rng = np.random.default_rng(7)
+    cover = smooth_cover(width, height)
+    stego = (cover & 0xFE) | rng.integers(0, 2, cover.shape, dtype=np.uint8)
+
+    for label, image in (("clean cover", cover), ("full LSB embed", stego)):
+        elapsed, result = _timed(pairs_of_values_attack_array, image, 'all')
+        print(f"  {label:<15} {elapsed * 1000:7.1f} ms   p = {result['p_value']:.4f}   "
+              f"{result['verdict']}")
+
+
+def bench_progressive(width: int = 4000, height: int = 3000, points: int = 100,
+                      embedded: float = 0.3) -> None:
+    """Progressive PoV curve from prefix sums vs one test per sample point."""
+    print(f"\n[progressive] {width}x{height} image, {points} points, "
+          f"{embedded * 100:.0f}% sequentially embedded")
+
+    rng = np.random.default_rng(7)
+    stego = smooth_cover(width, height).reshape(-1)
+    count = int(stego.size * embedded)
+    stego[:count] = (stego[:count] & 0xFE) | rng.integers(0, 2, count, dtype=np.uint8)
+    stego = stego.reshape(height, width, 3)
+
+    def separate_tests(image):
+        rows = image.shape[0]
+        return [pairs_of_values_attack_array(np.ascontiguousarray(image[:rows * (i + 1) // points]),
+                                             'all')['p_value']
+                for i in range(points)]
+
+    hist_time, _ = _timed(channel_histograms, stego)
+    curve_time, result = _timed(progressive_pairs_of_values_attack_array, stego, 'all', points)
+    naive_time, _ = _timed(separate_tests, stego, repeat=1)
+    print(f"  one full histogram:      {hist_time * 1000:8.1f} ms")
+    print(f"  prefix-sum curve:        {curve_time * 1000:8.1f} ms")
+    print(f"  {points} separate tests:      {naive_time * 1000:8.1f} ms")
+    print(f"  estimated embedding: {result['estimated_embedding_fraction'] * 100:.1f}%  "
+          f"({result['verdict']})")
+
+
+def bench_rs(width: int = 5500, height: int = 4000, message_chars: tuple = (5000, 50000, 200000)) -> None:
+    """RS analysis speed on a 22 MP image, and payload estimates vs embed()'s real usage."""
+    print(f"\n[rs] {width}x{height} image ({width * height / 1e6:.0f} MP)")
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    elapsed, _ = _timed(rs_analysis_array, image, repeat=1)
+    print(f"  rs_analysis:  {elapsed * 1000:8.1f} ms")
+
+    _payload_estimates(rs_analysis_array, "RS", message_chars)
+
+
+def bench_spa(width: int = 5500, height: int = 4000, message_chars: tuple = (5000, 50000, 200000)) -> None:
+    """SPA speed on a 22 MP image, and payload estimates vs embed()'s real usage."""
+    print(f"\n[spa] {width}x{height} image ({width * height / 1e6:.0f} MP)")
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    elapsed, _ = _timed(sample_pairs_analysis_array, image)
+    print(f"  sample_pairs_analysis:  {elapsed * 1000:8.1f} ms")
+
+    _payload_estimates(sample_pairs_analysis_array, "SPA", message_chars)
+
+
+def textured_cover(width: int = 1600, height: int = 1200, seed: int = 0) -> np.ndarray:
+    """Synthetic cover with natural-looking neighbour correlations (for RS/SPA)."""
+    rng = np.random.default_rng(seed)
+    rows, cols = np.mgrid[0:height, 0:width]
+    cover = np.stack([128 + 60 * np.sin(cols / 50 + c) + 40 * np.cos(rows / 70)
+                      + rng.normal(0, 3, rows.shape) for c in range(3)], axis=-1)
+    return np.clip(cover, 0, 255).astype(np.uint8)
+
+
+def _payload_estimates(estimator, label: str, message_chars: tuple) -> None:
+    """Print an estimator's payload figure for a clean cover and for embed() outputs."""
+    rng = np.random.default_rng(1)
+    cover = textured_cover()
+    print(f"  clean cover: estimated payload {estimator(cover)['estimated_payload_percent']:5.2f}%")
+    for chars in message_chars:
+        message = ''.join(chr(code) for code in rng.integers(32, 127, chars))
+        stego, stats = embed_array(cover, message, "benchmark", 1.0)
+        used = stats['total_pixels_modified'] / stats['total_capacity'] * 100
+        estimate = estimator(stego)['estimated_payload_percent']
+        print(f"  embed {chars:>6} chars: touched {used:5.2f}% of capacity, "
+              f"{label} estimate {estimate:5.2f}%")
+
+
+def bench_heatmap(width: int = 10000, height: int = 10000,
+                  grids: tuple = ((4, 4), (16, 16), (128, 128), (1024, 1024))) -> None:
+    """Tiled LSB heatmap: cost stays flat as the tile count grows."""
+    print(f"\n[heatmap] {width}x{height} image ({width * height / 1e6:.0f} MP)")
+
+    image = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    for grid in grids:
+        elapsed, result = _timed(lsb_heatmap_array, image, grid, repeat=1)
+        print(f"  grid {grid[0]:>4} x {grid[1]:<4}  {elapsed * 1000:8.1f} ms")
+    elapsed, overlay = _timed(render_heatmap_overlay, image, result['heatmap'], repeat=1)
+    print(f"  overlay render    {elapsed * 1000:8.1f} ms   ({overlay.size[0]}x{overlay.size[1]})")
+
+
+def bench_sampled(width: int = 10000, height: int = 8000) -> None:
+    """Exact vs sampled chi-square / comparison on an 80 MP image."""
+    print(f"\n[sampled] {width}x{height} image ({width * height / 1e6:.0f} MP)")
+
+    rng = np.random.default_rng(0)
+    # Natural-style LSB bias: 51% ones
+    cover = rng.integers(0, 128, (height, width, 3), dtype=np.uint8) * 2
+    cover |= (rng.random(cover.shape) < 0.51).astype(np.uint8)
+    stego = cover.copy().reshape(-1)
+    stego[:stego.size // 10] &= 0xFE
+    stego = stego.reshape(cover.shape)
+
+    for label, func, args in (("chi_square_attack", chi_square_attack_array, (cover, 'all')),
+                              ("compare_images", compare_images_array, (cover, stego))):
+        exact_time, exact = _timed(func, *args, repeat=1)
+        sampled_time, sampled = _timed(func, *args, sampled=True, repeat=1)
+        if 'sampling' in sampled:
+            summary = (f"{exact['effectiveness']['rating']} vs {sampled['effectiveness']['rating']}, "
+                       f"{sampled['sampling']['samples_used']:,} samples")
+        else:
+            summary = (f"{exact['verdict']} vs {sampled['verdict']}, "
+                       f"{sampled['samples_used']:,} samples")
+        print(f"  {label:<18} exact {exact_time * 1000:8.1f} ms   sampled "
+              f"{sampled_time * 1000:7.1f} ms   ({summary})")
+
+    # From PNG files, with the decoded-image cache off: both modes decode in full
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        stego_path = os.path.join(tmp, "stego.png")
+        Image.fromarray(cover).save(cover_path, compress_level=1)
+        Image.fromarray(stego).save(stego_path, compress_level=1)
+        configure_image_cache(0)
+        try:
+            for label, func, args in (("chi_square (path)", chi_square_attack, (cover_path, 'all')),
+                                      ("compare (paths)", compare_images, (cover_path, stego_path))):
+                exact_time, _ = _timed(func, *args, repeat=1)
+                sampled_time, _ = _timed(func, *args, sampled=True, repeat=1)
+                print(f"  {label:<18} exact {exact_time * 1000:8.1f} ms   sampled "
+                      f"{sampled_time * 1000:7.1f} ms   (decode-bound)")
+        finally:
+            configure_image_cache(DEFAULT_IMAGE_CACHE_BYTES)
+
+
+_IMPORT_PROBE = """
+import resource, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def _import_cost(module: str) -> tuple:
+    """Return (seconds, peak RSS in KiB) of importing a module in a fresh interpreter."""
+    output = subprocess.run([sys.executable, "-c", _IMPORT_PROBE.format(module=module)],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+    return float(output[0]), int(output[1])
+
+
+def bench_chi2(samples: int = 200) -> None:
+    """Import cost of steganalysis vs scipy.stats, and p-value agreement with SciPy."""
+    print("\n[chi2] built-in chi-square p-values")
+
+    for module in ("steganalysis", "scipy.stats"):
+        try:
+            seconds, rss_kib = _import_cost(module)
+        except subprocess.CalledProcessError:
+            print(f"  import {module:<13} not available")
+            continue
+        print(f"  import {module:<13} {seconds * 1000:7.1f} ms   peak RSS {rss_kib / 1024:6.1f} MiB")
+
+    try:
+        from scipy.stats import chi2
+    except ImportError:
+        print("  SciPy not installed; skipping cross-check")
+        return
+
+    rng = np.random.default_rng(0)
+    worst = 0.0
+    for dof in (1, 2, 3, 127, 255):
+        for statistic in rng.uniform(0, 3 * dof + 20, samples):
+            worst = max(worst, abs(chi2_sf(statistic, dof) - chi2.sf(statistic, dof)))
+    print(f"  max |p - scipy.stats.chi2.sf| (dof 1..255): {worst:.2e}")
+
+
+def bench_results(count: int = 100000) -> None:
+    """Dict vs lean Chi-Square results: build time, retained memory, columnar storage."""
+    print(f"\n[results] {count:,} chi-square results from histograms")
+
+    rng = np.random.default_rng(0)
+    histograms = rng.integers(0, 5000, (count, 3, 256))
+
+    def build(lean: bool) -> list:
+        return [chi_square_from_histograms(h, 'all', lean=lean) for h in histograms]
+
+    for label, lean in (("dict", False), ("lean", True)):
+        start = time.perf_counter()
+        build(lean)
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        results = build(lean)
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del results
+        print(f"  {label:<5} {elapsed:7.3f} s   retained {retained / count:7.0f} B/result")
+
+    results = build(True)
+    start = time.perf_counter()
+    table = ResultArray(CHI_SQUARE_DTYPE)
+    table.extend(results)
+    elapsed = time.perf_counter() - start
+    print(f"  ResultArray append {elapsed:6.3f} s   {table.array.nbytes / count:5.0f} B/row   "
+          f"non-random {int(table.array['non_random'].sum()):,}")
+
+    # Text only on demand: one explanation and one interpretation
+    assert results[0].to_dict() == chi_square_from_histograms(histograms[0], 'all')
+    comparison = ComparisonResult(results[0], results[1], None)
+    print(f"  explanation {len(results[0].explanation)} chars, "
+          f"interpretation {len(comparison.interpretation)} chars, built on access")
+
+
+def bench_cover_index(width: int = 4000, height: int = 3000) -> None:
+    """compare_images with the cover decoded vs its statistics read from a CoverIndex."""
+    print(f"\n[coverindex] {width}x{height} PNG cover")
+
+    cover = textured_cover(width, height)
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, "cover.png")
+        Image.fromarray(cover).save(cover_path)
+        index = CoverIndex(os.path.join(tmp, "covers.sqlite"))
+
+        start = time.perf_counter()
+        stats = embed(cover_path, "x" * 20000, "bench", 1.0, os.path.join(tmp, "stego.png"),
+                      cover_index=index)
+        print(f"  embed + index      {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+        # Without the decoded-image cache every compare decodes from disk
+        configure_image_cache(0)
+        try:
+            plain_time, plain = _timed(compare_images, cover_path, stats['save_path'])
+            indexed_time, indexed = _timed(compare_images, cover_path, stats['save_path'],
+                                           cover_index=index)
+        finally:
+            configure_image_cache(DEFAULT_IMAGE_CACHE_BYTES)
+        index.close()
+
+    assert plain == indexed
+    print(f"  compare (decode)   {plain_time * 1000:8.1f} ms")
+    print(f"  compare (indexed)  {indexed_time * 1000:8.1f} ms   ({plain_time / indexed_time:.1f}x, "
+          f"{plain['effectiveness']['rating']})")
+
+
+def bench_cover_match(library: int = 50000, queries: int = 200, covers: int = 500) -> None:
+    """Multi-index hash vs linear scan for perceptual-hash lookups, then an end-to-end match."""
+    print(f"\n[covermatch] {library:,} cover hashes, {queries} stego queries")
+
+    rng = np.random.default_rng(0)
+    hashes = [int(value) for value in rng.integers(0, 2 ** 63, library, dtype=np.int64) * 2 + 1]
+    table = MultiIndexHash()
+    for number, value in enumerate(hashes):
+        table.add(value, number)
+
+    # Queries are library hashes with up to 3 bits flipped (resized / recompressed covers)
+    targets = []
+    for number in rng.integers(0, library, queries):
+        flips = rng.choice(64, rng.integers(0, 4), replace=False)
+        targets.append((int(number), hashes[number] ^ sum(1 << int(bit) for bit in flips)))
+
+    linear_time, linear = _timed(lambda: [min(range(library), key=lambda i: hamming_distance(hashes[i], t))
+                                          for _, t in targets], repeat=1)
+    table_time, found = _timed(lambda: [table.search(t, 10)[0][1] for _, t in targets], repeat=1)
+    assert found == linear == [number for number, _ in targets]
+    print(f"  linear scan  {linear_time / queries * 1000:8.3f} ms/query")
+    print(f"  multi-index  {table_time / queries * 1000:8.3f} ms/query   ({linear_time / table_time:.0f}x)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = CoverIndex(os.path.join(tmp, "covers.sqlite"))
+        library_covers = [textured_cover(160, 120, seed=seed) for seed in range(covers)]
+        for cover in library_covers:
+            index.add(None, cover)
+        stego, _ = embed_array(library_covers[covers // 2], "x" * 500, "bench", 1.0)
+        match_time, (comparison, match) = _timed(index.compare, stego)
+        index.close()
+    print(f"  {covers} indexed covers: best match at distance {match['distance']}, "
+          f"compare in {match_time * 1000:.1f} ms ({comparison['effectiveness']['rating']})")
+
+
+BENCHMARKS = {
+    'embed': bench_embed,
+    'paths': bench_paths,
+    'cache': bench_cache,
+    'store': bench_store,
+    'memory': bench_memory,
+    'streamextract': bench_stream_extract,
+    'streamembed': bench_stream_embed,
+    'inplace': bench_inplace,
+    'capacity': bench_capacity,
+    'codec': bench_codec,
+    'standard': bench_standard,
+    'histogram': bench_histogram,
+    'chi2': bench_chi2,
+    'pov': bench_pov,
+    'progressive': bench_progressive,
+    'rs': bench_rs,
+    'spa': bench_spa,
+    'heatmap': bench_heatmap,
+    'sampled': bench_sampled,
+    'results': bench_results,
+    'coverindex': bench_cover_index,
+    'covermatch': bench_cover_match,
+}
+
+
+def main(argv: list) -> None:
+    names = argv or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise SystemExit(f"Unknown benchmark '{name}'. Choose from: {', '.join(BENCHMARKS)}")
+        BENCHMARKS[name]()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -3,32 +3,74 @@ Core Steganography Engine with Differential Privacy
 Implements LSB embedding and extraction with noisy pixel selection
 """
 
+import os
+import tempfile
+
 import numpy as np
 from PIL import Image
-from utils import password_to_seed, string_to_bits, bits_to_string, get_pixel_indices
+from utils import (password_to_seed, payload_to_bits, bits_to_payload, bits_to_text,
+                   get_pixel_indices, load_rgb_array, find_images, PATH_FORMAT_SHUFFLE)
+from png_stream import PngBandReader, PngBandWriter
+
+
+def embed_bits(flat_array: np.ndarray, indices: np.ndarray, bits) -> None:
+    """
+    Write bits into the LSBs of a flat image view, in place.
+    
+    Vectorized form of the per-pixel loop: gathers every target value with one
+    fancy index, clears the LSBs, ORs in the bits and scatters the result back.
+    Indices must be unique (a permutation prefix always is).
+    
+    Example: value = 156 (10011100), bit = 1
+             156 & 0xFE = 156 (10011100) -> | 1 = 157 (10011101)
+    
+    Args:
+        flat_array (np.ndarray): 1-D uint8 view of the image (e.g. arr.reshape(-1))
+        indices (np.ndarray): Flat channel indices to modify
+        bits (array-like): One bit (0 or 1) per index
+    """
+    bits = np.asarray(bits, dtype=np.uint8)
+    flat_array[indices] = (flat_array[indices] & 0xFE) | bits
+
+
+def extract_bits(flat_array: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """
+    Read the LSBs at the given flat channel indices.
+    
+    Args:
+        flat_array (np.ndarray): 1-D uint8 view of the image
+        indices (np.ndarray): Flat channel indices to read, in message order
+        
+    Returns:
+        np.ndarray: uint8 array of bits (0 or 1), one per index
+    """
+    return flat_array[indices] & 1
 
 
-def embed(cover_image_path: str, message: str, password: str, epsilon: float, 
-          save_path: str) -> dict:
+def embed(cover_image_path: str, message, password: str, epsilon: float, 
+          save_path: str, path_format: str = PATH_FORMAT_SHUFFLE,
+          cover_index=None, streaming: bool = False) -> dict:
     """
     Embed a secret message into an image using DP-enhanced LSB steganography.
     
-    Algorithm:
-    1. Convert message to bits (true_count bits)
-    2. Add Laplace noise to get noisy_count (DP mechanism)
-    3. Generate shuffled pixel list using password-derived seed
-    4. Embed message bits in first true_count pixels
-    5. Embed random decoy bits in remaining (noisy_count - true_count) pixels
-    6. Save as PNG to preserve LSB data
+    File-path wrapper around embed_array: decodes the cover, embeds, and
+    saves the stego image as PNG to preserve LSB data.
     
     Args:
         cover_image_path (str): Path to the cover image
-        message (str): Secret message to hide
+        message (str or bytes): Secret message to hide (text is UTF-8 encoded)
         password (str): Password for generating pixel shuffle
         epsilon (float): Privacy parameter (0.1-5.0)
                         Low epsilon = high privacy = more noise
                         High epsilon = low privacy = less noise
         save_path (str): Path to save stego image (must be .png)
+        path_format (str): Pixel path format, 'shuffle' (legacy) or 'feistel'
+                           (prefix-only, much faster on large images).
+                           The receiver must extract with the same format.
+        cover_index (CoverIndex): Optional cover_index.CoverIndex; the cover's
+                                  histograms are stored there so later
+                                  comparisons need not decode it
+        streaming (bool): Read and write the image in row bands (see embed_streaming)
         
     Returns:
         dict: Statistics about the embedding process including:
@@ -38,13 +80,176 @@ def embed(cover_image_path: str, message: str, password: str, epsilon: float,
               - epsilon: Privacy parameter used
               - capacity_used_percent: Percentage of image capacity used
     """
-    # Load and standardize image to RGB (removes alpha channel)
-    img = Image.open(cover_image_path).convert("RGB")
-    img_array = np.array(img)
-    height, width, channels = img_array.shape
+    if streaming:
+        if cover_index is not None:
+            raise ValueError("Streaming embed does not decode the whole cover; "
+                             "index it with CoverIndex.add instead")
+        return embed_streaming(cover_image_path, message, password, epsilon, save_path,
+                               path_format=path_format)
+    
+    stego_array, stats = embed_array(cover_image_path, message, password, epsilon,
+                                     path_format=path_format, cover_index=cover_index)
+    
+    stats['save_path'] = save_png(stego_array, save_path)
+    return stats
+
+
+def embed_array(cover, message, password: str, epsilon: float,
+                path_format: str = PATH_FORMAT_SHUFFLE, cover_index=None,
+                in_place: bool = False) -> tuple:
+    """
+    Embed a secret message into an in-memory image (no disk round-trip).
     
-    # Convert message to binary
-    message_bits = string_to_bits(message)
+    Algorithm:
+    1. Convert message to bits (true_count bits)
+    2. Add Laplace noise to get noisy_count (DP mechanism)
+    3. Generate shuffled pixel list using password-derived seed
+    4. Embed message bits in first true_count pixels
+    5. Embed random decoy bits in remaining (noisy_count - true_count) pixels
+    
+    Decoded covers (paths, bytes, PIL images) are decoded straight into the
+    buffer that becomes the stego array, so the image is held once. A
+    caller's array is copied first unless in_place is set. The pixel path
+    comes on top of that: 'feistel' needs memory proportional to the
+    message, while 'shuffle' holds a 4-byte index for every channel (4x the
+    image, kept in the permutation cache).
+    
+    Args:
+        cover: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path (anything utils.load_rgb_array accepts).
+               A caller's array is not modified unless in_place is set.
+        message (str or bytes): Secret message to hide (text is UTF-8 encoded)
+        password (str): Password for generating pixel shuffle
+        epsilon (float): Privacy parameter (0.1-5.0)
+        path_format (str): Pixel path format, 'shuffle' (legacy) or 'feistel'
+        cover_index (CoverIndex): Optional index the cover's statistics are added to
+        in_place (bool): Embed into the caller's array itself (it must be a
+                         writable, C-contiguous (H, W, 3) uint8 array) and
+                         return it as the stego array
+        
+    Returns:
+        tuple: (stego_array, stats) - the stego image as an RGB uint8 array
+               and the same statistics as embed() (without 'save_path');
+               'cover_hash' is added when a cover_index is given.
+               Encode the array losslessly (PNG), never as JPEG.
+    """
+    if in_place and isinstance(cover, np.ndarray):
+        if (cover.dtype != np.uint8 or cover.ndim != 3 or cover.shape[2] != 3
+                or not cover.flags.writeable or not cover.flags.c_contiguous):
+            raise ValueError("In-place embedding needs a writable, C-contiguous "
+                             "(height, width, 3) uint8 array")
+        stego_array = cover
+    else:
+        # Load and standardize image to RGB (removes alpha channel) into a
+        # buffer of our own, which is modified directly
+        stego_array = load_rgb_array(cover, writable=True)
+    
+    pixel_indices, bits_to_embed, stats = _embedding_plan(stego_array.shape, message, password,
+                                                          epsilon, path_format)
+    
+    if cover_index is not None:
+        # Record the cover's statistics for later comparisons before its
+        # pixels are overwritten (a file-like cover has been read already,
+        # so it is indexed by its pixels only)
+        source = None if hasattr(cover, 'read') else cover
+        stats['cover_hash'] = cover_index.add(source, stego_array)
+    
+    # LSB substitution on a flat view: one gather, one scatter
+    embed_bits(stego_array.reshape(-1), pixel_indices, bits_to_embed)
+    return stego_array, stats
+
+
+def embed_streaming(cover_image_path: str, message, password: str, epsilon: float,
+                    save_path: str, path_format: str = PATH_FORMAT_SHUFFLE,
+                    band_rows: int = None) -> dict:
+    """
+    Embed a message while reading the cover and writing the stego PNG in row bands.
+    
+    Same message bits, noise, decoys and pixel path as embed(); the result
+    decodes to exactly the pixels embed() would produce. The path is sorted
+    once together with its bits, so each band receives one contiguous run of
+    (index, bit) pairs, is modified in place and is compressed straight to
+    disk (png_stream.PngBandWriter). Image memory stays a small multiple of
+    one band (png_stream.DEFAULT_BAND_BYTES) whatever the image size. The
+    PNG is written to a temporary file beside save_path and renamed onto it
+    once complete, so save_path may be the cover itself. Use
+    path_format='feistel' to keep the pixel path O(message) as well; a
+    'shuffle' path holds an index for every channel.
+    
+    Covers that cannot be streamed (not PNG, 16-bit or interlaced) are
+    embedded with a full decode, exactly as embed() does.
+    
+    Args:
+        cover_image_path (str): Path to the cover image
+        message (str or bytes): Secret message to hide (text is UTF-8 encoded)
+        password (str): Password for generating pixel shuffle
+        epsilon (float): Privacy parameter (0.1-5.0)
+        save_path (str): Path to save stego image (must be .png)
+        path_format (str): Pixel path format, 'shuffle' (legacy) or 'feistel'
+        band_rows (int): Rows per band (default: png_stream.DEFAULT_BAND_BYTES)
+        
+    Returns:
+        dict: The same statistics as embed()
+    """
+    try:
+        reader = PngBandReader(cover_image_path)
+    except ValueError:
+        return embed(cover_image_path, message, password, epsilon, save_path,
+                     path_format=path_format)
+    
+    save_path = _png_path(save_path)
+    with reader:
+        pixel_indices, bits_to_embed, stats = _embedding_plan(
+            (reader.height, reader.width, 3), message, password, epsilon, path_format)
+        
+        # Locality sort: band order instead of path order
+        order = np.argsort(pixel_indices, kind='stable')
+        sorted_indices = pixel_indices[order]
+        sorted_bits = bits_to_embed[order]
+        del order, pixel_indices, bits_to_embed
+        
+        row_values = reader.width * 3
+        start = 0
+        # Write next to the target and rename at the end: the write is atomic,
+        # and saving over the cover never truncates the file being read
+        descriptor, partial_path = tempfile.mkstemp(
+            suffix='.png', dir=os.path.dirname(os.path.abspath(save_path)))
+        os.close(descriptor)
+        try:
+            with PngBandWriter(partial_path, reader.width, reader.height) as writer:
+                for first_row, band in reader.bands(band_rows):
+                    band_offset = first_row * row_values
+                    stop = int(np.searchsorted(sorted_indices, band_offset + band.size))
+                    if stop > start:
+                        band = band.copy()
+                        embed_bits(band.reshape(-1), sorted_indices[start:stop] - band_offset,
+                                   sorted_bits[start:stop])
+                        start = stop
+                    writer.write(band)
+        except BaseException:
+            # Never leave a truncated stego image behind
+            os.remove(partial_path)
+            raise
+    
+    os.replace(partial_path, save_path)
+    stats['save_path'] = save_path
+    return stats
+
+
+def _embedding_plan(image_shape: tuple, message, password: str, epsilon: float,
+                    path_format: str) -> tuple:
+    """
+    Message bits, DP noise and pixel path for an image of the given shape.
+    
+    Returns:
+        tuple: (pixel_indices, bits_to_embed, stats) - the flat channel
+               indices to write in path order, one bit per index, and the
+               statistics returned by embed()
+    """
+    height, width, channels = image_shape
+    
+    # Convert message to a packed bit array (8 bits per UTF-8 byte)
+    message_bits = payload_to_bits(message)
     true_count = len(message_bits)
     
     # Check if message fits in image
@@ -53,7 +258,7 @@ def embed(cover_image_path: str, message: str, password: str, epsilon: float,
         raise ValueError(
             f"Message too large! Need {true_count} bits but image only has "
             f"{total_capacity} pixels. Maximum message length: "
-            f"{total_capacity // 8} characters."
+            f"{total_capacity // 8} bytes."
         )
     
     # Ensure epsilon is not zero (prevents division by zero)
@@ -85,53 +290,28 @@ def embed(cover_image_path: str, message: str, password: str, epsilon: float,
     
     # Get shuffled list of pixel channel indices
     pixel_indices = get_pixel_indices(
-        image_shape=img_array.shape,
+        image_shape=image_shape,
         num_channels=total_channels_to_modify,
-        seed=seed
+        seed=seed,
+        path_format=path_format
     )
     
-    # Create a copy of the image array for modification
-    stego_array = img_array.copy()
-    
     # === EMBEDDING: Message + Decoys ===
-    for bit_index, channel_index in enumerate(pixel_indices):
-        # Convert flat index to (row, col, channel)
-        row = channel_index // (width * channels)
-        col = (channel_index % (width * channels)) // channels
-        channel = channel_index % channels
-        
-        # Get current pixel value
-        pixel_value = stego_array[row, col, channel]
-        
-        if bit_index < true_count:
-            # Embed actual message bit
-            bit_to_embed = message_bits[bit_index]
-        else:
-            # Embed random decoy bit (noise to mask statistical signature)
-            bit_to_embed = np.random.randint(0, 2)
-        
-        # LSB substitution: Clear LSB and set to our bit
-        # Example: pixel_value = 156 (10011100)
-        #          & 0xFE = 254 (11111110) -> 10011100 & 11111110 = 10011100
-        #          | bit (0 or 1) -> sets the LSB
-        new_pixel_value = (pixel_value & 0xFE) | bit_to_embed
-        
-        # Update the pixel
-        stego_array[row, col, channel] = new_pixel_value
-    
-    # Convert back to image and save
-    stego_image = Image.fromarray(stego_array.astype('uint8'), 'RGB')
-    
-    # CRITICAL: Must save as PNG! JPEG will destroy LSB data
-    if not save_path.lower().endswith('.png'):
-        save_path = save_path.rsplit('.', 1)[0] + '.png'
-    
-    stego_image.save(save_path, "PNG")
+    # Message bits go into the first true_count indices; the rest get random
+    # decoy bits (noise to mask the statistical signature). The decoys are
+    # drawn in one batch, which yields the same stream as one
+    # np.random.randint(0, 2) call per decoy pixel.
+    bits_to_embed = np.empty(total_channels_to_modify, dtype=np.uint8)
+    bits_to_embed[:true_count] = message_bits
+    if total_channels_to_modify > true_count:
+        bits_to_embed[true_count:] = np.random.randint(
+            0, 2, size=total_channels_to_modify - true_count
+        )
     
-    # Return statistics
-    return {
+    stats = {
         'message_length_bits': true_count,
         'message_length_chars': len(message),
+        'message_length_bytes': true_count // 8,
         'noisy_count': noisy_count,
         'noise_added': noisy_count - true_count,
         'total_pixels_modified': total_channels_to_modify,
@@ -141,11 +321,14 @@ def embed(cover_image_path: str, message: str, password: str, epsilon: float,
         'total_capacity': total_capacity,
         'capacity_used_percent': (total_channels_to_modify / total_capacity) * 100,
         'image_dimensions': f"{width}x{height}",
-        'save_path': save_path
+        'path_format': path_format
     }
+    return pixel_indices, bits_to_embed, stats
 
 
-def extract(stego_image_path: str, password: str, message_length_bits: int) -> str:
+def extract(stego_image_path: str, password: str, message_length_bits: int,
+            path_format: str = PATH_FORMAT_SHUFFLE, raw: bool = False,
+            streaming: bool = False):
     """
     Extract a hidden message from a stego image.
     
@@ -165,13 +348,39 @@ def extract(stego_image_path: str, password: str, message_length_bits: int) -> s
         password (str): Password used during embedding
         message_length_bits (int): Number of message bits to extract
                                    (provided by sender, e.g., 800 for 100 chars)
+        path_format (str): Pixel path format used by the sender
+                           ('shuffle' for images embedded before path formats)
+        raw (bool): Return the payload as bytes instead of decoding it as text
+        streaming (bool): Decode the image in row bands (see extract_streaming)
         
     Returns:
-        str: The extracted secret message
+        str: The extracted secret message (bytes if raw=True)
+    """
+    if streaming:
+        return extract_streaming(stego_image_path, password, message_length_bits,
+                                 path_format=path_format, raw=raw)
+    return extract_array(stego_image_path, password, message_length_bits,
+                         path_format=path_format, raw=raw)
+
+
+def extract_array(stego, password: str, message_length_bits: int,
+                  path_format: str = PATH_FORMAT_SHUFFLE, raw: bool = False):
+    """
+    Extract a hidden message from an in-memory stego image.
+    
+    Args:
+        stego: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path (anything utils.load_rgb_array accepts)
+        password (str): Password used during embedding
+        message_length_bits (int): Number of message bits to extract
+        path_format (str): Pixel path format used by the sender
+        raw (bool): Return the payload as bytes instead of decoding it as text
+        
+    Returns:
+        str: The extracted secret message (bytes if raw=True)
     """
     # Load image and standardize to RGB
-    img = Image.open(stego_image_path).convert("RGB")
-    img_array = np.array(img)
+    img_array = load_rgb_array(stego)
     height, width, channels = img_array.shape
     
     # Validate message length
@@ -190,45 +399,172 @@ def extract(stego_image_path: str, password: str, message_length_bits: int) -> s
     pixel_indices = get_pixel_indices(
         image_shape=img_array.shape,
         num_channels=message_length_bits,
-        seed=seed
+        seed=seed,
+        path_format=path_format
     )
     
-    # Extract bits
-    extracted_bits = []
+    # Extract bits with a single gather on the flat view
+    extracted_bits = extract_bits(img_array.reshape(-1), pixel_indices)
     
-    for channel_index in pixel_indices:
-        # Convert flat index to (row, col, channel)
-        row = channel_index // (width * channels)
-        col = (channel_index % (width * channels)) // channels
-        channel = channel_index % channels
+    # Pack bits back into bytes (UTF-8 text unless raw bytes were requested)
+    if raw:
+        return bits_to_payload(extracted_bits)
+    return bits_to_text(extracted_bits)
+
+
+def extract_streaming(stego_image_path: str, password: str, message_length_bits: int,
+                      path_format: str = PATH_FORMAT_SHUFFLE, raw: bool = False,
+                      band_rows: int = None):
+    """
+    Extract a hidden message while decoding the stego PNG one row band at a time.
+    
+    The pixel path is sorted once (remembering each index's message
+    position), so every band serves one contiguous run of the sorted
+    indices; bits are gathered band by band and scattered back into message
+    order at the end. Decoding stops after the last band holding a message
+    bit. Image memory is bounded by one band (png_stream.DEFAULT_BAND_BYTES)
+    instead of the whole image - use path_format='feistel' to also keep the
+    pixel path O(message), since a 'shuffle' path is built for every channel.
+    
+    Images that cannot be streamed (not PNG, 16-bit or interlaced) are
+    decoded whole, exactly as extract() does.
+    
+    Args:
+        stego_image_path (str): Path to the stego PNG
+        password (str): Password used during embedding
+        message_length_bits (int): Number of message bits to extract
+        path_format (str): Pixel path format used by the sender
+        raw (bool): Return the payload as bytes instead of decoding it as text
+        band_rows (int): Rows decoded per band (default: png_stream.DEFAULT_BAND_BYTES)
         
-        # Get pixel value
-        pixel_value = img_array[row, col, channel]
+    Returns:
+        str: The extracted secret message (bytes if raw=True)
+    """
+    try:
+        reader = PngBandReader(stego_image_path)
+    except ValueError:
+        return extract_array(stego_image_path, password, message_length_bits,
+                             path_format=path_format, raw=raw)
+    
+    with reader:
+        image_shape = (reader.height, reader.width, 3)
+        total_capacity = reader.height * reader.width * 3
+        if message_length_bits > total_capacity:
+            raise ValueError(
+                f"Invalid message length! Requested {message_length_bits} bits "
+                f"but image only has {total_capacity} pixels."
+            )
         
-        # Extract LSB (bit 0)
-        lsb = pixel_value & 1
+        pixel_indices = get_pixel_indices(
+            image_shape=image_shape,
+            num_channels=message_length_bits,
+            seed=password_to_seed(password),
+            path_format=path_format
+        )
         
-        extracted_bits.append(lsb)
+        # Locality sort: band order instead of path order
+        order = np.argsort(pixel_indices, kind='stable')
+        sorted_indices = pixel_indices[order]
+        sorted_bits = np.empty(len(sorted_indices), dtype=np.uint8)
+        
+        row_values = reader.width * 3
+        start = 0
+        for first_row, band in reader.bands(band_rows):
+            if start == len(sorted_indices):
+                break
+            band_offset = first_row * row_values
+            stop = int(np.searchsorted(sorted_indices, band_offset + band.size))
+            sorted_bits[start:stop] = extract_bits(band.reshape(-1),
+                                                   sorted_indices[start:stop] - band_offset)
+            start = stop
+    
+    # Scatter back into message order
+    extracted_bits = np.empty_like(sorted_bits)
+    extracted_bits[order] = sorted_bits
+    
+    if raw:
+        return bits_to_payload(extracted_bits)
+    return bits_to_text(extracted_bits)
+
+
+def save_png(image_array: np.ndarray, save_path: str) -> str:
+    """
+    Save an RGB array as PNG and return the path actually written.
     
-    # Convert bits back to string
-    message = bits_to_string(extracted_bits)
+    CRITICAL: Must save as PNG! JPEG will destroy LSB data, so any other
+    extension is replaced with .png.
     
-    return message
+    The rows are compressed straight from the array (png_stream.PngBandWriter),
+    so no second copy of the image is made for the encoder.
+    
+    Args:
+        image_array (np.ndarray): RGB uint8 image
+        save_path (str): Requested output path
+        
+    Returns:
+        str: The path the PNG was written to
+    """
+    save_path = _png_path(save_path)
+    image_array = image_array.astype(np.uint8, copy=False)
+    height, width = image_array.shape[:2]
+    with PngBandWriter(save_path, width, height) as writer:
+        writer.write(image_array)
+    return save_path
+
+
+def _png_path(save_path: str) -> str:
+    """The requested output path with any non-PNG extension replaced by .png."""
+    if not save_path.lower().endswith('.png'):
+        save_path = save_path.rsplit('.', 1)[0] + '.png'
+    return save_path
 
 
 def get_image_capacity(image_path: str) -> dict:
     """
     Calculate the maximum message capacity of an image.
     
+    Only the header is parsed (PIL opens images lazily), so this is instant
+    even for very large covers; the capacity depends on the dimensions alone.
+    
     Args:
-        image_path (str): Path to the image
+        image_path (str): Path to the image (or a file-like object)
         
     Returns:
         dict: Capacity information including max characters and bits
     """
-    img = Image.open(image_path).convert("RGB")
-    width, height = img.size
+    with Image.open(image_path) as img:
+        width, height = img.size
+    return _capacity(width, height)
+
+
+def get_directory_capacity(root: str) -> list:
+    """
+    Capacity of every image under a directory, from the image headers only.
+    
+    Uses the same directory walk as batch_analysis (utils.find_images).
+    Files that cannot be opened get an 'error' entry instead of the
+    capacity fields.
     
+    Args:
+        root (str): Directory of cover images (or a single image file)
+        
+    Returns:
+        list: One dict per image, sorted by path: 'path' plus the fields of
+              get_image_capacity, or 'path' and 'error'
+    """
+    capacities = []
+    for path in find_images(root):
+        try:
+            capacity = get_image_capacity(path)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            capacities.append({'path': path, 'error': f"{type(e).__name__}: {e}"})
+        else:
+            capacities.append({'path': path, **capacity})
+    return capacities
+
+
+def _capacity(width: int, height: int) -> dict:
+    """Capacity fields of get_image_capacity for an image of the given size."""
     total_pixels = width * height * 3  # RGB channels
     max_chars = total_pixels // 8  # 8 bits per character
     
@@ -241,7 +577,30 @@ def get_image_capacity(image_path: str) -> dict:
     }
 
 
-def embed_standard_lsb(cover_image_path: str, message: str, save_path: str) -> dict:
+def embed_standard_lsb(cover_image_path: str, message, save_path: str,
+                       bits_per_channel: int = 1) -> dict:
+    """
+    Embed a message using STANDARD sequential LSB steganography and save it as PNG.
+    
+    File-path wrapper around embed_standard_lsb_array.
+    
+    Args:
+        cover_image_path (str): Path to the cover image
+        message (str or bytes): Secret message to hide (text is UTF-8 encoded)
+        save_path (str): Path to save stego image (must be .png)
+        bits_per_channel (int): Low bits replaced per channel (1-8, default 1)
+        
+    Returns:
+        dict: Statistics about the embedding process
+    """
+    stego_array, stats = embed_standard_lsb_array(cover_image_path, message,
+                                                  bits_per_channel=bits_per_channel)
+    
+    stats['save_path'] = save_png(stego_array, save_path)
+    return stats
+
+
+def embed_standard_lsb_array(cover, message, bits_per_channel: int = 1) -> tuple:
     """
     Embed a message using STANDARD sequential LSB steganography (NO DP, NO shuffling).
     This serves as the baseline for comparison with DP-enhanced steganography.
@@ -252,74 +611,66 @@ def embed_standard_lsb(cover_image_path: str, message: str, save_path: str) -> d
     - NO decoy bits (only embeds actual message)
     - Easily detectable by statistical analysis
     
+    With bits_per_channel = k > 1, the k lowest bits of each channel carry
+    message bits (MSB of each k-bit group first), so the same message uses
+    1/k as many channels - useful for benchmarking several payload densities.
+    
     Args:
-        cover_image_path (str): Path to the cover image
-        message (str): Secret message to hide
-        save_path (str): Path to save stego image (must be .png)
+        cover: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path (anything utils.load_rgb_array accepts)
+        message (str or bytes): Secret message to hide (text is UTF-8 encoded)
+        bits_per_channel (int): Low bits replaced per channel (1-8, default 1)
         
     Returns:
-        dict: Statistics about the embedding process
+        tuple: (stego_array, stats) - RGB uint8 array and embedding statistics
     """
-    # Load and standardize image to RGB
-    img = Image.open(cover_image_path).convert("RGB")
-    img_array = np.array(img)
-    height, width, channels = img_array.shape
+    if not 1 <= bits_per_channel <= 8:
+        raise ValueError("bits_per_channel must be between 1 and 8")
+    
+    # Load and standardize image to RGB into a buffer of our own
+    stego_array = load_rgb_array(cover, writable=True)
+    height, width, channels = stego_array.shape
     
     # Convert message to binary
-    message_bits = string_to_bits(message)
+    message_bits = payload_to_bits(message)
     message_length = len(message_bits)
     
     # Check if message fits
-    total_capacity = height * width * channels
+    total_capacity = height * width * channels * bits_per_channel
     if message_length > total_capacity:
         raise ValueError(
             f"Message too large! Need {message_length} bits but image only has "
             f"{total_capacity} pixels."
         )
     
-    # Create a copy for modification
-    stego_array = img_array.copy()
+    # Group bits into one k-bit value per channel (zero-padding the last group)
+    channels_used = -(-message_length // bits_per_channel)
+    padded = np.zeros(channels_used * bits_per_channel, dtype=np.uint8)
+    padded[:message_length] = message_bits
+    weights = (1 << np.arange(bits_per_channel - 1, -1, -1)).astype(np.uint8)
+    values = padded.reshape(channels_used, bits_per_channel) @ weights
+    keep_mask = (0xFF << bits_per_channel) & 0xFF
     
     # === SEQUENTIAL LSB EMBEDDING (No shuffling!) ===
-    bit_index = 0
-    for row in range(height):
-        for col in range(width):
-            for channel in range(channels):
-                if bit_index >= message_length:
-                    break
-                
-                # Get current pixel value
-                pixel_value = stego_array[row, col, channel]
-                
-                # Embed message bit using LSB substitution
-                bit_to_embed = message_bits[bit_index]
-                new_pixel_value = (pixel_value & 0xFE) | bit_to_embed
-                
-                # Update pixel
-                stego_array[row, col, channel] = new_pixel_value
-                bit_index += 1
-            
-            if bit_index >= message_length:
-                break
-        if bit_index >= message_length:
-            break
-    
-    # Convert back to image and save as PNG
-    stego_image = Image.fromarray(stego_array.astype('uint8'), 'RGB')
-    
-    if not save_path.lower().endswith('.png'):
-        save_path = save_path.rsplit('.', 1)[0] + '.png'
-    
-    stego_image.save(save_path, "PNG")
-    
-    # Return statistics
-    return {
+    # Row-major order over (row, col, channel) is exactly the flat order, so
+    # the whole embedding is one slice assignment: (flat[:n] & 0xFE) | bits
+    flat = stego_array.reshape(-1)
+    flat[:channels_used] = (flat[:channels_used] & keep_mask) | values
+    
+    if bits_per_channel == 1:
+        method = 'Standard Sequential LSB (No DP)'
+    else:
+        method = f'Standard Sequential LSB, {bits_per_channel} bits/channel (No DP)'
+    
+    # Return the stego array with statistics
+    stats = {
         'message_length_bits': message_length,
         'message_length_chars': len(message),
-        'total_pixels_modified': message_length,
+        'total_pixels_modified': channels_used,
+        'bits_per_channel': bits_per_channel,
         'total_capacity': total_capacity,
         'capacity_used_percent': (message_length / total_capacity) * 100,
         'image_dimensions': f"{width}x{height}",
-        'save_path': save_path,
-        'method': 'Standard Sequential LSB (No DP)'
+        'method': method
     }
+    return stego_array, stats
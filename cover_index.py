@@ -0,0 +1,448 @@
+"""
+Cover Statistics Index
+Persistent SQLite index of cover-image histograms keyed by content hash,
+with perceptual-hash lookup of the original cover of a stego image
+"""
+
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from utils import load_rgb_array, find_images
+from steganalysis import channel_histograms, compare_images_from_histograms, load_image
+
+
+# Bytes read per chunk when hashing an image file
+HASH_CHUNK_BYTES = 1 << 20
+
+# Seconds a connection waits for another process's write lock
+SQLITE_TIMEOUT = 30.0
+
+# Perceptual hash: dHash over a (rows, columns + 1) grid of block means
+PERCEPTUAL_HASH_GRID = (8, 8)
+
+# Hamming distance (of 64 bits) up to which a cover counts as a candidate
+DEFAULT_MATCH_DISTANCE = 10
+
+# Multi-index hashing: chunks per 64-bit hash, and the largest per-chunk
+# search radius probed before falling back to a linear scan
+HASH_CHUNKS = 4
+CHUNK_BITS = 64 // HASH_CHUNKS
+CHUNK_MASK = (1 << CHUNK_BITS) - 1
+MAX_CHUNK_RADIUS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS covers (
+    pixel_hash TEXT PRIMARY KEY,
+    width INTEGER NOT NULL,
+    height INTEGER NOT NULL,
+    histograms BLOB NOT NULL,
+    added REAL NOT NULL,
+    perceptual_hash INTEGER
+);
+CREATE TABLE IF NOT EXISTS cover_files (
+    file_hash TEXT PRIMARY KEY,
+    pixel_hash TEXT NOT NULL REFERENCES covers(pixel_hash),
+    path TEXT
+);
+"""
+
+
+def pixel_hash(image: np.ndarray) -> str:
+    """SHA-256 of an RGB array's dimensions and pixel bytes (format-independent)."""
+    digest = hashlib.sha256(f"{image.shape[0]}x{image.shape[1]}:".encode('ascii'))
+    digest.update(memoryview(np.ascontiguousarray(image)).cast('B'))
+    return digest.hexdigest()
+
+
+def file_hash(source):
+    """
+    SHA-256 of an encoded image (path, bytes or file-like object), or None
+    for decoded sources (arrays, PIL images), which only have a pixel hash.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        digest = hashlib.sha256()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+    return None
+
+
+def perceptual_hash(image: np.ndarray) -> int:
+    """
+    64-bit dHash of an RGB array that ignores the LSB plane.
+    
+    The image is reduced to an 8 x 9 grid of block means of the high seven
+    bit planes (value >> 1, summed over the channels); bit i is set when a
+    block is brighter than its left neighbour. LSB embedding never changes
+    value >> 1, so a stego image hashes exactly like its cover, and the
+    block means keep the hash close under resizing or mild recompression.
+    
+    Args:
+        image (np.ndarray): RGB uint8 array, at least 9 pixels wide and 8 high
+        
+    Returns:
+        int: Hash in [0, 2**64)
+    """
+    rows, columns = PERCEPTUAL_HASH_GRID
+    height, width = image.shape[:2]
+    if height < rows or width < columns + 1:
+        raise ValueError(f"Image must be at least {columns + 1}x{rows} pixels for a perceptual hash")
+    
+    row_edges = np.linspace(0, height, rows + 1).astype(np.intp)
+    col_edges = np.linspace(0, width, columns + 2).astype(np.intp)
+    block_widths = np.diff(col_edges)
+    means = np.empty((rows, columns + 1))
+    for row in range(rows):
+        # One block row at a time keeps the shifted temporary small
+        band = image[row_edges[row]:row_edges[row + 1]]
+        column_sums = (band >> 1).sum(axis=(0, 2), dtype=np.int64)
+        block_sums = np.add.reduceat(column_sums, col_edges[:-1])
+        means[row] = block_sums / (block_widths * (row_edges[row + 1] - row_edges[row]))
+    
+    bits = (means[:, 1:] > means[:, :-1]).reshape(-1)
+    return int(np.sum(bits.astype(np.uint64) << np.arange(bits.size, dtype=np.uint64)))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+class MultiIndexHash:
+    """
+    Multi-index hash table for Hamming-radius search over 64-bit hashes.
+    
+    Each hash is split into HASH_CHUNKS 16-bit chunks, and every chunk is a
+    key in its own dict. If two hashes differ in at most r bits, then by the
+    pigeonhole principle some chunk differs in at most r // HASH_CHUNKS bits,
+    so a search only probes the buckets of chunk values within that small
+    radius (137 per chunk for r = 10) and verifies the few hashes found
+    there, instead of scanning the whole library.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._values = []
+        self._tables = [{} for _ in range(HASH_CHUNKS)]
+
+    def add(self, key: int, value) -> None:
+        entry = len(self._keys)
+        self._keys.append(key)
+        self._values.append(value)
+        for chunk, table in enumerate(self._tables):
+            table.setdefault((key >> (CHUNK_BITS * chunk)) & CHUNK_MASK, []).append(entry)
+
+    def search(self, key: int, max_distance: int) -> list:
+        """All (distance, value) pairs within max_distance of key, nearest first."""
+        chunk_radius = max_distance // HASH_CHUNKS
+        if chunk_radius > MAX_CHUNK_RADIUS:
+            # Probing would touch most buckets anyway
+            entries = range(len(self._keys))
+        else:
+            entries = set()
+            masks = _flip_masks(chunk_radius)
+            for chunk, table in enumerate(self._tables):
+                value = (key >> (CHUNK_BITS * chunk)) & CHUNK_MASK
+                for mask in masks:
+                    entries.update(table.get(value ^ mask, ()))
+        
+        matches = []
+        for entry in entries:
+            distance = hamming_distance(key, self._keys[entry])
+            if distance <= max_distance:
+                matches.append((distance, self._values[entry]))
+        matches.sort(key=lambda match: match[0])
+        return matches
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+def _flip_masks(radius: int) -> list:
+    """Every CHUNK_BITS-bit mask with at most radius bits set."""
+    masks = [0]
+    for bits in range(1, radius + 1):
+        masks += [sum(1 << bit for bit in combination)
+                  for combination in itertools.combinations(range(CHUNK_BITS), bits)]
+    return masks
+
+
+def _to_signed(value: int) -> int:
+    """Store an unsigned 64-bit hash in SQLite's signed INTEGER."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+class CoverIndex:
+    """
+    SQLite index of cover statistics, so a comparison never re-decodes the cover.
+
+    compare_images only needs the cover's 3 x 256 channel histograms. They are
+    stored once per distinct cover (keyed by the pixel hash) when the cover is
+    first seen, e.g. by core_engine.embed(..., cover_index=index). Encoded
+    files are additionally keyed by the hash of their bytes, so a later lookup
+    by path hashes the file instead of decoding it.
+
+    Every cover also gets a perceptual_hash, which find_covers searches with
+    an in-memory MultiIndexHash (built from the table on first use) to locate the
+    original of a stego image among many covers; compare() then runs the
+    comparison against the best match.
+
+    Tables:
+    - covers       pixel_hash -> width, height, histograms (int64 blob),
+                   perceptual_hash
+    - cover_files  file_hash -> pixel_hash, last path seen
+
+    Safe to share between threads; separate processes each open their own
+    CoverIndex on the same file (WAL journal, concurrent readers).
+    """
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(os.path.expanduser(path))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._hash_table = None
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT,
+                                           check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(_SCHEMA)
+            columns = [row[1] for row in self._connection.execute("PRAGMA table_info(covers)")]
+            if 'perceptual_hash' not in columns:
+                # Indexes created before perceptual hashes were stored
+                self._connection.execute("ALTER TABLE covers ADD COLUMN perceptual_hash INTEGER")
+
+    def add(self, source, image: np.ndarray = None, file_digest: str = None) -> str:
+        """
+        Index a cover (no-op for the statistics if it is already indexed).
+
+        Args:
+            source: Path, encoded bytes, file-like object, PIL image or RGB array
+                    (None if only image is given)
+            image (np.ndarray): The decoded RGB array of source, if the caller
+                                already has it (skips a second decode)
+            file_digest (str): file_hash(source), if the caller already has it
+                               (skips reading the file a second time)
+
+        Returns:
+            str: The cover's pixel hash
+        """
+        if hasattr(source, 'read'):
+            source = source.read()
+        if image is None:
+            image = load_rgb_array(source)
+        cover_hash = pixel_hash(image)
+        encoded_hash = file_digest if file_digest is not None else file_hash(source)
+        histograms = channel_histograms(image)
+        path = os.path.abspath(os.fspath(source)) if isinstance(source, (str, os.PathLike)) else None
+        try:
+            similarity_hash = perceptual_hash(image)
+        except ValueError:
+            # Too small to hash; still usable for statistics lookups
+            similarity_hash = None
+        stored_hash = None if similarity_hash is None else _to_signed(similarity_hash)
+
+        with self._lock, self._connection:
+            inserted = self._connection.execute(
+                "INSERT OR IGNORE INTO covers VALUES (?, ?, ?, ?, ?, ?)",
+                (cover_hash, image.shape[1], image.shape[0],
+                 histograms.astype('<i8').tobytes(), time.time(), stored_hash)).rowcount
+            if not inserted and stored_hash is not None:
+                inserted = self._connection.execute(
+                    "UPDATE covers SET perceptual_hash = ? "
+                    "WHERE pixel_hash = ? AND perceptual_hash IS NULL",
+                    (stored_hash, cover_hash)).rowcount
+            if inserted and similarity_hash is not None and self._hash_table is not None:
+                self._hash_table.add(similarity_hash, cover_hash)
+            if encoded_hash is not None:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO cover_files VALUES (?, ?, ?)",
+                    (encoded_hash, cover_hash, path))
+        return cover_hash
+
+    def get(self, cover_hash: str):
+        """
+        Stored histograms of a cover by pixel hash (e.g. stats['cover_hash'] of embed).
+
+        Returns:
+            np.ndarray or None: (3, 256) int64 channel histograms, None if unknown
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT histograms FROM covers WHERE pixel_hash = ?", (cover_hash,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return np.frombuffer(row[0], dtype='<i8').reshape(3, 256).astype(np.int64)
+
+    def lookup(self, source):
+        """
+        Stored histograms of a cover given as a path, bytes or array.
+
+        Encoded sources are found by hashing their bytes (no decode); arrays
+        by their pixel hash.
+
+        Returns:
+            np.ndarray or None: (3, 256) int64 channel histograms, None if not indexed
+        """
+        if hasattr(source, 'read'):
+            source = source.read()
+        encoded_hash = file_hash(source)
+        if encoded_hash is None:
+            return self.get(pixel_hash(load_rgb_array(source)))
+        return self._lookup_file(encoded_hash)
+
+    def _lookup_file(self, encoded_hash: str):
+        """Stored histograms of the cover file with this file_hash, or None."""
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT pixel_hash FROM cover_files WHERE file_hash = ?",
+                (encoded_hash,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        return self.get(row[0])
+
+    def cover_histograms(self, source) -> np.ndarray:
+        """Histograms of a cover from the index, decoding and adding it on a miss."""
+        if hasattr(source, 'read'):
+            source = source.read()
+        encoded_hash = file_hash(source)
+        if encoded_hash is None:
+            histograms = self.get(pixel_hash(load_rgb_array(source)))
+        else:
+            histograms = self._lookup_file(encoded_hash)
+        if histograms is None:
+            histograms = self.get(self.add(source, file_digest=encoded_hash))
+        return histograms
+
+    def add_directory(self, root: str) -> int:
+        """
+        Index every image under root; files already indexed are only hashed.
+
+        Returns:
+            int: Number of files that were decoded and added
+        """
+        added = 0
+        for path in find_images(root):
+            digest = file_hash(path)
+            with self._lock:
+                known = self._connection.execute(
+                    "SELECT 1 FROM cover_files WHERE file_hash = ?", (digest,)).fetchone()
+            if known is None:
+                self.add(path, file_digest=digest)
+                added += 1
+        return added
+
+    def find_covers(self, stego, max_distance: int = DEFAULT_MATCH_DISTANCE,
+                    limit: int = 10) -> list:
+        """
+        Candidate original covers of a stego image, best match first.
+
+        Candidates are indexed covers whose perceptual hash is within
+        max_distance bits of the stego image's; ties are broken in favour of
+        covers with the stego image's dimensions.
+
+        Args:
+            stego: Stego image (array, PIL image, bytes, file-like or path)
+            max_distance (int): Largest Hamming distance accepted (0-64)
+            limit (int): Maximum number of candidates returned
+
+        Returns:
+            list: dicts with cover_hash, distance, width, height and path
+                  (None if the cover was indexed from an array)
+        """
+        stego_array = load_image(stego)
+        target = perceptual_hash(stego_array)
+        height, width = stego_array.shape[:2]
+
+        with self._lock:
+            if self._hash_table is None:
+                self._hash_table = MultiIndexHash()
+                for cover_hash, stored_hash in self._connection.execute(
+                        "SELECT pixel_hash, perceptual_hash FROM covers "
+                        "WHERE perceptual_hash IS NOT NULL"):
+                    self._hash_table.add(_to_unsigned(stored_hash), cover_hash)
+            matches = self._hash_table.search(target, max_distance)
+
+            candidates = []
+            for distance, cover_hash in matches:
+                cover_width, cover_height, path = self._connection.execute(
+                    "SELECT width, height, (SELECT path FROM cover_files "
+                    "WHERE cover_files.pixel_hash = covers.pixel_hash AND path IS NOT NULL) "
+                    "FROM covers WHERE pixel_hash = ?", (cover_hash,)).fetchone()
+                candidates.append({
+                    'cover_hash': cover_hash,
+                    'distance': distance,
+                    'width': cover_width,
+                    'height': cover_height,
+                    'path': path,
+                })
+
+        candidates.sort(key=lambda match: (match['distance'],
+                                           (match['width'], match['height']) != (width, height)))
+        return candidates[:limit]
+
+    def compare(self, stego, max_distance: int = DEFAULT_MATCH_DISTANCE, lean: bool = False) -> tuple:
+        """
+        Find the original cover of a stego image and compare against it.
+
+        Equivalent to steganalysis.compare_images(best_cover, stego), with the
+        cover's statistics read from the index instead of decoding it.
+
+        Args:
+            stego: Stego image (array, PIL image, bytes, file-like or path)
+            max_distance (int): Largest Hamming distance accepted (0-64)
+            lean (bool): Return a ComparisonResult instead of a dict
+
+        Returns:
+            tuple: (comparison, match) - the compare_images result and the
+                   find_covers entry of the cover that was used
+        """
+        if hasattr(stego, 'read'):
+            stego = stego.read()
+        candidates = self.find_covers(stego, max_distance, limit=1)
+        if not candidates:
+            raise ValueError(f"No indexed cover within {max_distance} bits of the stego image")
+
+        match = candidates[0]
+        comparison = compare_images_from_histograms(self.get(match['cover_hash']), stego, lean)
+        return comparison, match
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM covers").fetchone()[0]
+
+    def info(self) -> dict:
+        """Return hit/miss counters and the number of indexed covers and files."""
+        with self._lock:
+            covers = self._connection.execute("SELECT COUNT(*) FROM covers").fetchone()[0]
+            files = self._connection.execute("SELECT COUNT(*) FROM cover_files").fetchone()[0]
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'covers': covers,
+                'files': files,
+                'path': self.path,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
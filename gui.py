@@ -9,10 +9,16 @@ import os
 from PIL import Image, ImageTk
 import threading
 
-from core_engine import embed, extract, get_image_capacity, embed_standard_lsb
+from core_engine import (embed, extract, get_image_capacity, embed_array,
+                         embed_standard_lsb_array, save_png)
+from utils import PATH_FORMATS, PATH_FORMAT_SHUFFLE, load_rgb_array
 from steganalysis import (chi_square_attack, compare_images, multi_channel_analysis, 
                          calculate_visual_difference, generate_random_lsb_image,
-                         calculate_epsilon_visibility)
+                         calculate_epsilon_visibility, chi_square_attack_array,
+                         compare_images_array, calculate_visual_difference_array,
+                         generate_random_lsb_array, pairs_of_values_attack,
+                         progressive_pairs_of_values_attack, rs_analysis,
+                         sample_pairs_analysis, lsb_heatmap, render_heatmap_overlay)
 
 
 class SteganographyApp:
@@ -126,6 +132,11 @@ class SteganographyApp:
                            show="" if self.show_pwd_var.get() else "*"
                        )).pack(side='left')
         
+        ttk.Label(pwd_frame, text="Pixel Path:").pack(side='left', padx=(15, 5))
+        self.embed_path_format_var = tk.StringVar(value=PATH_FORMAT_SHUFFLE)
+        ttk.Combobox(pwd_frame, textvariable=self.embed_path_format_var, values=PATH_FORMATS,
+                     state='readonly', width=10).pack(side='left')
+        
         # Privacy Frame
         privacy_frame = ttk.LabelFrame(scrollable_frame, text="4. Set Privacy Level (ε - Epsilon)", padding=10)
         privacy_frame.pack(fill='x', padx=10, pady=5)
@@ -221,6 +232,11 @@ class SteganographyApp:
                            show="" if self.show_extract_pwd_var.get() else "*"
                        )).pack(side='left')
         
+        ttk.Label(pwd_frame, text="Pixel Path:").pack(side='left', padx=(15, 5))
+        self.extract_path_format_var = tk.StringVar(value=PATH_FORMAT_SHUFFLE)
+        ttk.Combobox(pwd_frame, textvariable=self.extract_path_format_var, values=PATH_FORMATS,
+                     state='readonly', width=10).pack(side='left')
+        
         # Message Length Frame
         length_frame = ttk.LabelFrame(scrollable_frame, text="3. Enter Message Length (in bits)", padding=10)
         length_frame.pack(fill='x', padx=10, pady=5)
@@ -295,6 +311,20 @@ class SteganographyApp:
                   command=self.run_chi_square).pack(side='left', padx=5)
         ttk.Button(options_frame, text="Multi-Channel Analysis", 
                   command=self.run_multi_channel).pack(side='left', padx=5)
+        ttk.Button(options_frame, text="Pairs-of-Values Test", 
+                  command=self.run_pairs_of_values).pack(side='left', padx=5)
+        ttk.Button(options_frame, text="Progressive PoV Curve", 
+                  command=self.run_progressive_pairs_of_values).pack(side='left', padx=5)
+        ttk.Button(options_frame, text="RS Analysis", 
+                  command=self.run_rs_analysis).pack(side='left', padx=5)
+        ttk.Button(options_frame, text="Sample Pairs (SPA)", 
+                  command=self.run_sample_pairs_analysis).pack(side='left', padx=5)
+        ttk.Button(options_frame, text="LSB Heatmap", 
+                  command=self.run_lsb_heatmap).pack(side='left', padx=5)
+        
+        self.sampled_analysis_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(options_frame, text="Sampled estimate", 
+                       variable=self.sampled_analysis_var).pack(side='left', padx=10)
         
         # Comparison Frame
         compare_frame = ttk.LabelFrame(scrollable_frame, text="Compare Original vs Stego", padding=10)
@@ -330,6 +360,21 @@ class SteganographyApp:
         self.analysis_results_text = scrolledtext.ScrolledText(results_frame, height=15, wrap=tk.WORD)
         self.analysis_results_text.pack(fill='both', expand=True)
         
+        # Progressive curve plot (filled by run_progressive_pairs_of_values)
+        curve_frame = ttk.LabelFrame(scrollable_frame, text="Progressive P-Value Curve", padding=10)
+        curve_frame.pack(fill='x', padx=10, pady=5)
+        
+        self.curve_canvas = tk.Canvas(curve_frame, height=220, bg='white', highlightthickness=0)
+        self.curve_canvas.pack(fill='x', expand=True)
+        
+        # Tiled LSB heatmap overlay (filled by run_lsb_heatmap)
+        heatmap_frame = ttk.LabelFrame(scrollable_frame, text="LSB Deviation Heatmap", padding=10)
+        heatmap_frame.pack(fill='x', padx=10, pady=5)
+        
+        self.heatmap_label = ttk.Label(heatmap_frame, text="Run 'LSB Heatmap' to render", 
+                                       foreground="gray")
+        self.heatmap_label.pack()
+        
     def setup_testing_tab(self):
         """Setup the testing lab for comparing Standard LSB vs DP-Enhanced LSB"""
         
@@ -672,7 +717,7 @@ Version 1.0 - 2025
         """Update message length statistics"""
         text = self.message_text.get('1.0', 'end-1c').strip()
         char_count = len(text)
-        bit_count = char_count * 8
+        bit_count = len(text.encode('utf-8')) * 8
         
         self.message_stats_label.config(
             text=f"Characters: {char_count} | Bits: {bit_count}"
@@ -717,6 +762,7 @@ Version 1.0 - 2025
             return
             
         epsilon = self.epsilon_var.get()
+        path_format = self.embed_path_format_var.get()
         
         # Ask where to save
         save_path = filedialog.asksaveasfilename(
@@ -742,7 +788,8 @@ Version 1.0 - 2025
                     message=message,
                     password=password,
                     epsilon=epsilon,
-                    save_path=save_path
+                    save_path=save_path,
+                    path_format=path_format
                 )
                 
                 # Calculate epsilon visibility
@@ -803,8 +850,9 @@ IMPORTANT - Share these with the receiver:
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 1. Password: (keep this secret!)
 2. Message Length: {result['message_length_bits']} bits
+3. Pixel Path: {result['path_format']}
 
-Both values are required for extraction!
+All three values are required for extraction!
                 """
                 
                 self.embed_results_text.delete('1.0', tk.END)
@@ -815,7 +863,8 @@ Both values are required for extraction!
                     f"Message embedded successfully!\n\n"
                     f"Share with receiver:\n"
                     f"• Password: (secret)\n"
-                    f"• Message length: {result['message_length_bits']} bits"
+                    f"• Message length: {result['message_length_bits']} bits\n"
+                    f"• Pixel path: {result['path_format']}"
                 )
                 
             except Exception as e:
@@ -844,6 +893,8 @@ Both values are required for extraction!
         except ValueError:
             messagebox.showerror("Error", "Please enter a valid message length (in bits)!")
             return
+        
+        path_format = self.extract_path_format_var.get()
             
         # Extract in a separate thread
         def extract_thread():
@@ -857,7 +908,8 @@ Both values are required for extraction!
                 extracted_message = extract(
                     stego_image_path=self.stego_image_path,
                     password=password,
-                    message_length_bits=message_length_bits
+                    message_length_bits=message_length_bits,
+                    path_format=path_format
                 )
                 
                 # Display results
@@ -902,7 +954,8 @@ STATISTICS:
             return
             
         try:
-            result = chi_square_attack(self.analysis_image_path, channel='all')
+            result = chi_square_attack(self.analysis_image_path, channel='all',
+                                       sampled=self.sampled_analysis_var.get())
             
             results_text = f"""
 CHI-SQUARE STEGANALYSIS TEST
@@ -929,12 +982,256 @@ Detection Confidence:   {result['detection_confidence']}
 INTERPRETATION:
 {result['explanation']}
 
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Analysis complete for: {os.path.basename(self.analysis_image_path)}
+            """
+            if result.get('sampled'):
+                low, high = result['deviation_interval']
+                results_text += (
+                    f"\nSAMPLED ESTIMATE: {result['samples_used']:,} values read, "
+                    f"deviation {low:.4f}% - {high:.4f}% "
+                    f"({result['confidence_level'] * 100:.0f}% confidence), "
+                    f"verdict {'decided' if result['verdict_decided'] else 'NOT decided'}\n"
+                )
+            
+            self.analysis_results_text.delete('1.0', tk.END)
+            self.analysis_results_text.insert('1.0', results_text)
+            
+        except Exception as e:
+            messagebox.showerror("Analysis Failed", str(e))
+            
+    def run_pairs_of_values(self):
+        """Run the Westfeld pairs-of-values steganalysis test"""
+        if not hasattr(self, 'analysis_image_path') or not self.analysis_image_path:
+            messagebox.showerror("Error", "Please select an image to analyze!")
+            return
+            
+        try:
+            result = pairs_of_values_attack(self.analysis_image_path, channel='all')
+            
+            results_text = f"""
+PAIRS-OF-VALUES (WESTFELD) STEGANALYSIS TEST
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+PAIR HISTOGRAM ANALYSIS:
+Channel Analyzed:       {result['channel']}
+Total Pixels:           {result['total_pixels']:,}
+Populated Pairs:        {result['degrees_of_freedom'] + 1}
+
+STATISTICAL TEST RESULTS:
+Chi-Square Statistic:   {result['chi_square_statistic']:.4f}
+Degrees of Freedom:     {result['degrees_of_freedom']}
+P-Value:                {result['p_value']:.6f}
+Threshold:              p > {1 - result['threshold_alpha']:.2f} flags embedding
+
+VERDICT: {result['verdict']}
+Detection Confidence:   {result['detection_confidence']}
+
+INTERPRETATION:
+{result['explanation']}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Analysis complete for: {os.path.basename(self.analysis_image_path)}
+            """
+            
+            self.analysis_results_text.delete('1.0', tk.END)
+            self.analysis_results_text.insert('1.0', results_text)
+            
+        except Exception as e:
+            messagebox.showerror("Analysis Failed", str(e))
+            
+    def run_progressive_pairs_of_values(self):
+        """Run the progressive pairs-of-values attack and plot its p-value curve"""
+        if not hasattr(self, 'analysis_image_path') or not self.analysis_image_path:
+            messagebox.showerror("Error", "Please select an image to analyze!")
+            return
+            
+        try:
+            result = progressive_pairs_of_values_attack(self.analysis_image_path, channel='all')
+            
+            results_text = f"""
+PROGRESSIVE PAIRS-OF-VALUES TEST
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Channel Analyzed:       {result['channel']}
+Total Pixels:           {result['total_pixels']:,}
+Sample Points:          {result['points']}
+Estimated Embedding:    {result['estimated_embedding_fraction'] * 100:.1f}% of the image
+                        (scanned in raster order)
+
+VERDICT: {result['verdict']}
+
+INTERPRETATION:
+{result['explanation']}
+
+The curve below shows the p-value after scanning each fraction of the image.
+
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 Analysis complete for: {os.path.basename(self.analysis_image_path)}
             """
             
             self.analysis_results_text.delete('1.0', tk.END)
             self.analysis_results_text.insert('1.0', results_text)
+            self.plot_progressive_curve(result)
+            
+        except Exception as e:
+            messagebox.showerror("Analysis Failed", str(e))
+            
+    def plot_progressive_curve(self, result):
+        """Draw a progressive p-value curve on the analysis canvas"""
+        canvas = self.curve_canvas
+        canvas.delete('all')
+        canvas.update_idletasks()
+        
+        width = max(canvas.winfo_width(), 300)
+        height = int(canvas['height'])
+        left, right, top, bottom = 45, 15, 15, 30
+        plot_w = width - left - right
+        plot_h = height - top - bottom
+        
+        def to_xy(fraction, p_value):
+            return left + fraction * plot_w, top + (1 - p_value) * plot_h
+        
+        # Axes and labels
+        canvas.create_line(left, top, left, top + plot_h, left + plot_w, top + plot_h)
+        for value in (0, 0.5, 1):
+            x, y = to_xy(0, value)
+            canvas.create_text(x - 5, y, text=f"{value:g}", anchor='e')
+            x, y = to_xy(value, 0)
+            canvas.create_text(x, y + 5, text=f"{value * 100:.0f}%", anchor='n')
+        canvas.create_text(left + plot_w / 2, height - 2, text="Image scanned", anchor='s')
+        
+        # Detection threshold
+        threshold = 1 - result['threshold_alpha']
+        _, y = to_xy(0, threshold)
+        canvas.create_line(left, y, left + plot_w, y, fill='red', dash=(4, 2))
+        
+        # Curve
+        points = [to_xy(0, result['p_values'][0])]
+        points += [to_xy(fraction, p_value)
+                   for fraction, p_value in zip(result['fractions'], result['p_values'])]
+        canvas.create_line(*[coordinate for point in points for coordinate in point],
+                           fill='blue', width=2)
+        
+    def run_rs_analysis(self):
+        """Run RS steganalysis and report the estimated payload"""
+        if not hasattr(self, 'analysis_image_path') or not self.analysis_image_path:
+            messagebox.showerror("Error", "Please select an image to analyze!")
+            return
+            
+        try:
+            result = rs_analysis(self.analysis_image_path, channel='all')
+            
+            results_text = f"""
+RS (REGULAR/SINGULAR) STEGANALYSIS
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+PAYLOAD ESTIMATE:
+Channel Analyzed:       {result['channel']}
+Pixel Groups:           {result['total_groups']:,}
+Estimated Payload:      {result['estimated_payload_percent']:.2f}% of LSB capacity
+Estimated Changed LSBs: ~{result['estimated_modified_values']:,}
+
+GROUP STATISTICS:              Image      LSB-flipped
+  • Regular  (mask M):        {result['regular_m']:.4f}     {result['regular_m_flipped']:.4f}
+  • Singular (mask M):        {result['singular_m']:.4f}     {result['singular_m_flipped']:.4f}
+  • Regular  (mask -M):       {result['regular_neg_m']:.4f}     {result['regular_neg_m_flipped']:.4f}
+  • Singular (mask -M):       {result['singular_neg_m']:.4f}     {result['singular_neg_m_flipped']:.4f}
+
+VERDICT: {result['verdict']}
+Detection Confidence:   {result['detection_confidence']}
+
+INTERPRETATION:
+{result['explanation']}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Analysis complete for: {os.path.basename(self.analysis_image_path)}
+            """
+            
+            self.analysis_results_text.delete('1.0', tk.END)
+            self.analysis_results_text.insert('1.0', results_text)
+            
+        except Exception as e:
+            messagebox.showerror("Analysis Failed", str(e))
+            
+    def run_sample_pairs_analysis(self):
+        """Run Sample Pairs Analysis and report the estimated payload"""
+        if not hasattr(self, 'analysis_image_path') or not self.analysis_image_path:
+            messagebox.showerror("Error", "Please select an image to analyze!")
+            return
+            
+        try:
+            result = sample_pairs_analysis(self.analysis_image_path, channel='all')
+            
+            results_text = f"""
+SAMPLE PAIRS ANALYSIS (SPA)
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+PAYLOAD ESTIMATE:
+Channel Analyzed:       {result['channel']}
+Adjacent Pairs:         {result['total_pairs']:,}
+Estimated Payload:      {result['estimated_payload_percent']:.2f}% of LSB capacity
+
+TRACE SETS:
+  • X:                  {result['x_count']:,}
+  • Y:                  {result['y_count']:,}
+  • Z (equal):          {result['z_count']:,}
+  • W (same LSB pair):  {result['w_count']:,}
+
+VERDICT: {result['verdict']}
+Detection Confidence:   {result['detection_confidence']}
+
+INTERPRETATION:
+{result['explanation']}
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Analysis complete for: {os.path.basename(self.analysis_image_path)}
+            """
+            
+            self.analysis_results_text.delete('1.0', tk.END)
+            self.analysis_results_text.insert('1.0', results_text)
+            
+        except Exception as e:
+            messagebox.showerror("Analysis Failed", str(e))
+            
+    def run_lsb_heatmap(self):
+        """Run the tiled LSB analysis and show its heatmap overlay"""
+        if not hasattr(self, 'analysis_image_path') or not self.analysis_image_path:
+            messagebox.showerror("Error", "Please select an image to analyze!")
+            return
+            
+        try:
+            result = lsb_heatmap(self.analysis_image_path, channel='all')
+            grid_rows, grid_cols = result['grid']
+            worst_row, worst_col = result['most_anomalous_tile']
+            
+            results_text = f"""
+TILED LSB HEATMAP
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+
+Channel Analyzed:       {result['channel']}
+Grid:                   {grid_rows} x {grid_cols} tiles
+Mean Deviation:         {result['mean_deviation']:.4f}%
+Max Deviation:          {result['max_deviation']:.4f}% (tile row {worst_row}, column {worst_col})
+Significant Tiles:      {result['significant_tiles']} of {grid_rows * grid_cols} (p < 0.05)
+
+INTERPRETATION:
+Red regions deviate most from a 50/50 LSB split. Natural images
+vary smoothly from tile to tile. A block of tiles that is unusually
+close to 50/50 (dark) among biased neighbours, or the reverse,
+marks a region where LSBs were rewritten.
+
+━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
+Analysis complete for: {os.path.basename(self.analysis_image_path)}
+            """
+            
+            self.analysis_results_text.delete('1.0', tk.END)
+            self.analysis_results_text.insert('1.0', results_text)
+            
+            overlay = render_heatmap_overlay(self.analysis_image_path, result['heatmap'])
+            photo = ImageTk.PhotoImage(overlay)
+            self.heatmap_label.config(image=photo, text="")
+            self.heatmap_label.image = photo  # Keep a reference
             
         except Exception as e:
             messagebox.showerror("Analysis Failed", str(e))
@@ -992,7 +1289,8 @@ Analysis complete for: {os.path.basename(self.analysis_image_path)}
             return
         try:
             # Run comparison
-            comparison = compare_images(self.original_comparison_path, self.stego_comparison_path)
+            comparison = compare_images(self.original_comparison_path, self.stego_comparison_path,
+                                        sampled=self.sampled_analysis_var.get())
             visual = calculate_visual_difference(self.original_comparison_path, self.stego_comparison_path)
 
             # Indicators for effectiveness (plain labels)
@@ -1055,6 +1353,15 @@ EFFECTIVENESS THRESHOLDS:
 Visual Quality: PSNR > 40 dB = imperceptible
 This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
             """
+            if 'sampling' in comparison:
+                sampling = comparison['sampling']
+                low, high = sampling['deviation_change_interval']
+                results_text += (
+                    f"\nSAMPLED ESTIMATE: {sampling['samples_used']:,} values read per image, "
+                    f"deviation change {low:.4f}% - {high:.4f}% "
+                    f"({sampling['confidence_level'] * 100:.0f}% confidence), "
+                    f"rating {'decided' if sampling['verdict_decided'] else 'NOT decided'}\n"
+                )
 
             self.analysis_results_text.delete('1.0', tk.END)
             self.analysis_results_text.insert('1.0', results_text)
@@ -1105,13 +1412,12 @@ This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
                 self.testing_results_text.insert(tk.END, f"Step 1: Using existing image file...\n")
                 self.root.update()
                 
-                # Copy the selected image to temp location
-                from PIL import Image
-                img = Image.open(self.test_image_path)
-                img.save(original_path)
+                # Decode the selected image once; everything below stays in memory
+                original_array = load_rgb_array(self.test_image_path)
+                save_png(original_array, original_path)
                 
                 # Get actual dimensions from image
-                width, height = img.size
+                height, width = original_array.shape[:2]
                 
                 self.testing_results_text.insert(tk.END, 
                     f"Loaded image: {os.path.basename(self.test_image_path)}\n"
@@ -1121,13 +1427,14 @@ This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
                 self.testing_results_text.insert(tk.END, f"Step 1: Generating synthetic image (seed={seed})...\n")
                 self.root.update()
                 
-                generate_random_lsb_image(width, height, original_path, seed=seed)
+                original_array = generate_random_lsb_array(width, height, seed=seed)
+                save_png(original_array, original_path)
                 
                 self.testing_results_text.insert(tk.END, 
                     f"Generated {width}×{height} image\n")
             
             # Analyze original
-            original_analysis = chi_square_attack(original_path, channel='all')
+            original_analysis = chi_square_attack_array(original_array, channel='all')
             
             self.testing_results_text.insert(tk.END, 
                 f"  LSB Distribution: {original_analysis['lsb_0_percent']:.2f}% / {original_analysis['lsb_1_percent']:.2f}%\n"
@@ -1139,9 +1446,10 @@ This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
             self.testing_results_text.insert(tk.END, "Step 2: Embedding with Standard Sequential LSB (NO DP)...\n")
             self.root.update()
             
-            standard_result = embed_standard_lsb(original_path, message, standard_path)
-            standard_analysis = chi_square_attack(standard_path, channel='all')
-            visual_standard = calculate_visual_difference(original_path, standard_path)
+            standard_array, standard_result = embed_standard_lsb_array(original_array, message)
+            save_png(standard_array, standard_path)
+            standard_analysis = chi_square_attack_array(standard_array, channel='all')
+            visual_standard = calculate_visual_difference_array(original_array, standard_array)
 
             self.testing_results_text.insert(tk.END,
                 f"Embedded {len(message)} characters ({standard_result['message_length_bits']} bits)\n"
@@ -1156,9 +1464,10 @@ This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
             self.testing_results_text.insert(tk.END, f"Step 3: Embedding with DP-Enhanced LSB (ε={epsilon:.2f})...\n")
             self.root.update()
             
-            dp_result = embed(original_path, message, password, epsilon, dp_path)
-            dp_analysis = chi_square_attack(dp_path, channel='all')
-            visual_dp = calculate_visual_difference(original_path, dp_path)
+            dp_array, dp_result = embed_array(original_array, message, password, epsilon)
+            save_png(dp_array, dp_path)
+            dp_analysis = chi_square_attack_array(dp_array, channel='all')
+            visual_dp = calculate_visual_difference_array(original_array, dp_array)
 
             self.testing_results_text.insert(tk.END,
                 f"Embedded {len(message)} characters ({dp_result['message_length_bits']} bits)\n"
@@ -1177,7 +1486,7 @@ This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
             self.root.update()
             
             # Compare standard LSB
-            standard_comparison = compare_images(original_path, standard_path)
+            standard_comparison = compare_images_array(original_array, standard_array)
             standard_deviation_change = standard_comparison['changes']['deviation_change']
             standard_effectiveness = standard_comparison['effectiveness']['rating']
             # attach visual metrics
@@ -1187,7 +1496,7 @@ This embedding: {visual['psnr']:.2f} dB - {visual['quality_rating']}
                 standard_psnr = None
             
             # Compare DP-Enhanced LSB
-            dp_comparison = compare_images(original_path, dp_path)
+            dp_comparison = compare_images_array(original_array, dp_array)
             dp_deviation_change = dp_comparison['changes']['deviation_change']
             dp_effectiveness = dp_comparison['effectiveness']['rating']
             try:
@@ -0,0 +1,253 @@
+"""
+Persistent Permutation Store
+Keeps computed pixel paths on disk as memory-mapped .npy files
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+from utils import index_dtype
+
+
+# Default disk budget for stored permutations
+DEFAULT_STORE_BYTES = 4 * 1024 * 1024 * 1024
+
+# Integrity is checked per block so that a prefix read only touches its blocks
+CHECKSUM_BLOCK_ENTRIES = 1 << 16
+
+
+class PermutationStore:
+    """
+    On-disk store of full shuffled index paths, served back via np.load(mmap_mode='r').
+
+    Long-running workers restart often; recomputing a multi-hundred-MB shuffle
+    after every restart is wasted work. Once a path has been computed it is
+    written here as a compact .npy file (the dtype from utils.index_dtype,
+    normally uint32), and a cold process maps it instead of
+    reshuffling. Reading the first k indices only pages in the first k entries.
+
+    Layout (one pair of files per (seed, shape)):
+    - <key>.npy   the permutation, written atomically (temp file + rename)
+    - <key>.json  metadata: length, dtype, file size and one BLAKE2 checksum
+                  per CHECKSUM_BLOCK_ENTRIES entries
+
+    Integrity: before a prefix is used, every block it overlaps is hashed and
+    compared with the metadata (once per process). Corrupt or truncated
+    entries are deleted and reported as a miss, so the caller recomputes.
+
+    Eviction: after each write, least recently used entries (by file mtime,
+    refreshed on every hit) are removed until the store fits in max_bytes.
+
+    SECURITY: a stored path is as sensitive as the password it came from.
+    Key names are hashed so seeds do not appear on disk, and the directory is
+    created owner-only, but it must still live on private storage.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_STORE_BYTES):
+        self.directory = os.path.abspath(os.path.expanduser(directory))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.corrupt = 0
+        self._verified_blocks = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, mode=0o700, exist_ok=True)
+
+    def load(self, seed: int, image_shape: tuple, prefix_length: int = None):
+        """
+        Map a stored permutation read-only, verifying the blocks of its prefix.
+
+        Args:
+            seed (int): Password-derived seed
+            image_shape (tuple): (height, width, channels) of the image
+            prefix_length (int): How many leading entries the caller will read
+                                 (None = verify the whole file)
+
+        Returns:
+            np.memmap or None: The stored permutation, or None on a miss
+        """
+        key = self._key(seed, image_shape)
+        npy_path, meta_path = self._paths(key)
+
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            indices = np.load(npy_path, mmap_mode='r')
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            length = meta['length'] if prefix_length is None else prefix_length
+            intact = self._verify(key, npy_path, meta, indices, length)
+        except (OSError, KeyError, TypeError, IndexError):
+            intact = False
+
+        if not intact:
+            self._remove(key)
+            with self._lock:
+                self.corrupt += 1
+                self.misses += 1
+            return None
+
+        # Refresh the LRU timestamp
+        try:
+            os.utime(npy_path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return indices
+
+    def save(self, seed: int, image_shape: tuple, indices: np.ndarray) -> bool:
+        """
+        Store a full permutation (converted to the compact dtype) and evict
+        old entries to stay within budget.
+
+        Returns:
+            bool: True if stored, False if it alone would exceed max_bytes
+        """
+        dtype = index_dtype(len(indices))
+        compact = np.asarray(indices).astype(dtype, copy=False)
+        if compact.nbytes > self.max_bytes:
+            return False
+
+        key = self._key(seed, image_shape)
+        npy_path, meta_path = self._paths(key)
+        meta = {
+            'shape': list(image_shape),
+            'length': int(len(compact)),
+            'dtype': np.dtype(dtype).name,
+            'block_entries': CHECKSUM_BLOCK_ENTRIES,
+            'checksums': [
+                _block_checksum(compact[start:start + CHECKSUM_BLOCK_ENTRIES])
+                for start in range(0, len(compact), CHECKSUM_BLOCK_ENTRIES)
+            ],
+        }
+
+        self._atomic_write(npy_path, lambda f: np.save(f, compact))
+        meta['file_size'] = os.path.getsize(npy_path)
+        self._atomic_write(meta_path, lambda f: f.write(json.dumps(meta).encode('utf-8')))
+
+        with self._lock:
+            self._verified_blocks[key] = set(range(len(meta['checksums'])))
+        self._evict()
+        return True
+
+    def clear(self) -> None:
+        """Delete every stored permutation and reset the counters."""
+        for name in os.listdir(self.directory):
+            if name.endswith(('.npy', '.json')):
+                self._unlink(os.path.join(self.directory, name))
+        with self._lock:
+            self._verified_blocks.clear()
+            self.hits = self.misses = self.evictions = self.corrupt = 0
+
+    def info(self) -> dict:
+        """Return hit/miss counters and current disk usage."""
+        entries = self._entries()
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'corrupt': self.corrupt,
+                'entries': len(entries),
+                'current_bytes': sum(size for _, size, _ in entries),
+                'max_bytes': self.max_bytes,
+                'directory': self.directory,
+            }
+
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _key(seed: int, image_shape: tuple) -> str:
+        # Hash so the seed (equivalent to the password) never appears in a filename
+        material = f"{seed}:{'x'.join(str(d) for d in image_shape)}".encode('utf-8')
+        return hashlib.sha256(material).hexdigest()[:32]
+
+    def _paths(self, key: str) -> tuple:
+        base = os.path.join(self.directory, key)
+        return base + '.npy', base + '.json'
+
+    def _verify(self, key: str, npy_path: str, meta: dict, indices: np.ndarray,
+                length: int) -> bool:
+        if (indices.ndim != 1 or len(indices) != meta['length']
+                or indices.dtype != np.dtype(meta['dtype'])
+                or os.path.getsize(npy_path) != meta['file_size']
+                or length > meta['length']):
+            return False
+
+        block_entries = meta['block_entries']
+        needed = range((length + block_entries - 1) // block_entries)
+        with self._lock:
+            verified = self._verified_blocks.setdefault(key, set())
+            pending = [block for block in needed if block not in verified]
+
+        for block in pending:
+            start = block * block_entries
+            if _block_checksum(indices[start:start + block_entries]) != meta['checksums'][block]:
+                return False
+
+        with self._lock:
+            self._verified_blocks.setdefault(key, set()).update(pending)
+        return True
+
+    def _atomic_write(self, path: str, write) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self._unlink(tmp_path)
+            raise
+
+    def _entries(self) -> list:
+        """Return (key, size, mtime) for every stored permutation."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.npy'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((name[:-4], stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(key)
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        for path in self._paths(key):
+            self._unlink(path)
+        with self._lock:
+            self._verified_blocks.pop(key, None)
+
+    @staticmethod
+    def _unlink(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _block_checksum(block: np.ndarray) -> str:
+    return hashlib.blake2b(memoryview(np.ascontiguousarray(block)), digest_size=16).hexdigest()
@@ -0,0 +1,317 @@
+"""
+Streaming PNG Access
+Reads and writes PNG images in row bands without holding the whole image
+"""
+
+import io
+import itertools
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# Decoded RGB bytes per band (bounds peak memory of streaming reads)
+DEFAULT_BAND_BYTES = 16 * 1024 * 1024
+
+# Bytes of compressed data read from the file at a time
+READ_CHUNK_BYTES = 1 << 20
+
+# Compressed bytes per IDAT chunk written by PngBandWriter
+IDAT_CHUNK_BYTES = 1 << 20
+
+# Row bytes filtered at a time by PngBandWriter (bounds the int16 temporaries,
+# about 35x this; smaller blocks also stay in cache)
+FILTER_BLOCK_BYTES = 1 << 18
+
+# zlib level of PngBandWriter (Pillow's PNG default)
+DEFAULT_COMPRESS_LEVEL = 6
+
+# Samples per pixel of each 8-bit PNG color type (0 gray, 2 RGB, 3 palette,
+# 4 gray + alpha, 6 RGBA)
+_COLOR_TYPE_SAMPLES = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+# Chunks before IDAT that decoding a band needs
+_BAND_CHUNKS = (b'PLTE', b'tRNS')
+
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+class PngBandReader:
+    """
+    Decode a PNG top to bottom, one band of rows at a time.
+
+    The IDAT stream is inflated incrementally, so only one band of filtered
+    scanlines is held at a time. Unfiltering (Sub / Up / Average / Paeth) is
+    left to Pillow: each band is wrapped in a small stand-alone PNG whose
+    first row is the previous band's last unfiltered row (filter None), so
+    filters that refer to the row above see exactly the bytes they did in
+    the original file. Bands come out as RGB, identical to the same rows of
+    utils.load_rgb_array(path).
+
+    Supports non-interlaced PNGs with 8 bits per sample (every color type);
+    anything else raises ValueError, and callers fall back to a full decode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._read_header()
+        except BaseException:
+            self._file.close()
+            raise
+
+    def _read_header(self) -> None:
+        if self._file.read(8) != PNG_SIGNATURE:
+            raise ValueError("Not a PNG file")
+
+        self._band_chunks = []
+        while True:
+            length, kind = self._chunk_header()
+            if kind == b'IDAT':
+                self._idat_remaining = length
+                break
+            data = self._file.read(length)
+            self._file.read(4)  # CRC
+            if kind == b'IHDR':
+                self._ihdr = data
+                (self.width, self.height, bit_depth, color_type,
+                 _, _, interlace) = struct.unpack('>IIBBBBB', data)
+                if bit_depth != 8 or color_type not in _COLOR_TYPE_SAMPLES:
+                    raise ValueError("Streaming reads need 8 bits per sample")
+                if interlace:
+                    raise ValueError("Streaming reads do not support interlaced PNGs")
+                self.samples = _COLOR_TYPE_SAMPLES[color_type]
+            elif kind in _BAND_CHUNKS:
+                self._band_chunks.append(_chunk(kind, data))
+            elif kind == b'IEND':
+                raise ValueError("PNG has no image data")
+
+        self.row_bytes = self.width * self.samples
+        self._inflater = zlib.decompressobj()
+        self._pending = b''
+
+    def _chunk_header(self) -> tuple:
+        header = self._file.read(8)
+        if len(header) < 8:
+            raise ValueError("Truncated PNG")
+        return struct.unpack('>I4s', header)
+
+    def _compressed(self) -> bytes:
+        """Next piece of IDAT data, or b'' at the end of the image data."""
+        while self._idat_remaining == 0:
+            self._file.read(4)  # CRC of the previous IDAT
+            length, kind = self._chunk_header()
+            if kind != b'IDAT':
+                return b''
+            self._idat_remaining = length
+        data = self._file.read(min(self._idat_remaining, READ_CHUNK_BYTES))
+        if not data:
+            raise ValueError("Truncated PNG")
+        self._idat_remaining -= len(data)
+        return data
+
+    def _scanline_pieces(self, count: int):
+        """Yield the next count filtered scanlines (filter byte + row bytes each) in pieces."""
+        needed = count * (self.row_bytes + 1)
+        if self._pending:
+            piece, self._pending = self._pending[:needed], self._pending[needed:]
+            needed -= len(piece)
+            yield piece
+        while needed > 0:
+            if self._inflater.unconsumed_tail:
+                data = self._inflater.unconsumed_tail
+            else:
+                data = self._compressed()
+                if not data:
+                    raise ValueError("Truncated PNG image data")
+            piece = self._inflater.decompress(data, READ_CHUNK_BYTES)
+            if len(piece) > needed:
+                self._pending = piece[needed:]
+                piece = piece[:needed]
+            needed -= len(piece)
+            yield piece
+
+    def _band_png(self, rows: int, previous_row: bytes) -> io.BytesIO:
+        """
+        Stand-alone PNG of the next rows scanlines, preceded by previous_row
+        (unfiltered) if given. The scanlines are re-packed into stored
+        (level 0) deflate blocks as they are inflated, so the band is only
+        held once.
+        """
+        total_rows = rows + (previous_row is not None)
+        png = io.BytesIO()
+        png.write(PNG_SIGNATURE)
+        png.write(_chunk(b'IHDR', struct.pack('>II', self.width, total_rows) + self._ihdr[8:]))
+        for chunk in self._band_chunks:
+            png.write(chunk)
+
+        length_offset = png.tell()
+        png.write(b'\x00\x00\x00\x00IDAT')
+        packer = zlib.compressobj(0)
+        crc = zlib.crc32(b'IDAT')
+        size = 0
+        pieces = self._scanline_pieces(rows)
+        if previous_row is not None:
+            pieces = itertools.chain([b'\x00' + previous_row], pieces)
+        for piece in itertools.chain(pieces, [None]):
+            packed = packer.compress(piece) if piece is not None else packer.flush()
+            crc = zlib.crc32(packed, crc)
+            size += len(packed)
+            png.write(packed)
+        png.write(struct.pack('>I', crc))
+        png.write(_chunk(b'IEND', b''))
+        png.seek(length_offset)
+        png.write(struct.pack('>I', size))
+        png.seek(0)
+        return png
+
+    def bands(self, band_rows: int = None):
+        """
+        Yield (first_row, rgb_band) for consecutive row bands.
+
+        Args:
+            band_rows (int): Rows per band (default: DEFAULT_BAND_BYTES of RGB)
+
+        Yields:
+            tuple: (int, np.ndarray) - first row index and a (rows, width, 3)
+                   uint8 RGB array
+        """
+        if band_rows is None:
+            band_rows = max(1, DEFAULT_BAND_BYTES // (self.width * 3))
+        previous_row = None
+
+        for first_row in range(0, self.height, band_rows):
+            rows = min(band_rows, self.height - first_row)
+            png = self._band_png(rows, previous_row)
+            with Image.open(png) as img:
+                img.load()
+                png.close()
+                if img.mode == 'RGB':
+                    rgb = np.asarray(img)
+                    previous_row = rgb[-1].tobytes()
+                else:
+                    previous_row = np.asarray(img)[-1].tobytes()
+                    rgb = np.asarray(img.convert('RGB'))
+            yield first_row, rgb[len(rgb) - rows:]
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class PngBandWriter:
+    """
+    Write an RGB PNG top to bottom, one band of rows at a time.
+
+    Rows are filtered adaptively like libpng and Pillow: all five PNG filters
+    are computed (vectorized, a block of rows at a time) and each row keeps
+    the one with the smallest sum of absolute signed bytes. Compressed data
+    is written out in IDAT chunks as it is produced, so memory is bounded by
+    one band. Lossless: decoding gives back exactly the rows written.
+    """
+
+    def __init__(self, path: str, width: int, height: int,
+                 compress_level: int = DEFAULT_COMPRESS_LEVEL):
+        if width < 1 or height < 1:
+            raise ValueError("Image dimensions must be positive")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.rows_written = 0
+        self._packer = zlib.compressobj(compress_level)
+        self._output = bytearray()
+        # The row above the first row is all zeros for the PNG filters
+        self._previous_row = np.zeros(width * 3, dtype=np.int16)
+        self._file = open(path, 'wb')
+        self._file.write(PNG_SIGNATURE)
+        self._file.write(_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+
+    def write(self, rows: np.ndarray) -> None:
+        """
+        Append rows to the image.
+
+        Args:
+            rows (np.ndarray): (n, width, 3) uint8 RGB rows
+        """
+        if rows.dtype != np.uint8 or rows.ndim != 3 or rows.shape[1:] != (self.width, 3):
+            raise ValueError(f"Rows must be uint8 with shape (n, {self.width}, 3)")
+        if self.rows_written + len(rows) > self.height:
+            raise ValueError("More rows written than the image height")
+
+        values = rows.reshape(len(rows), -1)
+        block_rows = max(1, FILTER_BLOCK_BYTES // values.shape[1])
+        for start in range(0, len(values), block_rows):
+            self._emit(self._packer.compress(self._filter(values[start:start + block_rows])))
+        self.rows_written += len(rows)
+
+    def _filter(self, values: np.ndarray) -> np.ndarray:
+        """Adaptively filtered scanlines (filter byte + row bytes) of a block of rows."""
+        current = values.astype(np.int16)
+        up = np.empty_like(current)
+        up[0] = self._previous_row
+        up[1:] = current[:-1]
+        self._previous_row = current[-1].copy()
+        left = np.zeros_like(current)
+        left[:, 3:] = current[:, :-3]
+        up_left = np.zeros_like(current)
+        up_left[:, 3:] = up[:, :-3]
+
+        # Paeth predictor: whichever of left, up, up-left is closest to left + up - up-left
+        estimate = left + up - up_left
+        distance_left = np.abs(estimate - left)
+        distance_up = np.abs(estimate - up)
+        distance_up_left = np.abs(estimate - up_left)
+        paeth = np.where((distance_left <= distance_up) & (distance_left <= distance_up_left), left,
+                         np.where(distance_up <= distance_up_left, up, up_left))
+
+        # Filter types 0-4: None, Sub, Up, Average, Paeth
+        candidates = np.stack([current, current - left, current - up,
+                               current - (left + up) // 2, current - paeth]).astype(np.uint8)
+        cost = np.abs(candidates.view(np.int8)).sum(axis=2, dtype=np.int64)
+        best = cost.argmin(axis=0)
+
+        filtered = np.empty((len(values), values.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = best
+        filtered[:, 1:] = candidates[best, np.arange(len(values))]
+        return filtered
+
+    def _emit(self, data: bytes) -> None:
+        self._output += data
+        while len(self._output) >= IDAT_CHUNK_BYTES:
+            self._file.write(_chunk(b'IDAT', bytes(self._output[:IDAT_CHUNK_BYTES])))
+            del self._output[:IDAT_CHUNK_BYTES]
+
+    def close(self) -> None:
+        """Finish the image; raises ValueError if fewer rows than height were written."""
+        if self._file.closed:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Only {self.rows_written} of {self.height} rows were written")
+            self._emit(self._packer.flush())
+            if self._output:
+                self._file.write(_chunk(b'IDAT', bytes(self._output)))
+            self._file.write(_chunk(b'IEND', b''))
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
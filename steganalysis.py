@@ -1,14 +1,234 @@
 """
 Steganalysis Module
-Implements Chi-Square statistical attack to detect hidden messages
+Implements Chi-Square statistical attacks to detect hidden messages
 """
 
+import hashlib
+import math
+import os
+from statistics import NormalDist
+
 import numpy as np
 from PIL import Image
-from scipy.stats import chisquare
+
+from utils import load_rgb_array, ArrayLRUCache
+from analysis_results import ChiSquareResult, ComparisonResult, COMPARISON_BANDS
+
+
+# Default memory budget for decoded images shared by all analysis functions
+DEFAULT_IMAGE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Decoded RGB arrays, keyed by (path, mtime, size) or by content hash
+_image_cache = ArrayLRUCache(DEFAULT_IMAGE_CACHE_BYTES)
+
+
+# Channel name -> (histogram rows, display name)
+CHANNELS = {
+    'red': ([0], "Red"),
+    'green': ([1], "Green"),
+    'blue': ([2], "Blue"),
+    'all': ([0, 1, 2], "All (RGB)"),
+}
+
+# Pairs-of-values test: pairs with a smaller expected count are skipped
+# (the usual validity condition for the chi-square approximation)
+POV_MIN_EXPECTED = 5
+
+# RS analysis: group size (pixels along a row) and flipping mask
+RS_GROUP_SIZE = 4
+RS_MASK = (0, 1, 1, 0)
+
+# RS payload estimates below this are within the error of clean covers
+RS_DETECTION_THRESHOLD = 0.05
+
+# Pixel values per band in rs_group_counts (bounds int16 temporaries)
+RS_BAND_VALUES = 1 << 20
+
+# SPA payload estimates below this are within the error of clean covers
+SPA_DETECTION_THRESHOLD = 0.03
+
+# Tiled LSB heatmap: default (rows, columns) grid and pixels per band
+DEFAULT_HEATMAP_GRID = (16, 16)
+HEATMAP_BAND_PIXELS = 1 << 20
+
+# Sampled mode: values drawn per batch, hard cap on values drawn per image,
+# and the default confidence level of the reported intervals
+SAMPLE_BATCH = 1 << 14
+SAMPLE_MAX_VALUES = 1 << 22
+DEFAULT_SAMPLE_CONFIDENCE = 0.95
+
+# Incomplete gamma evaluation: iteration cap and relative convergence tolerance
+GAMMA_MAX_ITERATIONS = 10000
+GAMMA_EPSILON = 1e-16
+
+# 16-bit words per band in channel_histograms (bounds temporaries)
+HISTOGRAM_BAND_WORDS = 1 << 20
+
+# Below this many bytes a plain 768-bin bincount beats the word histograms
+HISTOGRAM_WORD_MIN_BYTES = 1 << 18
+
+
+def _image_cache_key(source):
+    """
+    Content address for an image source, or None if it cannot be cached.
+    
+    Paths are keyed by absolute path + modification time + size, so an edited
+    file is decoded again. Encoded bytes are keyed by their SHA-256.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        path = os.path.abspath(os.fspath(source))
+        stat = os.stat(path)
+        return ('path', path, stat.st_mtime_ns, stat.st_size)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return ('sha256', hashlib.sha256(source).hexdigest())
+    return None
+
+
+def load_image(source) -> np.ndarray:
+    """
+    Decode an image for analysis through the shared decoded-image cache.
+    
+    Every steganalysis entry point loads through here, so one "Compare Images"
+    click decodes each file once instead of once per statistic. Arrays are
+    passed through untouched; file-like objects are read into bytes and
+    cached by content hash.
+    
+    Args:
+        source: RGB uint8 array, PIL image, encoded image bytes, file-like
+                object or path
+        
+    Returns:
+        np.ndarray: RGB uint8 array (read-only when served from the cache)
+    """
+    if hasattr(source, 'read'):
+        source = source.read()
+    
+    key = _image_cache_key(source)
+    if key is None:
+        return load_rgb_array(source)
+    
+    img_array = _image_cache.get(key)
+    if img_array is None:
+        img_array = load_rgb_array(source)
+        _image_cache.put(key, img_array)
+    return img_array
+
+
+def configure_image_cache(max_bytes: int) -> None:
+    """Set the memory budget of the decoded-image cache (0 disables it)."""
+    _image_cache.resize(max_bytes)
+
+
+def image_cache_info() -> dict:
+    """Return hit/miss/eviction counters and memory usage of the image cache."""
+    return _image_cache.info()
+
+
+def clear_image_cache() -> None:
+    """Empty the decoded-image cache and reset its counters."""
+    _image_cache.clear()
+
+
+def chi_square_test(observed, expected) -> tuple:
+    """
+    Pearson chi-square goodness-of-fit test without SciPy.
+    
+    Equivalent to scipy.stats.chisquare(f_obs=observed, f_exp=expected) with
+    len(observed) - 1 degrees of freedom.
+    
+    Args:
+        observed (array-like): Observed frequencies
+        expected (array-like): Expected frequencies (all > 0)
+        
+    Returns:
+        tuple: (chi-square statistic, p-value)
+    """
+    observed = np.asarray(observed, dtype=np.float64)
+    expected = np.asarray(expected, dtype=np.float64)
+    statistic = float(np.sum((observed - expected) ** 2 / expected))
+    return statistic, chi2_sf(statistic, len(observed) - 1)
+
+
+def chi2_sf(statistic: float, dof: int) -> float:
+    """
+    Survival function (upper tail p-value) of the chi-square distribution.
+    
+    P(X >= statistic) = Q(dof / 2, statistic / 2), the regularized upper
+    incomplete gamma function. One and two degrees of freedom (the 2-bin LSB
+    test) have exact closed forms; everything else, such as the 127 degrees
+    of freedom of a pairs-of-values test, uses the series / continued
+    fraction evaluation in _regularized_gamma_q. Agrees with
+    scipy.stats.chi2.sf to better than 1e-12.
+    
+    Args:
+        statistic (float): Chi-square statistic
+        dof (int): Degrees of freedom (>= 1)
+        
+    Returns:
+        float: p-value in [0, 1]
+    """
+    if dof < 1:
+        raise ValueError("Degrees of freedom must be at least 1")
+    if statistic <= 0:
+        return 1.0
+    if dof == 1:
+        return math.erfc(math.sqrt(statistic / 2))
+    if dof == 2:
+        return math.exp(-statistic / 2)
+    return _regularized_gamma_q(dof / 2, statistic / 2)
+
+
+# Element-wise math.erfc for per-tile p-values
+_erfc = np.frompyfunc(math.erfc, 1, 1)
 
 
-def chi_square_attack(image_path: str, channel: str = 'red') -> dict:
+def _regularized_gamma_q(a: float, x: float) -> float:
+    """
+    Regularized upper incomplete gamma function Q(a, x) for a > 0, x > 0.
+    
+    Uses the power series for P(a, x) when x < a + 1 and a modified Lentz
+    continued fraction for Q(a, x) otherwise, each in the region where it
+    converges quickly and without cancellation.
+    """
+    # x^a * e^-x / Gamma(a), computed in log space to avoid overflow
+    log_prefactor = a * math.log(x) - x - math.lgamma(a)
+    
+    if x < a + 1:
+        # P(a, x) = prefactor / a * sum_n x^n / ((a+1)(a+2)...(a+n))
+        term = total = 1.0 / a
+        denominator = a
+        for _ in range(GAMMA_MAX_ITERATIONS):
+            denominator += 1
+            term *= x / denominator
+            total += term
+            if abs(term) < abs(total) * GAMMA_EPSILON:
+                break
+        return max(0.0, 1.0 - total * math.exp(log_prefactor))
+    
+    # Q(a, x) = prefactor / (x + 1 - a - 1*(1-a) / (x + 3 - a - 2*(2-a) / (x + 5 - a - ...)))
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1.0 / tiny
+    d = 1.0 / b
+    fraction = d
+    for n in range(1, GAMMA_MAX_ITERATIONS):
+        an = -n * (n - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1.0 / d
+        delta = d * c
+        fraction *= delta
+        if abs(delta - 1.0) < GAMMA_EPSILON:
+            break
+    return min(1.0, math.exp(log_prefactor) * fraction)
+
+
+def chi_square_attack(image_path: str, channel: str = 'red', sampled: bool = False,
+                      seed: int = 0, confidence: float = DEFAULT_SAMPLE_CONFIDENCE,
+                      lean: bool = False):
     """
     Perform Chi-Square statistical test on image LSBs to detect steganography.
     
@@ -29,92 +249,350 @@ def chi_square_attack(image_path: str, channel: str = 'red') -> dict:
     - Low p-value (< 0.05) = Non-random distribution detected
     - High p-value (>= 0.05) = Random-looking distribution
     
+    Sampled mode (sampled=True): LSBs are read at seeded random positions
+    in batches until the confidence interval of the 1s fraction decides the
+    full-image verdict, or SAMPLE_MAX_VALUES is reached. Counts and
+    statistics are then estimates for the whole image. The image is still
+    decoded in full (random positions touch every row, and PNG data can
+    only be inflated front to back), so for a path this saves the counting
+    but not the decode; it is fast on in-memory or cached images.
+    
+    High-volume callers should pass lean=True: the result is then a slotted
+    ChiSquareResult whose percentages, verdict and explanation text are only
+    computed when read (result['p_value'] works on both forms).
+    
     Args:
         image_path (str): Path to the image to analyze
         channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        sampled (bool): Estimate from a random sample instead of every pixel
+        seed (int): Sampling seed (same seed, same positions)
+        confidence (float): Confidence level of the sampled intervals
+        lean (bool): Return a ChiSquareResult instead of a dict
         
     Returns:
-        dict: Analysis results including chi-square statistic, p-value, and verdict
+        dict: Analysis results including chi-square statistic, p-value, and verdict;
+              sampled results add 'samples_used', 'verdict_decided' and intervals
     """
-    # Load image and convert to RGB
-    img = Image.open(image_path).convert("RGB")
-    img_array = np.array(img)
+    return chi_square_attack_array(image_path, channel, sampled, seed, confidence, lean)
+
+
+def chi_square_attack_array(image, channel: str = 'red', sampled: bool = False,
+                            seed: int = 0, confidence: float = DEFAULT_SAMPLE_CONFIDENCE,
+                            lean: bool = False):
+    """
+    Chi-Square LSB test on an in-memory image (see chi_square_attack).
     
-    # Select channel to analyze
-    if channel.lower() == 'red':
-        channel_data = img_array[:, :, 0].flatten()
-        channel_name = "Red"
-    elif channel.lower() == 'green':
-        channel_data = img_array[:, :, 1].flatten()
-        channel_name = "Green"
-    elif channel.lower() == 'blue':
-        channel_data = img_array[:, :, 2].flatten()
-        channel_name = "Blue"
-    elif channel.lower() == 'all':
-        # Analyze all channels combined
-        channel_data = img_array.flatten()
-        channel_name = "All (RGB)"
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path (anything utils.load_rgb_array accepts)
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        sampled (bool): Estimate from a random sample instead of every pixel
+        seed (int): Sampling seed
+        confidence (float): Confidence level of the sampled intervals
+        lean (bool): Return a ChiSquareResult instead of a dict
+        
+    Returns:
+        dict: Analysis results including chi-square statistic, p-value, and verdict
+    """
+    if sampled:
+        result = _sampled_chi_square(image, channel, seed, confidence)
     else:
-        raise ValueError("Channel must be 'red', 'green', 'blue', or 'all'")
+        result = chi_square_from_histograms(channel_histograms(image), channel, lean=True)
+    return result if lean else result.to_dict()
+
+
+def _sampled_chi_square(image, channel: str, seed: int, confidence: float) -> ChiSquareResult:
+    """
+    Sampled Chi-Square LSB test (see chi_square_attack, sampled=True).
+    
+    The full-image verdict is NON-RANDOM exactly when the 1s fraction q
+    satisfies |q - 0.5| > margin, with margin = sqrt(crit / N) / 2 for the
+    chi-square critical value crit at alpha = 0.05 and N values. Sampling
+    stops as soon as the Wilson interval for q lies entirely outside or
+    entirely inside [0.5 - margin, 0.5 + margin]. Images with no more than
+    SAMPLE_MAX_VALUES values in the channel are counted exactly instead:
+    a sample could grow as large as the image.
+    """
+    rows, channel_name = _channel_rows(channel)
+    img_array = load_image(image)
+    total = img_array.shape[0] * img_array.shape[1] * len(rows)
+    z = _z_score(confidence)
+    
+    if total <= SAMPLE_MAX_VALUES:
+        result = chi_square_from_histograms(channel_histograms(img_array), channel, lean=True)
+        exact = result.lsb_1_count / total
+        result.sampling = _sampling_fields(total, True, confidence, exact, exact)
+        return result
+    
+    margin = math.sqrt(_z_score(0.95) ** 2 / total) / 2
+    ones = samples = 0
+    decided = False
+    for (lsbs,) in _sample_lsb_batches((img_array,), rows, seed, SAMPLE_MAX_VALUES):
+        ones += int(np.count_nonzero(lsbs))
+        samples += len(lsbs)
+        low, high = _wilson_interval(ones, samples, z)
+        if low > 0.5 + margin or high < 0.5 - margin or (low >= 0.5 - margin and high <= 0.5 + margin):
+            decided = True
+            break
+    
+    # Scale the sample to estimated full-image counts; an undecided
+    # result reports "Low" detection confidence
+    count_1 = int(round(ones / samples * total))
+    return _chi_square_result(total - count_1, count_1, channel_name,
+                              _sampling_fields(samples, decided, confidence, low, high))
+
+
+def _sample_lsb_batches(images: tuple, rows: list, seed: int, limit: int):
+    """
+    Yield LSB batches read at the same seeded random (pixel, channel)
+    positions from each image, until limit values are drawn (never more
+    than the channel values in the image).
+    """
+    height, width, _ = images[0].shape
+    flats = [img.reshape(-1) for img in images]
+    channels = np.asarray(rows, dtype=np.intp)
+    rng = np.random.default_rng(seed)
+    limit = min(limit, height * width * len(channels))
+    
+    for drawn in range(0, limit, SAMPLE_BATCH):
+        size = min(SAMPLE_BATCH, limit - drawn)
+        positions = rng.integers(0, height * width, size=size) * 3
+        if len(channels) > 1:
+            positions += channels[rng.integers(0, len(channels), size=size)]
+        else:
+            positions += channels[0]
+        yield tuple(flat[positions] & 1 for flat in flats)
+
+
+def _z_score(confidence: float) -> float:
+    """Two-sided standard normal quantile for a confidence level."""
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+    return NormalDist().inv_cdf((1 + confidence) / 2)
+
+
+def _wilson_interval(successes: int, trials: int, z: float) -> tuple:
+    """Wilson score interval for a binomial proportion."""
+    proportion = successes / trials
+    denominator = 1 + z * z / trials
+    center = (proportion + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(proportion * (1 - proportion) / trials
+                               + z * z / (4 * trials * trials)) / denominator
+    return center - half_width, center + half_width
+
+
+def _sampling_fields(samples: int, decided: bool, confidence: float,
+                     low: float, high: float) -> dict:
+    """Common keys added to sampled results."""
+    deviations = (abs(low - 0.5) * 100, abs(high - 0.5) * 100)
+    return {
+        'sampled': True,
+        'samples_used': samples,
+        'verdict_decided': decided,
+        'confidence_level': confidence,
+        'lsb_1_percent_interval': (low * 100, high * 100),
+        'deviation_interval': (0.0 if low <= 0.5 <= high else min(deviations), max(deviations)),
+    }
+
+
+def channel_histograms(image) -> np.ndarray:
+    """
+    Compute the 256-bin value histogram of every color channel in one pass.
     
-    # Extract LSBs (least significant bits)
-    lsbs = channel_data & 1  # Bitwise AND with 1 extracts the LSB
+    This is the shared statistics kernel: LSB counts, chi-square statistics
+    (per channel and all channels) and pairs-of-values statistics are all
+    derived from these 3 x 256 counts instead of re-scanning the pixels for
+    every test and every channel.
     
-    # Count 0s and 1s
-    count_0 = np.sum(lsbs == 0)
-    count_1 = np.sum(lsbs == 1)
+    To halve the number of elements np.bincount has to visit, adjacent bytes
+    are read as one 16-bit word. Three words hold exactly two RGB pixels, so
+    word column 0 always pairs (R, G), column 1 (B, R) and column 2 (G, B).
+    Each column gets a 65536-bin joint histogram, whose row and column sums
+    are the per-channel histograms. The image is processed in bands to keep
+    temporaries small.
     
-    observed_freq = np.array([count_0, count_1])
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        
+    Returns:
+        np.ndarray: (3, 256) int64 counts; row 0 = red, 1 = green, 2 = blue
+    """
+    return _flat_histograms(np.ascontiguousarray(load_image(image)).reshape(-1))
+
+
+def _flat_histograms(flat: np.ndarray) -> np.ndarray:
+    """
+    (3, 256) channel histograms of a flat RGB byte sequence starting at a red byte.
+    """
+    if flat.size < HISTOGRAM_WORD_MIN_BYTES:
+        # Too small to amortize the 65536-bin word histograms
+        channels = np.arange(flat.size, dtype=np.intp) % 3
+        return np.bincount(channels * 256 + flat, minlength=768).reshape(3, 256)
     
-    # Expected frequencies for a perfectly random distribution (50/50)
-    total = len(lsbs)
-    expected_freq = np.array([total / 2, total / 2])
+    usable = flat.size - flat.size % 6
+    words = flat[:usable].view('<u2').reshape(-1, 3)
+    pair_counts = np.zeros((3, 65536), dtype=np.int64)
+    for start in range(0, len(words), HISTOGRAM_BAND_WORDS):
+        band = words[start:start + HISTOGRAM_BAND_WORDS]
+        for column in range(3):
+            pair_counts[column] += np.bincount(band[:, column], minlength=65536)
+    
+    # joint[column, second byte, first byte] (little-endian words)
+    joint = pair_counts.reshape(3, 256, 256)
+    histograms = np.empty((3, 256), dtype=np.int64)
+    histograms[0] = joint[0].sum(axis=0) + joint[1].sum(axis=1)
+    histograms[1] = joint[0].sum(axis=1) + joint[2].sum(axis=0)
+    histograms[2] = joint[1].sum(axis=0) + joint[2].sum(axis=1)
+    
+    # An odd pixel count leaves one pixel outside the word view
+    for channel, value in enumerate(flat[usable:]):
+        histograms[channel, value] += 1
+    
+    return histograms
+
+
+def chi_square_from_histograms(histograms: np.ndarray, channel: str = 'red',
+                               lean: bool = False):
+    """
+    Chi-Square LSB test computed from channel histograms (see chi_square_attack).
+    
+    Args:
+        histograms (np.ndarray): (3, 256) counts from channel_histograms
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        lean (bool): Return a ChiSquareResult instead of a dict
+        
+    Returns:
+        dict: Analysis results including chi-square statistic, p-value, and verdict
+    """
+    # Select channel to analyze
+    rows, channel_name = _channel_rows(channel)
+    histogram = histograms[rows].reshape(-1, 256).sum(axis=0)
+    
+    # LSB counts: even values have LSB 0, odd values have LSB 1
+    result = _chi_square_result(histogram[0::2].sum(), histogram[1::2].sum(), channel_name)
+    return result if lean else result.to_dict()
+
+
+def _channel_rows(channel: str) -> tuple:
+    """Histogram rows and display name for a channel name."""
+    channel_key = channel.lower()
+    if channel_key not in CHANNELS:
+        raise ValueError("Channel must be 'red', 'green', 'blue', or 'all'")
+    return CHANNELS[channel_key]
+
+
+def _chi_square_result(count_0: int, count_1: int, channel_name: str,
+                       sampling: dict = None) -> ChiSquareResult:
+    """
+    Chi-Square LSB result from the 0/1 LSB counts.
+    
+    Same statistic as chi_square_test against a 50/50 expectation, written
+    out for the 2-bin case so that no arrays are built per result.
+    """
+    count_0, count_1 = int(count_0), int(count_1)
+    half = (count_0 + count_1) / 2
     
-    # Perform Chi-Square test
     # chi2_stat measures the magnitude of difference
     # p_value tells us the probability of seeing this difference by chance
-    chi2_stat, p_value = chisquare(f_obs=observed_freq, f_exp=expected_freq)
+    chi2_stat = (count_0 - half) ** 2 / half + (count_1 - half) ** 2 / half
+    p_value = chi2_sf(chi2_stat, 1)
+    return ChiSquareResult(channel_name, count_0, count_1, chi2_stat, p_value, sampling)
+
+
+def pairs_of_values_attack(image_path: str, channel: str = 'red') -> dict:
+    """
+    Westfeld-Pfitzmann pairs-of-values (PoV) Chi-Square attack.
+    
+    LSB replacement with random message bits equalizes the counts of each
+    pair of values (2k, 2k+1), because it only ever moves a pixel within its
+    pair. Natural images have unequal pairs. The test compares every even
+    bin with the mean of its pair:
+    
+        chi2 = sum_k (h[2k] - e_k)^2 / e_k,   e_k = (h[2k] + h[2k+1]) / 2
+    
+    with (pairs used - 1) degrees of freedom. Unlike chi_square_attack, a
+    HIGH p-value here indicates embedding: the pairs are "too equal".
+    Fully embedded covers score p close to 1; clean covers score near 0.
+    The test is most sensitive to dense (high-capacity) embedding.
+    
+    Args:
+        image_path (str): Path to image to analyze
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Analysis results with the same keys as chi_square_attack,
+              plus 'degrees_of_freedom'
+    """
+    return pairs_of_values_attack_array(image_path, channel)
+
+
+def pairs_of_values_attack_array(image, channel: str = 'red') -> dict:
+    """
+    Pairs-of-values attack on an in-memory image (see pairs_of_values_attack).
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Analysis results including chi-square statistic, p-value, and verdict
+    """
+    return pairs_of_values_from_histograms(channel_histograms(image), channel)
+
+
+def pairs_of_values_from_histograms(histograms: np.ndarray, channel: str = 'red') -> dict:
+    """
+    Pairs-of-values test computed from channel histograms (see pairs_of_values_attack).
+    
+    Args:
+        histograms (np.ndarray): (3, 256) counts from channel_histograms
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Analysis results including chi-square statistic, p-value, and verdict
+    """
+    rows, channel_name = _channel_rows(channel)
+    histogram = histograms[rows].reshape(-1, 256).sum(axis=0)
+    
+    chi2_stat, p_value, dof = _pairs_of_values_statistic(histogram)
     
-    # Calculate percentage deviation from perfect 50/50
-    expected_percent = 50.0
+    count_0 = int(histogram[0::2].sum())
+    count_1 = int(histogram[1::2].sum())
+    total = count_0 + count_1
     actual_percent_0 = (count_0 / total) * 100
     actual_percent_1 = (count_1 / total) * 100
-    deviation = abs(actual_percent_0 - expected_percent)
+    deviation = abs(actual_percent_0 - 50.0)
     
-    # Determine verdict with proper terminology
-    # Standard threshold: p < 0.05 means "statistically significant difference"
+    # Embedding is flagged when the pairs are equal beyond chance
     alpha = 0.05
-    if p_value < alpha:
-        verdict = "NON-RANDOM LSB DISTRIBUTION"
-        confidence = "High"
+    if p_value > 1 - alpha:
+        verdict = "LSB EMBEDDING DETECTED"
+        confidence = "High" if p_value > 0.99 else "Medium"
         explanation = (
-            f"LSB distribution deviates {deviation:.2f}% from perfect randomness (50/50). "
-            f"Current distribution: {actual_percent_0:.2f}% zeros / {actual_percent_1:.2f}% ones. "
-            "\n\nWARNING: This result is NORMAL for natural photographs. "
-            "Real photos almost always have biased LSB distributions due to camera sensors, "
-            "compression artifacts, and scene characteristics. "
-            "\n\nNOTE: This test CANNOT determine if a hidden message exists. "
-            "\nNote: To properly evaluate DP-steganography, use the 'Compare Images' feature "
-            "to analyze how much the distribution changed from original to stego image."
+            f"Value pairs (2k, 2k+1) are equalized across {dof + 1} populated pairs "
+            f"(p = {p_value:.4f}). "
+            "\n\nThis is the signature of LSB replacement with random message bits: "
+            "embedding moves pixels only within their pair and evens out the pair counts. "
+            "Natural images rarely show this."
         )
     else:
-        verdict = "RANDOM-LOOKING LSB DISTRIBUTION"
-        confidence = "Low" if p_value < 0.2 else "Very Low"
+        verdict = "NO PAIRS-OF-VALUES EVIDENCE"
+        confidence = "Low" if p_value > 0.5 else "Very Low"
         explanation = (
-            f"LSB distribution is close to random (50/50), with only {deviation:.2f}% deviation. "
-            f"Current distribution: {actual_percent_0:.2f}% zeros / {actual_percent_1:.2f}% ones. "
-            "\n\nIMPORTANT: This result is RARE for natural photographs. "
-            "This suggests either: (1) synthetic/noise image, (2) previous randomization, "
-            "or (3) extremely uniform scene. "
-            "\n\nNOTE: This test STILL CANNOT determine if a message exists. "
-            "\nNote: Use 'Compare Images' for proper steganographic analysis."
+            f"Value pairs (2k, 2k+1) keep their natural imbalance across {max(dof + 1, 0)} "
+            f"populated pairs (p = {p_value:.4f}). "
+            "\n\nNo full-capacity LSB replacement is visible. "
+            "\nNote: Sparse embedding (a small fraction of pixels, as in DP-steganography) "
+            "can stay below this test's sensitivity; use 'Compare Images' for that case."
         )
     
     return {
         'channel': channel_name,
         'total_pixels': total,
-        'lsb_0_count': int(count_0),
-        'lsb_1_count': int(count_1),
+        'lsb_0_count': count_0,
+        'lsb_1_count': count_1,
         'lsb_0_percent': actual_percent_0,
         'lsb_1_percent': actual_percent_1,
         'deviation_from_50_50': deviation,
@@ -123,11 +601,623 @@ def chi_square_attack(image_path: str, channel: str = 'red') -> dict:
         'verdict': verdict,
         'detection_confidence': confidence,
         'explanation': explanation,
+        'threshold_alpha': alpha,
+        'degrees_of_freedom': max(dof, 0)
+    }
+
+
+def _pairs_of_values_statistic(histogram: np.ndarray) -> tuple:
+    """
+    Pairs-of-values chi-square of one 256-bin histogram.
+    
+    Returns:
+        tuple: (chi-square statistic, p-value, degrees of freedom); a
+               histogram with fewer than two populated pairs gives (0, 0, -1)
+    """
+    even = histogram[0::2].astype(np.float64)
+    odd = histogram[1::2].astype(np.float64)
+    expected = (even + odd) / 2
+    
+    # Only pairs with enough samples contribute
+    used = expected >= POV_MIN_EXPECTED
+    dof = int(np.count_nonzero(used)) - 1
+    
+    if dof < 1:
+        # Too few populated pairs (e.g. a flat image): no evidence either way
+        return 0.0, 0.0, dof
+    chi2_stat, p_value = chi_square_test(even[used], expected[used])
+    return chi2_stat, p_value, dof
+
+
+def progressive_pairs_of_values_attack(image_path: str, channel: str = 'all',
+                                       points: int = 100) -> dict:
+    """
+    Progressive pairs-of-values attack: the p-value as a function of how much
+    of the image has been scanned, in raster order.
+    
+    Sequential embedders (embed_standard_lsb) fill the first pixels of the
+    image. Their signature is a curve that stays near p = 1 while the scan
+    is inside the message and collapses to 0 once it reaches untouched
+    pixels, so the knee estimates the message length. Random-path
+    embedding spreads the changes and gives no knee.
+    
+    The image is split into `points` blocks and each block is histogrammed
+    once. Prefix sums of the block histograms give the histogram of every
+    scanned prefix, so the whole curve costs about one full-image histogram
+    rather than `points` separate tests.
+    
+    Args:
+        image_path (str): Path to image to analyze
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        points (int): Number of sample points on the curve
+        
+    Returns:
+        dict: Curve ('fractions', 'pixels_scanned', 'p_values',
+              'chi_square_statistics') plus verdict and estimated embedding fraction
+    """
+    return progressive_pairs_of_values_attack_array(image_path, channel, points)
+
+
+def progressive_pairs_of_values_attack_array(image, channel: str = 'all',
+                                             points: int = 100) -> dict:
+    """
+    Progressive pairs-of-values attack on an in-memory image (see
+    progressive_pairs_of_values_attack).
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        points (int): Number of sample points on the curve
+        
+    Returns:
+        dict: Curve, verdict and estimated embedding fraction
+    """
+    rows, channel_name = _channel_rows(channel)
+    if points < 1:
+        raise ValueError("points must be at least 1")
+    
+    flat = np.ascontiguousarray(load_image(image)).reshape(-1)
+    total_pixels = flat.size // 3
+    points = min(points, total_pixels)
+    
+    # Block ends in pixels; interior ends are kept even so every block
+    # starts on a 16-bit word boundary for the histogram kernel
+    ends = np.arange(1, points + 1, dtype=np.int64) * total_pixels // points
+    ends[:-1] &= ~1
+    
+    block_histograms = np.empty((points, 3, 256), dtype=np.int64)
+    start = 0
+    for block, end in enumerate(ends):
+        block_histograms[block] = _flat_histograms(flat[start * 3:end * 3])
+        start = end
+    
+    # Prefix sums: histogram of everything scanned up to each block end
+    prefix_histograms = np.cumsum(block_histograms[:, rows, :].sum(axis=1), axis=0)
+    
+    chi_square_statistics = []
+    p_values = []
+    for histogram in prefix_histograms:
+        chi2_stat, p_value, _ = _pairs_of_values_statistic(histogram)
+        chi_square_statistics.append(chi2_stat)
+        p_values.append(p_value)
+    
+    # Leading run of sample points that look embedded
+    alpha = 0.05
+    flagged = np.asarray(p_values) > 1 - alpha
+    leading = len(flagged) if flagged.all() else int(np.argmin(flagged))
+    estimated_fraction = float(ends[leading - 1] / total_pixels) if leading else 0.0
+    
+    if leading:
+        verdict = "SEQUENTIAL LSB EMBEDDING DETECTED"
+        explanation = (
+            f"The p-value stays above {1 - alpha:.2f} for the first "
+            f"{estimated_fraction * 100:.1f}% of the image and drops afterwards. "
+            "\n\nThis is the signature of a message written in raster order "
+            "(e.g. standard LSB); the knee estimates its length."
+        )
+    else:
+        verdict = "NO SEQUENTIAL EMBEDDING EVIDENCE"
+        explanation = (
+            "The p-value never rises above the detection threshold at the start "
+            "of the scan. No message is written in raster order. "
+            "\nNote: Random-path embedding (as in DP-steganography) does not "
+            "produce a knee; use 'Compare Images' for that case."
+        )
+    
+    return {
+        'channel': channel_name,
+        'total_pixels': total_pixels,
+        'points': points,
+        'pixels_scanned': ends.tolist(),
+        'fractions': (ends / total_pixels).tolist(),
+        'p_values': p_values,
+        'chi_square_statistics': chi_square_statistics,
+        'estimated_embedding_fraction': estimated_fraction,
+        'verdict': verdict,
+        'explanation': explanation,
         'threshold_alpha': alpha
     }
 
 
-def compare_images(original_path: str, stego_path: str) -> dict:
+def rs_analysis(image_path: str, channel: str = 'all') -> dict:
+    """
+    RS (Regular/Singular groups) steganalysis: estimate the embedded payload.
+    
+    Fridrich, Goljan and Du (2001). Pixels are split into groups of
+    RS_GROUP_SIZE horizontal neighbours per channel. A group's smoothness
+    f(G) = sum |x[i+1] - x[i]| is compared before and after flipping the
+    masked pixels with F1 (2k <-> 2k+1, i.e. LSB flip) and with the shifted
+    flip F-1 (2k-1 <-> 2k). A group is regular if flipping makes it noisier
+    and singular if it makes it smoother.
+    
+    In a clean image F1 and F-1 behave alike (R_M ~ R_-M, S_M ~ S_-M).
+    Random LSB embedding pulls R_M and S_M together while R_-M and S_-M
+    move apart. Measuring the counts on the image and on its fully
+    LSB-flipped version gives a quadratic whose root estimates p, the
+    fraction of channel values carrying embedded (random) bits.
+    
+    Unlike the 50/50 test this gives a number: for embed() it estimates
+    the share of capacity touched by message plus decoys.
+    
+    Args:
+        image_path (str): Path to image to analyze
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Estimated payload fraction, R/S group fractions, and verdict
+    """
+    return rs_analysis_array(image_path, channel)
+
+
+def rs_analysis_array(image, channel: str = 'all') -> dict:
+    """
+    RS analysis of an in-memory image (see rs_analysis).
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Estimated payload fraction, R/S group fractions, and verdict
+    """
+    return rs_from_counts(*rs_group_counts(image), channel=channel)
+
+
+def rs_group_counts(image) -> tuple:
+    """
+    Count regular and singular groups per channel, for the image and its
+    LSB-flipped version, in one banded pass.
+    
+    Groups are formed by strided views (every RS_GROUP_SIZE-th pixel of a
+    row is one group position), so all discrimination functions are
+    whole-array operations over every group at once.
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        
+    Returns:
+        tuple: (counts, groups_per_channel) where counts is a (3, 8) int64
+               array of [R_M, S_M, R_-M, S_-M] for the image followed by the
+               same four for the flipped image
+    """
+    img_array = load_image(image)
+    height, width, _ = img_array.shape
+    group_width = (width // RS_GROUP_SIZE) * RS_GROUP_SIZE
+    if group_width == 0:
+        raise ValueError(f"Image must be at least {RS_GROUP_SIZE} pixels wide for RS analysis")
+    
+    counts = np.zeros((3, 8), dtype=np.int64)
+    band_rows = max(1, RS_BAND_VALUES // (group_width * 3))
+    for start in range(0, height, band_rows):
+        band = img_array[start:start + band_rows, :group_width]
+        # positions[i] holds pixel i of every group: (rows, groups, 3) int16
+        positions = [band[:, i::RS_GROUP_SIZE].astype(np.int16) for i in range(RS_GROUP_SIZE)]
+        counts[:, :4] += _rs_counts(positions)
+        counts[:, 4:] += _rs_counts([values ^ 1 for values in positions])
+    
+    return counts, height * (group_width // RS_GROUP_SIZE)
+
+
+def _rs_counts(positions: list) -> np.ndarray:
+    """
+    [R_M, S_M, R_-M, S_-M] per channel for groups given as one int16
+    (rows, groups, 3) array per group position.
+    """
+    base = _rs_smoothness(positions)
+    
+    counts = np.empty((3, 4), dtype=np.int64)
+    for column, flip in enumerate((_flip_positive, _flip_negative)):
+        flipped = [flip(values) if masked else values
+                   for values, masked in zip(positions, RS_MASK)]
+        smoothness = _rs_smoothness(flipped)
+        counts[:, 2 * column] = np.count_nonzero(smoothness > base, axis=(0, 1))
+        counts[:, 2 * column + 1] = np.count_nonzero(smoothness < base, axis=(0, 1))
+    return counts
+
+
+def _rs_smoothness(positions: list) -> np.ndarray:
+    """Discrimination function f(G) = sum |x[i+1] - x[i]| over the group positions."""
+    total = np.abs(positions[1] - positions[0])
+    for left, right in zip(positions[1:-1], positions[2:]):
+        total += np.abs(right - left)
+    return total
+
+
+def _flip_positive(values: np.ndarray) -> np.ndarray:
+    """F1: 2k <-> 2k+1 (LSB flip)."""
+    return values ^ 1
+
+
+def _flip_negative(values: np.ndarray) -> np.ndarray:
+    """F-1: 2k-1 <-> 2k (may leave [0, 255] at the ends; only used in f)."""
+    return ((values + 1) ^ 1) - 1
+
+
+def rs_from_counts(counts: np.ndarray, groups_per_channel: int, channel: str = 'all') -> dict:
+    """
+    RS payload estimate from group counts (see rs_analysis).
+    
+    Args:
+        counts (np.ndarray): (3, 8) counts from rs_group_counts
+        groups_per_channel (int): Number of groups in each channel
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Estimated payload fraction, R/S group fractions, and verdict
+    """
+    rows, channel_name = _channel_rows(channel)
+    total_groups = groups_per_channel * len(rows)
+    
+    r_m, s_m, r_neg, s_neg, r_m_flip, s_m_flip, r_neg_flip, s_neg_flip = (
+        counts[rows].sum(axis=0) / total_groups)
+    
+    # d0, d-0 at the image; d1, d-1 at the fully flipped image
+    d0 = r_m - s_m
+    d1 = r_m_flip - s_m_flip
+    d_neg0 = r_neg - s_neg
+    d_neg1 = r_neg_flip - s_neg_flip
+    
+    # 2(d1 + d0) z^2 + (d-0 - d-1 - d1 - 3 d0) z + (d0 - d-0) = 0
+    a = 2 * (d1 + d0)
+    b = d_neg0 - d_neg1 - d1 - 3 * d0
+    c = d0 - d_neg0
+    if abs(a) < 1e-12:
+        roots = [-c / b] if abs(b) > 1e-12 else []
+    else:
+        # A slightly negative discriminant is sampling noise (it happens near
+        # full embedding); the vertex is then the closest real solution
+        sqrt_disc = math.sqrt(max(b * b - 4 * a * c, 0.0))
+        roots = [(-b + sqrt_disc) / (2 * a), (-b - sqrt_disc) / (2 * a)]
+    
+    # The root with the smaller magnitude is the consistent one
+    if roots:
+        z = min(roots, key=abs)
+        payload = z / (z - 0.5) if z != 0.5 else 1.0
+    else:
+        payload = 0.0
+    payload = float(min(max(payload, 0.0), 1.0))
+    
+    if payload > RS_DETECTION_THRESHOLD:
+        verdict = "LSB EMBEDDING DETECTED"
+        confidence = "High" if payload > 2 * RS_DETECTION_THRESHOLD else "Medium"
+        explanation = (
+            f"RS analysis estimates that {payload * 100:.1f}% of the {channel_name} "
+            "channel values carry embedded bits. "
+            f"\n\nR_M = {r_m:.4f}, S_M = {s_m:.4f} vs R_-M = {r_neg:.4f}, S_-M = {s_neg:.4f}: "
+            "the LSB flip and the shifted flip no longer behave alike, which is the "
+            "signature of LSB replacement."
+        )
+    else:
+        verdict = "NO SIGNIFICANT PAYLOAD"
+        confidence = "Low"
+        explanation = (
+            f"RS analysis estimates a payload of {payload * 100:.1f}%, within the "
+            f"{RS_DETECTION_THRESHOLD * 100:.0f}% error typical of clean covers. "
+            "\nNote: Very small payloads (a few hundred bits) are below RS resolution."
+        )
+    
+    return {
+        'channel': channel_name,
+        'total_groups': int(total_groups),
+        'estimated_payload': payload,
+        'estimated_payload_percent': payload * 100,
+        'estimated_modified_values': int(round(payload / 2 * total_groups * RS_GROUP_SIZE)),
+        'regular_m': float(r_m),
+        'singular_m': float(s_m),
+        'regular_neg_m': float(r_neg),
+        'singular_neg_m': float(s_neg),
+        'regular_m_flipped': float(r_m_flip),
+        'singular_m_flipped': float(s_m_flip),
+        'regular_neg_m_flipped': float(r_neg_flip),
+        'singular_neg_m_flipped': float(s_neg_flip),
+        'verdict': verdict,
+        'detection_confidence': confidence,
+        'explanation': explanation,
+        'threshold': RS_DETECTION_THRESHOLD
+    }
+
+
+def sample_pairs_analysis(image_path: str, channel: str = 'all') -> dict:
+    """
+    Sample Pairs Analysis (SPA): estimate the embedded payload.
+    
+    Dumitrescu, Wu and Wang (2003). Every horizontally and vertically
+    adjacent pair of values (u, v) in a channel is classified:
+    
+        X: v even and u < v, or v odd and u > v
+        Y: v even and u > v, or v odd and u < v
+        Z: u == v
+        W: u != v but u // 2 == v // 2 (same LSB pair)
+    
+    In natural images X ~ Y. LSB replacement at rate p moves pairs between
+    these trace sets in a known way, which gives
+    
+        0.5 (W + Z) p^2 + (2X - P) p + (Y - X) = 0
+    
+    with P the number of pairs; the smaller root estimates p, the fraction
+    of channel values carrying embedded bits. SPA is far more sensitive than
+    the 0/1 ratio test and is accurate down to a few percent of capacity.
+    
+    Args:
+        image_path (str): Path to image to analyze
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Estimated payload fraction, trace-set counts, and verdict
+    """
+    return sample_pairs_analysis_array(image_path, channel)
+
+
+def sample_pairs_analysis_array(image, channel: str = 'all') -> dict:
+    """
+    Sample Pairs Analysis of an in-memory image (see sample_pairs_analysis).
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Estimated payload fraction, trace-set counts, and verdict
+    """
+    return spa_from_counts(spa_pair_counts(image), channel)
+
+
+def spa_pair_counts(image) -> np.ndarray:
+    """
+    Count SPA trace sets per channel over horizontal and vertical neighbours.
+    
+    Each direction is one pass of shifted-slice comparisons on a uint8
+    channel plane (no widening), e.g. plane[:, :-1] against plane[:, 1:].
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        
+    Returns:
+        np.ndarray: (3, 4) int64 counts of [P, X, Z, K] per channel, where
+                    P = pairs, K = W + Z (pairs with u // 2 == v // 2)
+    """
+    img_array = load_image(image)
+    counts = np.zeros((3, 4), dtype=np.int64)
+    for channel in range(3):
+        # A contiguous plane lets count_nonzero take its fast flat path
+        plane = np.ascontiguousarray(img_array[:, :, channel])
+        for first, second in ((plane[:, :-1], plane[:, 1:]), (plane[:-1], plane[1:])):
+            counts[channel] += _spa_counts(first, second)
+    return counts
+
+
+def _spa_counts(first: np.ndarray, second: np.ndarray) -> list:
+    """[P, X, Z, K] for the pairs (first, second) of one channel plane."""
+    equal = first == second
+    # For u != v, X means (u < v) exactly when v is even
+    x_pairs = np.not_equal(first < second, (second & 1).view(bool))
+    x_pairs &= ~equal
+    same_pair = (first >> 1) == (second >> 1)
+    return [first.size, np.count_nonzero(x_pairs), np.count_nonzero(equal),
+            np.count_nonzero(same_pair)]
+
+
+def spa_from_counts(counts: np.ndarray, channel: str = 'all') -> dict:
+    """
+    SPA payload estimate from trace-set counts (see sample_pairs_analysis).
+    
+    Args:
+        counts (np.ndarray): (3, 4) counts from spa_pair_counts
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Estimated payload fraction, trace-set counts, and verdict
+    """
+    rows, channel_name = _channel_rows(channel)
+    
+    total_pairs, x_count, z_count, k_count = (int(value) for value in counts[rows].sum(axis=0))
+    y_count = total_pairs - x_count - z_count
+    w_count = k_count - z_count
+    
+    # 0.5 (W + Z) p^2 + (2X - P) p + (Y - X) = 0, smaller root
+    a = 0.5 * (w_count + z_count)
+    b = 2 * x_count - total_pairs
+    c = y_count - x_count
+    if a > 0:
+        sqrt_disc = math.sqrt(max(b * b - 4 * a * c, 0.0))
+        payload = min((-b + sqrt_disc) / (2 * a), (-b - sqrt_disc) / (2 * a))
+    elif b != 0:
+        payload = -c / b
+    else:
+        payload = 0.0
+    payload = float(min(max(payload, 0.0), 1.0))
+    
+    if payload > SPA_DETECTION_THRESHOLD:
+        verdict = "LSB EMBEDDING DETECTED"
+        confidence = "High" if payload > 2 * SPA_DETECTION_THRESHOLD else "Medium"
+        explanation = (
+            f"Sample Pairs Analysis estimates that {payload * 100:.1f}% of the "
+            f"{channel_name} channel values carry embedded bits. "
+            f"\n\nTrace sets X = {x_count:,} vs Y = {y_count:,}: natural images keep "
+            "these balanced, and LSB replacement skews them in a predictable way."
+        )
+    else:
+        verdict = "NO SIGNIFICANT PAYLOAD"
+        confidence = "Low"
+        explanation = (
+            f"Sample Pairs Analysis estimates a payload of {payload * 100:.1f}%, within "
+            f"the {SPA_DETECTION_THRESHOLD * 100:.0f}% error typical of clean covers."
+        )
+    
+    return {
+        'channel': channel_name,
+        'total_pairs': total_pairs,
+        'estimated_payload': payload,
+        'estimated_payload_percent': payload * 100,
+        'x_count': x_count,
+        'y_count': y_count,
+        'z_count': z_count,
+        'w_count': w_count,
+        'verdict': verdict,
+        'detection_confidence': confidence,
+        'explanation': explanation,
+        'threshold': SPA_DETECTION_THRESHOLD
+    }
+
+
+def lsb_heatmap(image_path: str, grid: tuple = DEFAULT_HEATMAP_GRID, channel: str = 'all') -> dict:
+    """
+    Tiled LSB analysis: per-tile LSB deviation and Chi-Square as 2D heatmaps.
+    
+    chi_square_attack reduces the whole image to one number, so a message
+    concentrated in one region is averaged away. Here the image is split
+    into a grid of tiles and each tile gets its own 0/1 LSB counts,
+    deviation from 50/50 and chi-square test, which localizes anomalies.
+    
+    Per-tile LSB counts are accumulated band by band with np.add.reduceat
+    over the tile boundaries, so the cost is linear in pixels whatever the
+    tile count.
+    
+    Args:
+        image_path (str): Path to image to analyze
+        grid (tuple): (rows, columns) of tiles; clipped to the image size
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: 'heatmap' (deviation %, shape grid), 'chi_square', 'p_values',
+              'lsb_1_counts', 'totals', tile edges and the most anomalous tile
+    """
+    return lsb_heatmap_array(image_path, grid, channel)
+
+
+def lsb_heatmap_array(image, grid: tuple = DEFAULT_HEATMAP_GRID, channel: str = 'all') -> dict:
+    """
+    Tiled LSB analysis of an in-memory image (see lsb_heatmap).
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        grid (tuple): (rows, columns) of tiles; clipped to the image size
+        channel (str): Which color channel to test ('red', 'green', 'blue', or 'all')
+        
+    Returns:
+        dict: Heatmaps and tile geometry
+    """
+    channel_rows, channel_name = _channel_rows(channel)
+    
+    img_array = load_image(image)
+    height, width, _ = img_array.shape
+    grid_rows, grid_cols = (int(n) for n in grid)
+    if grid_rows < 1 or grid_cols < 1:
+        raise ValueError("Grid must have at least one row and one column")
+    grid_rows = min(grid_rows, height)
+    grid_cols = min(grid_cols, width)
+    
+    # Tile edges in pixels (last edge = image size)
+    row_edges = np.arange(grid_rows + 1) * height // grid_rows
+    col_edges = np.arange(grid_cols + 1) * width // grid_cols
+    row_tile = np.repeat(np.arange(grid_rows), np.diff(row_edges))
+    
+    ones = np.zeros((grid_rows, grid_cols), dtype=np.int64)
+    band_rows = max(1, HEATMAP_BAND_PIXELS // width)
+    for start in range(0, height, band_rows):
+        band = img_array[start:start + band_rows][:, :, channel_rows]
+        # LSB ones per pixel, then summed over each tile's columns
+        pixel_ones = (band & 1).sum(axis=2, dtype=np.uint8)
+        column_sums = np.add.reduceat(pixel_ones, col_edges[:-1], axis=1, dtype=np.int64)
+        # Fold the band's rows into their tile rows
+        band_tiles = row_tile[start:start + band_rows]
+        tile_starts = np.flatnonzero(np.diff(band_tiles, prepend=-1))
+        ones[band_tiles[tile_starts]] += np.add.reduceat(column_sums, tile_starts, axis=0)
+    
+    totals = np.outer(np.diff(row_edges), np.diff(col_edges)) * len(channel_rows)
+    zeros = totals - ones
+    
+    deviation = np.abs(ones / totals - 0.5) * 100
+    chi_square = (zeros - ones) ** 2 / totals
+    # 1 degree of freedom: p = erfc(sqrt(chi2 / 2)), as in chi2_sf
+    p_values = _erfc(np.sqrt(chi_square / 2)).astype(np.float64)
+    
+    worst = np.unravel_index(int(np.argmax(deviation)), deviation.shape)
+    
+    return {
+        'channel': channel_name,
+        'grid': (grid_rows, grid_cols),
+        'row_edges': row_edges.tolist(),
+        'col_edges': col_edges.tolist(),
+        'heatmap': deviation,
+        'chi_square': chi_square,
+        'p_values': p_values,
+        'lsb_1_counts': ones,
+        'totals': totals,
+        'max_deviation': float(deviation[worst]),
+        'mean_deviation': float(deviation.mean()),
+        'most_anomalous_tile': (int(worst[0]), int(worst[1])),
+        'significant_tiles': int(np.count_nonzero(p_values < 0.05))
+    }
+
+
+def render_heatmap_overlay(image, heatmap: np.ndarray, max_size: tuple = (400, 300),
+                           opacity: float = 0.5) -> Image.Image:
+    """
+    Render a heatmap over a downscaled copy of the image.
+    
+    The image is downscaled by strided sampling (cheap even for gigapixel
+    scans), the heatmap is scaled to [0, 1] and mapped from transparent to
+    red, then blended on top.
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        heatmap (np.ndarray): 2D tile values (e.g. lsb_heatmap()['heatmap'])
+        max_size (tuple): Maximum (width, height) of the rendered overlay
+        opacity (float): Overlay opacity at the heatmap maximum (0-1)
+        
+    Returns:
+        PIL.Image.Image: RGB overlay image
+    """
+    img_array = load_image(image)
+    height, width, _ = img_array.shape
+    step = max(1, -(-width // max_size[0]), -(-height // max_size[1]))
+    preview = np.ascontiguousarray(img_array[::step, ::step]).astype(np.float32)
+    
+    heatmap = np.asarray(heatmap, dtype=np.float32)
+    span = float(heatmap.max() - heatmap.min())
+    scaled = (heatmap - heatmap.min()) / span if span > 0 else np.zeros_like(heatmap)
+    
+    # Nearest-neighbour upscale of the tile grid to the preview size
+    rows = np.arange(preview.shape[0]) * heatmap.shape[0] // preview.shape[0]
+    cols = np.arange(preview.shape[1]) * heatmap.shape[1] // preview.shape[1]
+    alpha = (scaled[rows][:, cols] * opacity)[:, :, None]
+    
+    red = np.array([255, 0, 0], dtype=np.float32)
+    blended = preview * (1 - alpha) + red * alpha
+    return Image.fromarray(np.clip(blended, 0, 255).astype(np.uint8), 'RGB')
+
+
+def compare_images(original_path: str, stego_path: str, sampled: bool = False,
+                   seed: int = 0, confidence: float = DEFAULT_SAMPLE_CONFIDENCE,
+                   lean: bool = False, cover_index=None):
     """
     Compare LSB statistics between original and stego images.
     
@@ -142,93 +1232,190 @@ def compare_images(original_path: str, stego_path: str) -> dict:
     - Small change (< 1%) = DP is working effectively
     - Large change (> 2%) = Steganography may be detectable
     
+    Sampled mode (sampled=True) reads both images at the same seeded random
+    positions and stops once the confidence interval of the deviation
+    change falls inside one effectiveness band (see COMPARISON_BANDS).
+    The images must have the same size. Both are still decoded in full
+    (see chi_square_attack), so for paths the decodes dominate.
+    
+    With lean=True the result is a ComparisonResult: the rating is derived
+    from the two Chi-Square results and the summary and interpretation
+    text are only formatted when read.
+    
+    With a cover_index (cover_index.CoverIndex) the original's statistics
+    come from the index: the cover file is hashed, not decoded, and only the
+    stego image is decoded. A cover not yet indexed is decoded once and added.
+    
     Args:
         original_path (str): Path to original cover image
         stego_path (str): Path to stego image with hidden message
+        sampled (bool): Estimate from a random sample instead of every pixel
+        seed (int): Sampling seed
+        confidence (float): Confidence level of the sampled intervals
+        lean (bool): Return a ComparisonResult instead of a dict
+        cover_index (CoverIndex): Index of cover statistics (exact mode only)
+        
+    Returns:
+        dict: Comparison results with proper DP effectiveness evaluation;
+              sampled results add a 'sampling' entry with 'samples_used'
+    """
+    return compare_images_array(original_path, stego_path, sampled, seed, confidence, lean,
+                                cover_index)
+
+
+def compare_images_array(original, stego, sampled: bool = False, seed: int = 0,
+                         confidence: float = DEFAULT_SAMPLE_CONFIDENCE, lean: bool = False,
+                         cover_index=None):
+    """
+    Compare LSB statistics between in-memory original and stego images
+    (see compare_images).
+    
+    Args:
+        original: Original cover (array, PIL image, bytes, file-like or path)
+        stego: Stego image (array, PIL image, bytes, file-like or path)
+        sampled (bool): Estimate from a random sample instead of every pixel
+        seed (int): Sampling seed
+        confidence (float): Confidence level of the sampled intervals
+        lean (bool): Return a ComparisonResult instead of a dict
+        cover_index (CoverIndex): Index of cover statistics (exact mode only)
         
     Returns:
         dict: Comparison results with proper DP effectiveness evaluation
     """
-    # Run Chi-Square test on both images
-    original_result = chi_square_attack(original_path, channel='all')
-    stego_result = chi_square_attack(stego_path, channel='all')
-    
-    # Calculate changes
-    p_value_change = stego_result['p_value'] - original_result['p_value']
-    deviation_change = abs(stego_result['deviation_from_50_50'] - original_result['deviation_from_50_50'])
-    
-    # Determine effectiveness with proper thresholds
-    if deviation_change < 0.5:
-        effectiveness = "EXCELLENT"
-        color_code = "green"
-        dp_verdict = "STEGANOGRAPHY UNDETECTABLE"
-        summary = (
-            f"Deviation changed by only {deviation_change:.3f}% - virtually undetectable! "
-            "The DP mechanism successfully masked the message embedding."
-        )
-    elif deviation_change < 1.0:
-        effectiveness = "GOOD"
-        color_code = "lightgreen"
-        dp_verdict = "STEGANOGRAPHY MOSTLY UNDETECTABLE"
-        summary = (
-            f"Deviation changed by {deviation_change:.3f}% - good concealment. "
-            "The embedding is well-hidden but not perfect."
-        )
-    elif deviation_change < 2.0:
-        effectiveness = "FAIR"
-        color_code = "yellow"
-        dp_verdict = "STEGANOGRAPHY POSSIBLY DETECTABLE"
-        summary = (
-            f"Deviation changed by {deviation_change:.3f}% - moderate risk. "
-            "The embedding caused noticeable statistical change."
-        )
+    if sampled:
+        if cover_index is not None:
+            raise ValueError("Sampled comparison reads both images; it cannot use a cover index")
+        result = ComparisonResult(*_sampled_comparison(original, stego, seed, confidence))
     else:
-        effectiveness = "POOR"
-        color_code = "red"
-        dp_verdict = "STEGANOGRAPHY DETECTABLE"
-        summary = (
-            f"Deviation changed by {deviation_change:.3f}% - high risk of detection! "
-            "Consider: longer message to use more capacity, or adjust epsilon value."
-        )
+        if cover_index is not None:
+            original_histograms = cover_index.cover_histograms(original)
+        else:
+            original_histograms = channel_histograms(original)
+        result = compare_images_from_histograms(original_histograms, stego, lean=True)
+    return result if lean else result.to_dict()
+
+
+def compare_images_from_histograms(original_histograms: np.ndarray, stego, lean: bool = False):
+    """
+    Exact comparison (see compare_images) with the original given by its
+    channel histograms, e.g. from a cover_index.CoverIndex.
     
-    # Explain why both might show "NON-RANDOM"
-    interpretation = (
-        "\n━━━ INTERPRETATION GUIDE ━━━\n\n"
-        f"Original Image: {original_result['verdict']}\n"
-        f"  └─ Deviation: {original_result['deviation_from_50_50']:.2f}% from perfect randomness\n"
-        f"  └─ This is NORMAL for natural photographs!\n\n"
-        f"Stego Image: {stego_result['verdict']}\n"
-        f"  └─ Deviation: {stego_result['deviation_from_50_50']:.2f}% from perfect randomness\n\n"
-        f"Change in Deviation: {deviation_change:.3f}%\n"
-        f"  └─ This is the KEY metric!\n"
-        f"  └─ Small change = Good DP protection\n"
-        f"  └─ Large change = Detectable steganography\n\n"
-        f"VERDICT: {dp_verdict}\n"
-        f"EFFECTIVENESS: {effectiveness}\n"
-        f"REASON: {summary}"
-    )
+    Args:
+        original_histograms (np.ndarray): (3, 256) counts of the original cover
+        stego: Stego image (array, PIL image, bytes, file-like or path)
+        lean (bool): Return a ComparisonResult instead of a dict
+        
+    Returns:
+        dict: Comparison results with proper DP effectiveness evaluation
+    """
+    # Run Chi-Square test on both images
+    result = ComparisonResult(chi_square_from_histograms(original_histograms, 'all', lean=True),
+                              chi_square_attack_array(stego, channel='all', lean=True),
+                              None)
+    return result if lean else result.to_dict()
+
+
+def _sampled_comparison(original, stego, seed: int, confidence: float) -> tuple:
+    """
+    Paired sampled comparison (see compare_images, sampled=True).
     
-    return {
-        'original': original_result,
-        'stego': stego_result,
-        'changes': {
-            'p_value_change': p_value_change,
-            'p_value_change_percent': (p_value_change / original_result['p_value']) * 100 if original_result['p_value'] > 0 else 0,
-            'deviation_change': deviation_change,
-            'original_deviation': original_result['deviation_from_50_50'],
-            'stego_deviation': stego_result['deviation_from_50_50'],
-            'detection_changed': original_result['verdict'] != stego_result['verdict'],
-        },
-        'effectiveness': {
-            'rating': effectiveness,
-            'color': color_code,
-            'verdict': dp_verdict,
-            'summary': summary,
-            'interpretation': interpretation
+    Both images are read at the same positions, so the change in the 1s
+    fraction is estimated from paired differences, whose variance is tiny
+    when few LSBs changed. Images with no more than SAMPLE_MAX_VALUES
+    values are counted exactly instead.
+    
+    Returns:
+        tuple: (original result, stego result, sampling summary)
+    """
+    original_array = load_image(original)
+    stego_array = load_image(stego)
+    if original_array.shape != stego_array.shape:
+        raise ValueError("Sampled comparison needs images of the same size")
+    
+    total = original_array.size
+    z = _z_score(confidence)
+    if total <= SAMPLE_MAX_VALUES:
+        # A sample could grow as large as the images: count exactly instead
+        original_result = chi_square_attack_array(original_array, channel='all', lean=True)
+        stego_result = chi_square_attack_array(stego_array, channel='all', lean=True)
+        exact = abs(stego_result.deviation_from_50_50 - original_result.deviation_from_50_50)
+        for result in (original_result, stego_result):
+            fraction = result.lsb_1_count / total
+            result.sampling = _sampling_fields(total, True, confidence, fraction, fraction)
+        return original_result, stego_result, {
+            'samples_used': total,
+            'verdict_decided': True,
+            'confidence_level': confidence,
+            'deviation_change_interval': (exact, exact),
         }
+    
+    ones_original = ones_stego = differences = changed = samples = 0
+    decided = False
+    for original_lsbs, stego_lsbs in _sample_lsb_batches((original_array, stego_array),
+                                                        [0, 1, 2], seed, SAMPLE_MAX_VALUES):
+        ones_original += int(np.count_nonzero(original_lsbs))
+        ones_stego += int(np.count_nonzero(stego_lsbs))
+        delta = stego_lsbs.astype(np.int8) - original_lsbs.astype(np.int8)
+        differences += int(delta.sum())
+        changed += int(np.count_nonzero(delta))
+        samples += len(delta)
+        
+        original_interval = _wilson_interval(ones_original, samples, z)
+        stego_interval = _wilson_interval(ones_stego, samples, z)
+        mean = differences / samples
+        variance = max(changed / samples - mean * mean, 0.0)
+        # Rule of three keeps the interval honest when no change was seen yet
+        half_width = max(z * math.sqrt(variance / samples), 3 / samples)
+        
+        low, high = _deviation_change_bounds(
+            (original_interval[0] - 0.5, original_interval[1] - 0.5),
+            (mean - half_width, mean + half_width))
+        if _comparison_band(low) == _comparison_band(high):
+            decided = True
+            break
+    
+    results = []
+    for ones, interval in ((ones_original, original_interval), (ones_stego, stego_interval)):
+        count_1 = int(round(ones / samples * total))
+        results.append(_chi_square_result(total - count_1, count_1, "All (RGB)",
+                                          _sampling_fields(samples, decided, confidence,
+                                                           *interval)))
+    
+    return results[0], results[1], {
+        'samples_used': samples,
+        'verdict_decided': decided,
+        'confidence_level': confidence,
+        'deviation_change_interval': (low, high),
     }
 
 
+def _deviation_change_bounds(offset: tuple, change: tuple) -> tuple:
+    """
+    Range (in %) of the deviation change ||a + d| - |a|| over a box of
+    original offsets a = q - 0.5 and paired changes d.
+    
+    The function is piecewise linear with breaks on a = 0, d = 0, a + d = 0
+    and d = -2a, so its extremes over the box lie on the box corners or
+    where those lines cross the box edges.
+    """
+    (a_low, a_high), (d_low, d_high) = offset, change
+    candidates = [(a, d) for a in (a_low, a_high) for d in (d_low, d_high)]
+    candidates += [(0.0, 0.0), (0.0, d_low), (0.0, d_high), (a_low, 0.0), (a_high, 0.0)]
+    for a in (a_low, a_high):
+        candidates += [(a, -a), (a, -2 * a)]
+    for d in (d_low, d_high):
+        candidates += [(-d, d), (-d / 2, d)]
+    
+    values = [abs(abs(a + d) - abs(a)) * 100 for a, d in candidates
+              if a_low <= a <= a_high and d_low <= d <= d_high]
+    return min(values), max(values)
+
+
+def _comparison_band(deviation_change: float) -> int:
+    """Index of the effectiveness band a deviation change (in %) falls in."""
+    return sum(deviation_change >= edge for edge in COMPARISON_BANDS)
+
+
 def multi_channel_analysis(image_path: str) -> dict:
     """
     Perform Chi-Square analysis on all color channels separately.
@@ -242,10 +1429,26 @@ def multi_channel_analysis(image_path: str) -> dict:
     Returns:
         dict: Results for each channel
     """
+    return multi_channel_analysis_array(image_path)
+
+
+def multi_channel_analysis_array(image) -> dict:
+    """
+    Per-channel Chi-Square analysis of an in-memory image (see
+    multi_channel_analysis). One histogram pass serves all three channels.
+    
+    Args:
+        image: RGB uint8 array, PIL image, encoded image bytes, file-like
+               object or path
+        
+    Returns:
+        dict: Results for each channel
+    """
+    histograms = channel_histograms(image)
     results = {}
     
     for channel in ['red', 'green', 'blue']:
-        results[channel] = chi_square_attack(image_path, channel=channel)
+        results[channel] = chi_square_from_histograms(histograms, channel=channel)
     
     # Overall verdict: DETECTED if any channel is detected
     any_detected = any(r['verdict'] == 'DETECTED' for r in results.values())
@@ -270,12 +1473,27 @@ def calculate_visual_difference(original_path: str, stego_path: str) -> dict:
         original_path (str): Path to original image
         stego_path (str): Path to stego image
         
+    Returns:
+        dict: Visual difference metrics including MSE and PSNR
+    """
+    return calculate_visual_difference_array(original_path, stego_path)
+
+
+def calculate_visual_difference_array(original, stego) -> dict:
+    """
+    Visual similarity metrics between in-memory images (see
+    calculate_visual_difference).
+    
+    Args:
+        original: Original image (array, PIL image, bytes, file-like or path)
+        stego: Stego image (array, PIL image, bytes, file-like or path)
+        
     Returns:
         dict: Visual difference metrics including MSE and PSNR
     """
     # Load images
-    orig_img = np.array(Image.open(original_path).convert("RGB"))
-    stego_img = np.array(Image.open(stego_path).convert("RGB"))
+    orig_img = load_image(original)
+    stego_img = load_image(stego)
     
     # Ensure same dimensions
     if orig_img.shape != stego_img.shape:
@@ -342,14 +1560,7 @@ def generate_random_lsb_image(width: int = 512, height: int = 512, save_path: st
     Returns:
         str: Path to the saved image (or None if not saved)
     """
-    # Set seed for reproducibility
-    if seed is None:
-        seed = 42  # Default seed for consistent results
-    
-    np.random.seed(seed)
-    
-    # Generate random noise for each RGB channel
-    random_array = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+    random_array = generate_random_lsb_array(width, height, seed)
     
     # Create image
     img = Image.fromarray(random_array, 'RGB')
@@ -364,6 +1575,29 @@ def generate_random_lsb_image(width: int = 512, height: int = 512, save_path: st
     return None
 
 
+def generate_random_lsb_array(width: int = 512, height: int = 512, seed: int = None) -> np.ndarray:
+    """
+    Generate the synthetic random-LSB test image as an array (see
+    generate_random_lsb_image), without writing it to disk.
+    
+    Args:
+        width (int): Image width in pixels
+        height (int): Image height in pixels
+        seed (int): Random seed for reproducibility (optional, default: 42)
+        
+    Returns:
+        np.ndarray: (height, width, 3) uint8 RGB array
+    """
+    # Set seed for reproducibility
+    if seed is None:
+        seed = 42  # Default seed for consistent results
+    
+    np.random.seed(seed)
+    
+    # Generate random noise for each RGB channel
+    return np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+
+
 def calculate_epsilon_visibility(message_bits: int, image_capacity: int, epsilon_low: float, epsilon_high: float) -> dict:
     """
     Calculate when epsilon differences become statistically visible.
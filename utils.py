@@ -1,10 +1,111 @@
 """
 Utility functions for DP-Enhanced Steganography
-Handles password-based seeding, bit conversions, and pixel shuffling
+Handles password-based seeding, bit conversions, pixel shuffling and image loading
 """
 
 import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
 import numpy as np
+from PIL import Image
+from png_stream import PngBandReader
+
+
+# Decoded RGB bytes per band when filling a writable array (bounds the
+# decode temporaries to a few times this)
+DECODE_BAND_BYTES = 2 * 1024 * 1024
+
+# File extensions picked up by find_images
+IMAGE_EXTENSIONS = ('.png', '.bmp', '.tif', '.tiff', '.jpg', '.jpeg', '.webp')
+
+
+def load_rgb_array(source, writable: bool = False) -> np.ndarray:
+    """
+    Decode any supported image source into a (height, width, 3) uint8 RGB array.
+    
+    Accepted sources:
+    - np.ndarray: an RGB uint8 array is returned as-is (NOT copied);
+      grayscale (H, W) and RGBA (H, W, 4) uint8 arrays are converted
+    - PIL.Image.Image: converted to RGB (removes alpha channel)
+    - bytes / bytearray / memoryview: an encoded image file (PNG, JPEG, ...)
+    - file-like object with .read(): an encoded image file
+    - str / os.PathLike: path to an image file
+    
+    By default decoded images are returned without a private copy (the array
+    may be read-only). With writable=True the result is always a new,
+    writable, C-contiguous array the caller owns: pixels are decoded straight
+    into it a band of rows at a time (streamed from the file for 8-bit
+    PNGs), so it is the only full-size copy made.
+    
+    Args:
+        source: The image to load
+        writable (bool): Return a fresh writable array (never aliases source)
+        
+    Returns:
+        np.ndarray: RGB pixel array (unless writable, callers that modify it must copy first)
+    """
+    if isinstance(source, np.ndarray):
+        if source.dtype != np.uint8:
+            raise ValueError(f"Image arrays must be uint8, got {source.dtype}")
+        if source.ndim == 3 and source.shape[2] == 3:
+            return np.array(source, order='C') if writable else source
+        if source.ndim == 2 or (source.ndim == 3 and source.shape[2] == 4):
+            return np.array(Image.fromarray(source).convert("RGB"))
+        raise ValueError(f"Unsupported image array shape {source.shape}")
+    
+    if isinstance(source, Image.Image):
+        return _rgb_array(source, writable)
+    
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    elif writable and isinstance(source, (str, os.PathLike)):
+        try:
+            reader = PngBandReader(source)
+        except ValueError:
+            pass  # Not a streamable PNG: decode with Pillow below
+        else:
+            with reader:
+                array = np.empty((reader.height, reader.width, 3), dtype=np.uint8)
+                band_rows = max(1, DECODE_BAND_BYTES // (reader.width * 3))
+                for first_row, band in reader.bands(band_rows):
+                    array[first_row:first_row + len(band)] = band
+            return array
+    
+    with Image.open(source) as img:
+        return _rgb_array(img, writable)
+
+
+def _rgb_array(img: Image.Image, writable: bool) -> np.ndarray:
+    """RGB pixels of a PIL image; see load_rgb_array for writable."""
+    if not writable:
+        # Already-RGB images are exported directly (convert() would copy them)
+        return np.asarray(img if img.mode == 'RGB' else img.convert('RGB'))
+    
+    # Copy band by band so the only full-size copy is the result itself
+    width, height = img.size
+    array = np.empty((height, width, 3), dtype=np.uint8)
+    band_rows = max(1, DECODE_BAND_BYTES // (width * 3))
+    for top in range(0, height, band_rows):
+        bottom = min(top + band_rows, height)
+        band = img.crop((0, top, width, bottom))
+        array[top:bottom] = np.asarray(band if band.mode == 'RGB' else band.convert('RGB'))
+    return array
+
+
+def find_images(root: str) -> list:
+    """All image files under root (or root itself if it is a file), sorted."""
+    if os.path.isfile(root):
+        return [os.path.abspath(root)]
+    paths = []
+    for directory, subdirectories, files in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                paths.append(os.path.abspath(os.path.join(directory, name)))
+    return paths
 
 
 def password_to_seed(password: str) -> int:
@@ -30,11 +131,69 @@ def password_to_seed(password: str) -> int:
     return seed
 
 
+def payload_to_bits(payload) -> np.ndarray:
+    """
+    Convert a message to a packed array of bits (0s and 1s), MSB first.
+    
+    Text is encoded as UTF-8, so ASCII characters are exactly 8 bits each
+    (as before) and any other character becomes a whole number of bytes.
+    Bytes-like payloads are embedded unchanged. The conversion is a single
+    np.unpackbits call - no per-bit Python objects.
+    Example: 'A' (0x41) -> [0, 1, 0, 0, 0, 0, 0, 1]
+    
+    Args:
+        payload (str or bytes-like): The message to convert
+        
+    Returns:
+        np.ndarray: uint8 array of bits, 8 per payload byte
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    return np.unpackbits(np.frombuffer(payload, dtype=np.uint8))
+
+
+def bits_to_payload(bits) -> bytes:
+    """
+    Convert an array of bits back to raw bytes (inverse of payload_to_bits).
+    
+    Bits are packed 8 at a time with np.packbits; a trailing partial byte is
+    padded with zero bits on the right.
+    
+    Args:
+        bits (array-like): Bits (0 or 1), MSB first
+        
+    Returns:
+        bytes: The decoded payload
+    """
+    return np.packbits(np.asarray(bits, dtype=np.uint8)).tobytes()
+
+
+def bits_to_text(bits) -> str:
+    """
+    Convert an array of bits back to text.
+    
+    Decodes as UTF-8. Byte sequences that are not valid UTF-8 (e.g. messages
+    embedded by older versions with characters 128-255, or a wrong password)
+    fall back to one character per byte, matching the original decoder.
+    
+    Args:
+        bits (array-like): Bits (0 or 1), MSB first
+        
+    Returns:
+        str: The decoded text message
+    """
+    data = bits_to_payload(bits)
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode('latin-1')
+
+
 def string_to_bits(text: str) -> list:
     """
     Convert a text string to a list of bits (0s and 1s).
     
-    Uses 8-bit ASCII encoding. Each character becomes 8 bits.
+    List-returning wrapper around payload_to_bits (UTF-8, 8 bits per byte).
     Example: 'A' (ASCII 65) -> [0, 1, 0, 0, 0, 0, 0, 1]
     
     Args:
@@ -43,25 +202,14 @@ def string_to_bits(text: str) -> list:
     Returns:
         list: A list of integers (0 or 1) representing the binary encoding
     """
-    bits = []
-    for char in text:
-        # Get ASCII value of character
-        ascii_val = ord(char)
-        
-        # Convert to 8-bit binary (e.g., 65 -> '01000001')
-        binary_str = format(ascii_val, '08b')
-        
-        # Add each bit as an integer
-        bits.extend([int(bit) for bit in binary_str])
-    
-    return bits
+    return payload_to_bits(text).tolist()
 
 
 def bits_to_string(bits: list) -> str:
     """
     Convert a list of bits back to a text string.
     
-    Groups bits into 8-bit chunks and converts each to an ASCII character.
+    Wrapper around bits_to_text, kept for existing callers.
     
     Args:
         bits (list): A list of integers (0 or 1) representing binary data
@@ -69,24 +217,176 @@ def bits_to_string(bits: list) -> str:
     Returns:
         str: The decoded text message
     """
-    text = ""
+    return bits_to_text(bits)
+
+
+# Pixel path formats: how the password seed is turned into the secret path.
+# The format is part of the shared secret - the receiver must use the same one.
+PATH_FORMAT_SHUFFLE = 'shuffle'   # v1 (default): full Fisher-Yates shuffle of every index
+PATH_FORMAT_FEISTEL = 'feistel'   # v2: keyed Feistel permutation, computes only the prefix
+PATH_FORMATS = (PATH_FORMAT_SHUFFLE, PATH_FORMAT_FEISTEL)
+
+# Number of Feistel rounds (4 already gives a pseudorandom permutation)
+FEISTEL_ROUNDS = 8
+
+# Default memory budget for cached full shuffles (see PermutationCache)
+DEFAULT_PERMUTATION_CACHE_BYTES = 512 * 1024 * 1024
+
+
+class ArrayLRUCache:
+    """
+    Bounded in-process LRU cache of NumPy arrays with a byte budget.
     
-    # Process bits in chunks of 8
-    for i in range(0, len(bits), 8):
-        # Get the next 8 bits
-        byte = bits[i:i+8]
-        
-        # Convert binary list to string ('01000001')
-        binary_str = ''.join(str(bit) for bit in byte)
-        
-        # Convert binary string to integer, then to character
-        ascii_val = int(binary_str, 2)
-        text += chr(ascii_val)
+    - Entries are stored read-only, so handing out views is safe
+    - When the byte budget is exceeded, least recently used entries are evicted
+    - A single array larger than the whole budget is never cached
+    - Thread-safe (the GUI embeds, extracts and analyzes on worker threads)
+    """
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: tuple):
+        """Return the cached array for key (marking it most recent), or None."""
+        with self._lock:
+            array = self._entries.get(key)
+            if array is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return array
     
-    return text
+    def put(self, key: tuple, array: np.ndarray) -> None:
+        """Store array under key, evicting old entries to stay within budget."""
+        array.flags.writeable = False
+        with self._lock:
+            if array.nbytes > self.max_bytes:
+                return
+            if key in self._entries:
+                self._current_bytes -= self._entries.pop(key).nbytes
+            self._entries[key] = array
+            self._current_bytes += array.nbytes
+            self._evict()
+    
+    def resize(self, max_bytes: int) -> None:
+        """Change the byte budget, evicting immediately if it shrank."""
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+    
+    def clear(self) -> None:
+        """Drop every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+    
+    def info(self) -> dict:
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'current_bytes': self._current_bytes,
+                'max_bytes': self.max_bytes,
+            }
+    
+    def _evict(self) -> None:
+        while self._current_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._current_bytes -= evicted.nbytes
+            self.evictions += 1
 
 
-def get_pixel_indices(image_shape: tuple, num_channels: int, seed: int) -> np.ndarray:
+class PermutationCache(ArrayLRUCache):
+    """
+    LRU cache of full shuffled index paths, keyed by (seed, image shape).
+    
+    The legacy 'shuffle' path costs O(height*width*channels) per call even
+    when only a short prefix is needed. Batch jobs reuse one password across
+    many same-size images, so the full shuffle is cached and every later call
+    just slices it.
+    """
+    
+    def __init__(self, max_bytes: int = DEFAULT_PERMUTATION_CACHE_BYTES):
+        super().__init__(max_bytes)
+
+
+# Shared by every embed/extract call in this process
+_permutation_cache = PermutationCache()
+
+
+def configure_permutation_cache(max_bytes: int) -> None:
+    """
+    Set the memory budget of the shared permutation cache (0 disables it).
+    
+    Args:
+        max_bytes (int): Maximum total size of cached index paths in bytes
+    """
+    _permutation_cache.resize(max_bytes)
+
+
+def permutation_cache_info() -> dict:
+    """Return hit/miss/eviction counters and memory usage of the shared cache."""
+    return _permutation_cache.info()
+
+
+def clear_permutation_cache() -> None:
+    """Empty the shared permutation cache and reset its counters."""
+    _permutation_cache.clear()
+
+
+# Optional on-disk store consulted after the in-memory cache (None = disabled)
+_permutation_store = None
+
+
+def set_permutation_store(store) -> None:
+    """
+    Attach a persistent store for full shuffles, or detach it with None.
+    
+    Example:
+        from permutation_store import PermutationStore
+        set_permutation_store(PermutationStore("~/.cache/stego-paths"))
+    
+    Args:
+        store (PermutationStore or None): Store to read from and write to
+    """
+    global _permutation_store
+    _permutation_store = store
+
+
+def index_dtype(total_channels: int) -> type:
+    """
+    Pick the smallest unsigned integer dtype that can hold every flat channel
+    index of an image (0 to total_channels - 1).
+    
+    Realistic images have far fewer than 2^32 channel slots, so paths are
+    usually uint32 - half the memory traffic of int64 for the shuffle, the
+    slice and every gather.
+    
+    Args:
+        total_channels (int): height * width * channels
+        
+    Returns:
+        type: np.uint8, np.uint16, np.uint32 or np.uint64
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if total_channels - 1 <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+def get_pixel_indices(image_shape: tuple, num_channels: int, seed: int,
+                      path_format: str = PATH_FORMAT_SHUFFLE) -> np.ndarray:
     """
     Generate a shuffled list of pixel channel indices based on a seed.
     
@@ -102,13 +402,25 @@ def get_pixel_indices(image_shape: tuple, num_channels: int, seed: int) -> np.nd
     - Since both use the same seed, the receiver's list is exactly the first N
       elements of the sender's list
     
+    Path formats:
+    - 'shuffle' (v1): shuffles all height*width*channels indices, then slices.
+      O(total) time and memory even for a short message. Default, and the
+      format of every image embedded before path formats existed. Full
+      shuffles are kept in a shared LRU cache (see PermutationCache), so
+      repeated calls with the same seed and shape only pay for the slice.
+    - 'feistel' (v2): evaluates a keyed permutation only at positions
+      0..num_channels-1 (see feistel_permutation_prefix). O(num_channels).
+    
     Args:
         image_shape (tuple): (height, width, channels) of the image
         num_channels (int): How many pixel channels to return
         seed (int): Random seed for reproducible shuffling
+        path_format (str): 'shuffle' (legacy) or 'feistel'
         
     Returns:
-        np.ndarray: Array of shuffled channel indices
+        np.ndarray: Array of shuffled channel indices, in the smallest unsigned
+                    dtype that fits the image (see index_dtype); read-only for
+                    'shuffle'
     """
     height, width, channels = image_shape
     
@@ -121,19 +433,121 @@ def get_pixel_indices(image_shape: tuple, num_channels: int, seed: int) -> np.nd
             f"Requested {num_channels} channels but image only has {total_channels}"
         )
     
-    # Create a reproducible random generator with the seed
-    rng = np.random.default_rng(seed)
+    if path_format == PATH_FORMAT_FEISTEL:
+        return feistel_permutation_prefix(total_channels, num_channels, seed)
+    if path_format != PATH_FORMAT_SHUFFLE:
+        raise ValueError(
+            f"Unknown path format '{path_format}'. Must be one of: {', '.join(PATH_FORMATS)}"
+        )
     
-    # Create array of all channel indices: [0, 1, 2, ..., total_channels-1]
-    all_indices = np.arange(total_channels)
+    # Same password + same image shape = same path: reuse a cached shuffle
+    cache_key = (seed, tuple(image_shape))
+    all_indices = _permutation_cache.get(cache_key)
     
-    # Shuffle the entire array (this is the secret path through the image)
-    rng.shuffle(all_indices)
+    if all_indices is None:
+        # A persistent store (if attached) maps a previously computed path;
+        # only the pages holding the first num_channels entries are read
+        store = _permutation_store
+        if store is not None:
+            stored = store.load(seed, image_shape, prefix_length=num_channels)
+            if stored is not None:
+                return stored[:num_channels]
+        
+        # Create a reproducible random generator with the seed
+        rng = np.random.default_rng(seed)
+        
+        # Create array of all channel indices: [0, 1, 2, ..., total_channels-1]
+        # (the shuffle visits elements in the same order for any dtype, so
+        # compact indices produce exactly the same path as int64 ones)
+        all_indices = np.arange(total_channels, dtype=index_dtype(total_channels))
+        
+        # Shuffle the entire array (this is the secret path through the image)
+        rng.shuffle(all_indices)
+        
+        _permutation_cache.put(cache_key, all_indices)
+        if store is not None:
+            store.save(seed, image_shape, all_indices)
     
     # Return only the first num_channels (sender gets more, receiver gets fewer)
     return all_indices[:num_channels]
 
 
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """
+    SplitMix64 finalizer: a fast, well-distributed 64-bit mixing function.
+    Used as the Feistel round function (arithmetic wraps modulo 2^64).
+    """
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def feistel_permutation_prefix(domain_size: int, count: int, seed: int) -> np.ndarray:
+    """
+    Return the first `count` entries of a keyed pseudorandom permutation of
+    range(domain_size), without materializing the whole permutation.
+    
+    How it works:
+    - A keyed Feistel network is a bijection on the b-bit integers, where
+      2^b is the smallest power of two >= domain_size (so 2^b < 2*domain_size)
+    - The secret path is enc(0), enc(1), enc(2), ... with every output
+      >= domain_size skipped. Each index in range(domain_size) appears
+      exactly once, so the path is a permutation of the image's channels
+      (the batched equivalent of cycle-walking)
+    - Computing the first k path entries needs about 2k encryptions, so it
+      costs O(k) time and memory regardless of image size
+    
+    Args:
+        domain_size (int): Size of the permuted range (height*width*channels)
+        count (int): Number of leading permutation entries to compute
+        seed (int): Password-derived seed (keys the round functions)
+        
+    Returns:
+        np.ndarray: `count` distinct indices in [0, domain_size), in the
+                    dtype chosen by index_dtype(domain_size)
+    """
+    if count > domain_size:
+        raise ValueError(f"Requested {count} indices from a domain of {domain_size}")
+    
+    # Unbalanced split: each round rotates a (total_bits - low_bits)-bit high
+    # half past a low_bits-bit low half, so odd bit widths need no padding
+    total_bits = max(2, (domain_size - 1).bit_length())
+    low_bits = total_bits // 2
+    high_bits = total_bits - low_bits
+    low_mask = np.uint64((1 << low_bits) - 1)
+    high_mask = np.uint64((1 << high_bits) - 1)
+    
+    # Independent 64-bit round keys derived from the seed
+    round_keys = np.random.default_rng(seed).integers(
+        0, 2**64, size=FEISTEL_ROUNDS, dtype=np.uint64, endpoint=False
+    )
+    
+    def encrypt(values: np.ndarray) -> np.ndarray:
+        for key in round_keys:
+            low = values & low_mask
+            high = values >> np.uint64(low_bits)
+            high ^= _mix64(low ^ key) & high_mask
+            values = (low << np.uint64(high_bits)) | high
+        return values
+    
+    # Encrypt counters in batches sized to cover the expected skip rate
+    domain_bits = 1 << total_bits
+    expansion = domain_bits / domain_size
+    chunks = []
+    found = 0
+    counter = 0
+    while found < count:
+        batch = min(int((count - found) * expansion * 1.05) + 64, domain_bits - counter)
+        encrypted = encrypt(np.arange(counter, counter + batch, dtype=np.uint64))
+        encrypted = encrypted[encrypted < domain_size]
+        chunks.append(encrypted)
+        found += encrypted.size
+        counter += batch
+    
+    positions = np.concatenate(chunks) if chunks else np.empty(0, dtype=np.uint64)
+    return positions[:count].astype(index_dtype(domain_size))
+
+
 def index_to_pixel(index: int, width: int, channels: int) -> tuple:
     """
     Convert a flat channel index to (row, col, channel) coordinates.